@@ -0,0 +1,46 @@
+"""Track row modification time for incremental backups.
+
+Revision ID: 20261018_0021
+Revises: 20260228_0020
+Create Date: 2026-10-18
+
+Adds ``updated_at`` to study_sessions and daily_quests (backfilled from the
+existing timestamps) so ``GET /backup/export?since=`` can select changed rows.
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_0021"
+down_revision = "20260228_0020"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("study_sessions") as batch:
+        batch.add_column(sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True))
+    op.execute("UPDATE study_sessions SET updated_at = COALESCE(deleted_at, created_at)")
+    with op.batch_alter_table("study_sessions") as batch:
+        batch.alter_column("updated_at", existing_type=sa.DateTime(timezone=True), nullable=False)
+    op.create_index("ix_study_sessions_updated_at", "study_sessions", ["updated_at"])
+
+    with op.batch_alter_table("daily_quests") as batch:
+        batch.add_column(sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True))
+    op.execute("UPDATE daily_quests SET updated_at = created_at")
+    with op.batch_alter_table("daily_quests") as batch:
+        batch.alter_column("updated_at", existing_type=sa.DateTime(timezone=True), nullable=False)
+    op.create_index("ix_daily_quests_updated_at", "daily_quests", ["updated_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_daily_quests_updated_at", table_name="daily_quests")
+    with op.batch_alter_table("daily_quests") as batch:
+        batch.drop_column("updated_at")
+
+    op.drop_index("ix_study_sessions_updated_at", table_name="study_sessions")
+    with op.batch_alter_table("study_sessions") as batch:
+        batch.drop_column("updated_at")
@@ -0,0 +1,75 @@
+"""XP ledger archive: daily rollup table + archived month manifest.
+
+Revision ID: 20261018_0022
+Revises: 20261018_0021
+Create Date: 2026-10-18
+
+Closed ledger months are rolled up into ``xp_ledger_daily_totals`` (one row per
+user/day/event_type) and recorded in ``xp_ledger_archives``; raw rows may then
+be exported to gzip files and pruned (see app.services.ledger_archive).
+
+The ledger itself is not converted to a partitioned table: Postgres requires
+the partition key in every unique constraint, which would weaken the
+``uq_xp_ledger_source`` idempotency guarantee.
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_0022"
+down_revision = "20261018_0021"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "xp_ledger_daily_totals",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.Column("day_key", sa.String(), nullable=False),
+        sa.Column("event_type", sa.String(), nullable=False),
+        sa.Column("event_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("xp_total", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("gold_total", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "user_id", "day_key", "event_type", name="uq_xp_ledger_daily_total"
+        ),
+    )
+    op.create_index("ix_xp_ledger_daily_totals_user_id", "xp_ledger_daily_totals", ["user_id"])
+    op.create_index("ix_xp_ledger_daily_totals_day_key", "xp_ledger_daily_totals", ["day_key"])
+    op.create_index(
+        "ix_xp_ledger_daily_totals_event_type", "xp_ledger_daily_totals", ["event_type"]
+    )
+
+    op.create_table(
+        "xp_ledger_archives",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("month_key", sa.String(), nullable=False),
+        sa.Column("row_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("xp_total", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("gold_total", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("file_path", sa.String(), nullable=True),
+        sa.Column("file_sha256", sa.String(), nullable=True),
+        sa.Column("raw_deleted", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_xp_ledger_archives_month_key", "xp_ledger_archives", ["month_key"], unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_xp_ledger_archives_month_key", table_name="xp_ledger_archives")
+    op.drop_table("xp_ledger_archives")
+    op.drop_index("ix_xp_ledger_daily_totals_event_type", table_name="xp_ledger_daily_totals")
+    op.drop_index("ix_xp_ledger_daily_totals_day_key", table_name="xp_ledger_daily_totals")
+    op.drop_index("ix_xp_ledger_daily_totals_user_id", table_name="xp_ledger_daily_totals")
+    op.drop_table("xp_ledger_daily_totals")
@@ -0,0 +1,134 @@
+"""Range-partition audit_events and system_window_messages by month (Postgres).
+
+Revision ID: 20261018_0023
+Revises: 20261018_0022
+Create Date: 2026-10-18
+
+Both tables are append-only logs with age-based retention. Partitioning them by
+``created_at`` lets retention detach/drop whole months instead of running a
+large DELETE (see app.services.retention). Postgres requires the partition key
+in the primary key, so the PK becomes ``(id, created_at)``; ids stay uuid4 and
+nothing references these tables.
+
+Monthly partitions are created from the oldest existing row up to three months
+ahead, plus a DEFAULT partition as a safety net; the retention job keeps
+creating future months. Other dialects (SQLite) are left untouched.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_0023"
+down_revision = "20261018_0022"
+branch_labels = None
+depends_on = None
+
+_MONTHS_AHEAD = 3
+
+_TABLES: dict[str, dict] = {
+    "audit_events": {
+        "columns": lambda: [
+            sa.Column("id", sa.String(), nullable=False),
+            sa.Column("user_id", sa.String(), nullable=True),
+            sa.Column("event", sa.String(), nullable=False),
+            sa.Column("metadata_json", sa.JSON(), nullable=False),
+            sa.Column("ip", sa.String(), nullable=True),
+            sa.Column("user_agent", sa.String(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        ],
+        "fk": ("fk_audit_events_user_id", "SET NULL"),
+        "indexes": ["user_id", "event", "ip", "created_at"],
+    },
+    "system_window_messages": {
+        "columns": lambda: [
+            sa.Column("id", sa.String(), nullable=False),
+            sa.Column("user_id", sa.String(), nullable=False),
+            sa.Column("role", sa.String(), nullable=False, server_default="system"),
+            sa.Column("content", sa.Text(), nullable=False),
+            sa.Column("source", sa.String(), nullable=False, server_default="gemini"),
+            sa.Column("xp_hint", sa.Integer(), nullable=True),
+            sa.Column("mission_done_hint", sa.Boolean(), nullable=True),
+            sa.Column("status_hint", sa.String(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        ],
+        "fk": ("fk_system_window_messages_user_id", "CASCADE"),
+        "indexes": ["user_id", "created_at", "role", "source"],
+    },
+}
+
+
+def _month_start(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    value = value.astimezone(timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def _add_months(start: datetime, months: int) -> datetime:
+    index = start.year * 12 + (start.month - 1) + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def _rebuild(table: str, *, partitioned: bool) -> None:
+    spec = _TABLES[table]
+    legacy = f"{table}_legacy"
+    column_names = ", ".join(column.name for column in spec["columns"]())
+
+    op.rename_table(table, legacy)
+    for column in spec["indexes"]:
+        op.execute(f'DROP INDEX IF EXISTS "ix_{table}_{column}"')
+    # The PK index name must be free for the new table.
+    op.execute(f'ALTER TABLE "{legacy}" DROP CONSTRAINT IF EXISTS "{table}_pkey"')
+
+    fk_name, on_delete = spec["fk"]
+    table_args: list = [
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], name=fk_name, ondelete=on_delete),
+    ]
+    if partitioned:
+        table_args.append(sa.PrimaryKeyConstraint("id", "created_at", name=f"{table}_pkey"))
+        op.create_table(
+            table,
+            *spec["columns"](),
+            *table_args,
+            postgresql_partition_by="RANGE (created_at)",
+        )
+
+        oldest = op.get_bind().execute(sa.text(f'SELECT min(created_at) FROM "{legacy}"')).scalar()
+        current = _month_start(datetime.now(timezone.utc))
+        start = _month_start(oldest) if oldest is not None and oldest < current else current
+        end = _add_months(current, _MONTHS_AHEAD + 1)
+        while start < end:
+            op.execute(
+                f'CREATE TABLE "{table}_p{start:%Y%m}" PARTITION OF "{table}" '
+                f"FOR VALUES FROM ('{start.isoformat()}') "
+                f"TO ('{_add_months(start, 1).isoformat()}')"
+            )
+            start = _add_months(start, 1)
+        op.execute(f'CREATE TABLE "{table}_default" PARTITION OF "{table}" DEFAULT')
+    else:
+        table_args.append(sa.PrimaryKeyConstraint("id", name=f"{table}_pkey"))
+        op.create_table(table, *spec["columns"](), *table_args)
+
+    op.execute(f'INSERT INTO "{table}" ({column_names}) SELECT {column_names} FROM "{legacy}"')
+    op.drop_table(legacy)
+    for column in spec["indexes"]:
+        op.create_index(f"ix_{table}_{column}", table, [column])
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for table in _TABLES:
+        _rebuild(table, partitioned=True)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for table in _TABLES:
+        _rebuild(table, partitioned=False)
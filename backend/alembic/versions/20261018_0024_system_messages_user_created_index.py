@@ -0,0 +1,31 @@
+"""Composite (user_id, created_at) index on system_window_messages.
+
+Revision ID: 20261018_0024
+Revises: 20261018_0023
+Create Date: 2026-10-18
+
+Serves the per-user history reads and the ROW_NUMBER() cap enforcement in
+app.services.retention.trim_system_messages.
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+
+revision = "20261018_0024"
+down_revision = "20261018_0023"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_system_window_messages_user_created",
+        "system_window_messages",
+        ["user_id", "created_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_system_window_messages_user_created", table_name="system_window_messages")
@@ -0,0 +1,54 @@
+"""Combat turn log and per-battle RNG seed.
+
+Revision ID: 20261018_0025
+Revises: 20261018_0024
+Create Date: 2026-10-18
+
+Battles keep their RNG seed, event counter and the inline log of the ongoing
+battle; finished battles have their events in combat_turns
+(app.services.combat_log).
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_0025"
+down_revision = "20261018_0024"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("combat_battles", sa.Column("rng_seed", sa.BigInteger(), nullable=True))
+    op.add_column(
+        "combat_battles",
+        sa.Column("turn_seq", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column(
+        "combat_battles",
+        sa.Column("turn_log_json", sa.JSON(), nullable=False, server_default="[]"),
+    )
+    op.create_table(
+        "combat_turns",
+        sa.Column("battle_id", sa.String(), nullable=False),
+        sa.Column("seq", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("ref", sa.String(), nullable=True),
+        sa.Column("option_index", sa.Integer(), nullable=True),
+        sa.Column("player_damage", sa.Integer(), nullable=False),
+        sa.Column("enemy_damage", sa.Integer(), nullable=False),
+        sa.Column("player_hp", sa.Integer(), nullable=False),
+        sa.Column("enemy_hp", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["battle_id"], ["combat_battles.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("battle_id", "seq"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("combat_turns")
+    op.drop_column("combat_battles", "turn_log_json")
+    op.drop_column("combat_battles", "turn_seq")
+    op.drop_column("combat_battles", "rng_seed")
@@ -0,0 +1,40 @@
+"""Per-user achievement counters.
+
+Revision ID: 20261018_0026
+Revises: 20261018_0025
+Create Date: 2026-10-18
+
+Counters are filled lazily: a user without a row is rebuilt from history on
+first use (app.services.achievements).
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_0026"
+down_revision = "20261018_0025"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_achievement_counters",
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.Column("total_sessions", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("total_minutes", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("review_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("streak_days", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("streak_end", sa.String(), nullable=True),
+        sa.Column("stale", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("user_achievement_counters")
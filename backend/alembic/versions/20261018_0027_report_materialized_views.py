@@ -0,0 +1,86 @@
+"""Materialized views for monthly/daily reports.
+
+Revision ID: 20261018_0027
+Revises: 20261018_0026
+Create Date: 2026-10-18
+
+On Postgres, mv_user_daily_stats / mv_user_monthly_stats snapshot the plain
+v_user_* views from 20260207_0005. Each has a unique index so it can be
+refreshed with REFRESH MATERIALIZED VIEW CONCURRENTLY (app.services.report_views).
+Other dialects only get the refresh bookkeeping table; reports query live.
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_0027"
+down_revision = "20261018_0026"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "report_view_refreshes",
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("refreshed_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("duration_ms", sa.Integer(), nullable=False, server_default="0"),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute(
+        """
+        CREATE MATERIALIZED VIEW mv_user_daily_stats AS
+        SELECT
+          user_id,
+          date_key,
+          SUM(minutes)::int AS minutes,
+          SUM(xp_earned)::int AS xp,
+          SUM(gold_earned)::int AS gold,
+          COUNT(*)::int AS sessions
+        FROM study_sessions
+        WHERE deleted_at IS NULL
+        GROUP BY user_id, date_key
+        WITH DATA
+        """
+    )
+    op.execute(
+        "CREATE UNIQUE INDEX ux_mv_user_daily_stats ON mv_user_daily_stats (user_id, date_key)"
+    )
+    op.execute(
+        """
+        CREATE MATERIALIZED VIEW mv_user_monthly_stats AS
+        SELECT
+          user_id,
+          SUBSTR(date_key, 1, 7) AS month_key,
+          SUM(minutes)::int AS minutes,
+          SUM(xp_earned)::int AS xp,
+          SUM(gold_earned)::int AS gold,
+          COUNT(*)::int AS sessions
+        FROM study_sessions
+        WHERE deleted_at IS NULL
+        GROUP BY user_id, SUBSTR(date_key, 1, 7)
+        WITH DATA
+        """
+    )
+    op.execute(
+        "CREATE UNIQUE INDEX ux_mv_user_monthly_stats "
+        "ON mv_user_monthly_stats (user_id, month_key)"
+    )
+    op.execute(
+        "INSERT INTO report_view_refreshes (name, refreshed_at, duration_ms) VALUES "
+        "('mv_user_daily_stats', now(), 0), ('mv_user_monthly_stats', now(), 0)"
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_user_monthly_stats")
+        op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_user_daily_stats")
+    op.drop_table("report_view_refreshes")
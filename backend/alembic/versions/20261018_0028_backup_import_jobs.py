@@ -0,0 +1,49 @@
+"""Persist background backup import jobs.
+
+Revision ID: 20261018_0028
+Revises: 20261018_0027
+Create Date: 2026-10-18
+
+Job progress used to live in a per-process dict, so polling a job from another
+worker returned 404. It now lives in backup_import_jobs (app.services.backup).
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_0028"
+down_revision = "20261018_0027"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "backup_import_jobs",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.Column("mode", sa.String(), nullable=False, server_default="replace"),
+        sa.Column("status", sa.String(), nullable=False, server_default="queued"),
+        sa.Column("phase", sa.String(), nullable=False, server_default="queued"),
+        sa.Column("processed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("total", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("error", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_backup_import_jobs_user_id", "backup_import_jobs", ["user_id"])
+    op.create_index("ix_backup_import_jobs_status", "backup_import_jobs", ["status"])
+    op.create_index("ix_backup_import_jobs_created_at", "backup_import_jobs", ["created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_backup_import_jobs_created_at", table_name="backup_import_jobs")
+    op.drop_index("ix_backup_import_jobs_status", table_name="backup_import_jobs")
+    op.drop_index("ix_backup_import_jobs_user_id", table_name="backup_import_jobs")
+    op.drop_table("backup_import_jobs")
@@ -0,0 +1,36 @@
+"""Keep idempotency keys of archived ledger rows.
+
+Revision ID: 20261018_0029
+Revises: 20261018_0028
+Create Date: 2026-10-18
+
+The ledger archiver prunes raw xp_ledger_events rows, which also removed the
+rows backing uq_xp_ledger_source. Their (user_id, source_type, source_ref) now
+move to xp_ledger_source_keys in the same transaction as the delete.
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_0029"
+down_revision = "20261018_0028"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "xp_ledger_source_keys",
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.Column("source_type", sa.String(), nullable=False),
+        sa.Column("source_ref", sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "source_type", "source_ref"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("xp_ledger_source_keys")
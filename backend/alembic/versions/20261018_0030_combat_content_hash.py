@@ -0,0 +1,29 @@
+"""Record the combat content each battle was played with.
+
+Revision ID: 20261018_0030
+Revises: 20261018_0029
+Create Date: 2026-10-18
+
+combat_battles.content_hash holds the module's content fingerprint at battle
+start; app.services.combat.replay_battle refuses to replay against different
+content. Existing battles keep NULL and replay on a best-effort basis.
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_0030"
+down_revision = "20261018_0029"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("combat_battles", sa.Column("content_hash", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("combat_battles", "content_hash")
@@ -0,0 +1,32 @@
+"""Record when each user's study sessions last changed.
+
+Revision ID: 20261018_0031
+Revises: 20261018_0030
+Create Date: 2026-10-18
+
+users.sessions_changed_at is bumped by every session write, hard deletes
+included; app.services.report_views only reads the report views for a user
+whose sessions did not change after the last refresh. NULL means unchanged
+since the column was added.
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_0031"
+down_revision = "20261018_0030"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users", sa.Column("sessions_changed_at", sa.DateTime(timezone=True), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "sessions_changed_at")
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, BackgroundTasks, Depends
 from sqlmodel import Session
 
 from app.core.deps import db_session, get_current_user
@@ -13,8 +13,9 @@ router = APIRouter(prefix="/achievements", tags=["achievements"])
 
 @router.get("", response_model=list[AchievementOut])
 def list_achievements(
+    background: BackgroundTasks,
     db: Session = Depends(db_session),
     user: User = Depends(get_current_user),
 ):
-    data = list_and_unlock_achievements(db, user)
+    data = list_and_unlock_achievements(db, user, background_tasks=background)
     return data
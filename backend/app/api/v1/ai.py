@@ -2,22 +2,39 @@
 
 from __future__ import annotations
 
+import json
+import re
+import threading
+from collections.abc import AsyncIterator
 from datetime import datetime, timedelta, timezone
 from typing import Any, Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from sqlmodel import Session, select
 
 from app.core.config import settings
 from app.core.deps import db_session, get_current_user, get_optional_user
 from app.core.rate_limit import Rule, rate_limit
+from app.db import get_session
 from app.models import SystemWindowMessage, User
+from app.services.retention import trim_system_messages
 
 from app.services.gemini_client import (
     GeminiError,
     generate_content_text,
     parse_json_object,
+    stream_content_text,
 )
 from app.services.ai_rate_limiter import (
     enforce_guest_daily_limit,
@@ -184,6 +201,156 @@ def _normalize_hunter_payload(payload: dict[str, Any]) -> HunterSystemOut:
     )
 
 
+# ---------------------------------------------------------------------------
+# Streaming (SSE) helpers
+# ---------------------------------------------------------------------------
+
+
+def _hex4(raw: str) -> int:
+    try:
+        return int(raw, 16) if len(raw) == 4 else 0xFFFD
+    except ValueError:
+        return 0xFFFD
+
+
+class _JsonStringFieldStream:
+    """Incrementally decode one string field of a JSON object streamed in chunks.
+
+    ``feed`` returns the newly decoded characters of the field value, so the
+    Hunter's ``resposta_texto`` can be forwarded while the JSON is still arriving.
+    """
+
+    _ESCAPES = {
+        '"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t",
+    }
+
+    def __init__(self, field: str) -> None:
+        self._pattern = re.compile(r'"' + re.escape(field) + r'"\s*:\s*"')
+        self._state = "seek"
+        self._pending = ""
+
+    def feed(self, chunk: str) -> str:
+        if self._state == "done":
+            return ""
+        self._pending += chunk
+        if self._state == "seek":
+            match = self._pattern.search(self._pending)
+            if match is None:
+                return ""
+            self._pending = self._pending[match.end():]
+            self._state = "value"
+        return self._decode()
+
+    def _decode(self) -> str:
+        out: list[str] = []
+        text = self._pending
+        i = 0
+        while i < len(text):
+            ch = text[i]
+            if ch == '"':
+                self._state = "done"
+                self._pending = ""
+                return "".join(out)
+            if ch != "\\":
+                out.append(ch)
+                i += 1
+                continue
+            if i + 1 >= len(text):
+                break
+            code = text[i + 1]
+            if code != "u":
+                out.append(self._ESCAPES.get(code, code))
+                i += 2
+                continue
+            # \uXXXX, possibly followed by the low half of a surrogate pair.
+            if i + 6 > len(text):
+                break
+            value = _hex4(text[i + 2 : i + 6])
+            if 0xD800 <= value <= 0xDBFF:
+                if i + 12 > len(text):
+                    break
+                low = _hex4(text[i + 8 : i + 12]) if text[i + 6 : i + 8] == "\\u" else 0
+                if 0xDC00 <= low <= 0xDFFF:
+                    out.append(chr(0x10000 + ((value - 0xD800) << 10) + (low - 0xDC00)))
+                    i += 12
+                    continue
+                value = 0xFFFD
+            out.append(chr(value))
+            i += 6
+        self._pending = text[i:]
+        return "".join(out)
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+    )
+
+
+def _sse_error(exc: GeminiError) -> str:
+    return _sse("error", {"code": exc.code, "message": str(exc), "details": exc.details})
+
+
+async def _first_chunk(chunks: AsyncIterator[str]) -> str:
+    """Wait for the first chunk so setup/provider errors still map to HTTP statuses."""
+    try:
+        return await chunks.__anext__()
+    except GeminiError as exc:
+        _gemini_error_to_http(exc)
+    except StopAsyncIteration:
+        _error(
+            status.HTTP_502_BAD_GATEWAY,
+            code="ai_invalid_response",
+            message="AI provider returned empty payload",
+        )
+    raise AssertionError("unreachable")
+
+
+async def _hunter_stream_response(mensagem: str) -> StreamingResponse:
+    chunks = stream_content_text(
+        prompt=mensagem,
+        system_instruction=HUNTER_SYSTEM_PROMPT,
+        response_mime_type="application/json",
+    )
+    first = await _first_chunk(chunks)
+
+    async def _events() -> AsyncIterator[str]:
+        field = _JsonStringFieldStream("resposta_texto")
+        parts: list[str] = []
+        try:
+            chunk: str | None = first
+            while chunk is not None:
+                parts.append(chunk)
+                delta = field.feed(chunk)
+                if delta:
+                    yield _sse("delta", {"text": delta})
+                chunk = await anext(chunks, None)
+        except GeminiError as exc:
+            yield _sse_error(exc)
+            return
+
+        parsed = parse_json_object("".join(parts))
+        if parsed is None:
+            yield _sse(
+                "error",
+                {
+                    "code": "ai_invalid_response",
+                    "message": "AI provider returned non-JSON payload",
+                    "details": {},
+                },
+            )
+            return
+        yield _sse("result", _normalize_hunter_payload(parsed).model_dump())
+
+    return _sse_response(_events())
+
+
 # ---------------------------------------------------------------------------
 # System window history helpers
 # ---------------------------------------------------------------------------
@@ -215,22 +382,30 @@ def _read_history(session: Session, user_id: str, limit: int) -> list[SystemWind
     return rows
 
 
-def _prune_history(session: Session, user_id: str) -> None:
-    keep = max(1, int(settings.ai_history_max_messages))
-    overflow_ids = session.exec(
-        select(SystemWindowMessage.id)
-        .where(SystemWindowMessage.user_id == user_id)
-        .order_by(SystemWindowMessage.created_at.desc())
-        .offset(keep)
-    ).all()
-    if not overflow_ids:
-        return
+# Messages appended per user since their history was last trimmed. Reads are capped
+# at ai_history_max_messages anyway, so trimming only runs once enough rows piled up.
+_history_pending: dict[str, int] = {}
+_history_pending_lock = threading.Lock()
+_HISTORY_PENDING_MAX_USERS = 10000
 
-    for message_id in overflow_ids:
-        row = session.get(SystemWindowMessage, message_id)
-        if row is not None:
-            session.delete(row)
-    session.commit()
+
+def _history_prune_due(user_id: str, added: int) -> bool:
+    slack = max(1, int(settings.ai_history_max_messages) // 10)
+    with _history_pending_lock:
+        pending = _history_pending.pop(user_id, 0) + added
+        if pending >= slack:
+            return True
+        if len(_history_pending) >= _HISTORY_PENDING_MAX_USERS:
+            _history_pending.clear()
+        _history_pending[user_id] = pending
+        return False
+
+
+def _prune_history(user_id: str) -> None:
+    keep = max(1, int(settings.ai_history_max_messages))
+    with get_session() as session:
+        trim_system_messages(session, max_per_user=keep, user_id=user_id)
+        session.commit()
 
 
 # ---------------------------------------------------------------------------
@@ -244,6 +419,7 @@ async def _monitor_hunter_message(mensagem: str) -> HunterSystemOut:
             prompt=mensagem,
             system_instruction=HUNTER_SYSTEM_PROMPT,
             response_mime_type="application/json",
+            cache_scope="hunter",
         )
     except GeminiError as exc:
         _gemini_error_to_http(exc)
@@ -288,12 +464,46 @@ async def generate_text(
         text = await generate_content_text(
             prompt=payload.prompt,
             system_instruction=system_instruction,
+            cache_scope="ai_text",
         )
     except GeminiError as exc:
         _gemini_error_to_http(exc)
     return AiTextOut(text=text)
 
 
+@router.post(
+    "/text/stream",
+    dependencies=[Depends(rate_limit("ai_text", _AI_BURST_RULE))],
+)
+async def stream_text(
+    payload: AiTextIn,
+    user: User = Depends(get_current_user),
+):
+    """SSE variant of /ai/text: ``delta`` events with text chunks, then ``done``."""
+    await enforce_user_burst_limit(user)
+    await enforce_user_daily_limit(user)
+
+    chunks = stream_content_text(
+        prompt=payload.prompt,
+        system_instruction=payload.systemInstruction.strip() or None,
+    )
+    first = await _first_chunk(chunks)
+
+    async def _events() -> AsyncIterator[str]:
+        parts = [first]
+        yield _sse("delta", {"text": first})
+        try:
+            async for chunk in chunks:
+                parts.append(chunk)
+                yield _sse("delta", {"text": chunk})
+        except GeminiError as exc:
+            yield _sse_error(exc)
+            return
+        yield _sse("done", {"text": "".join(parts)})
+
+    return _sse_response(_events())
+
+
 @router.get("/system-history", response_model=SystemWindowHistoryOut)
 def get_system_history(
     limit: int = Query(default=80, ge=1, le=500),
@@ -307,11 +517,13 @@ def get_system_history(
 @router.post("/system-history", response_model=SystemWindowHistoryOut)
 def append_system_history(
     payload: SystemWindowHistoryAppendIn,
+    background_tasks: BackgroundTasks,
     session: Session = Depends(db_session),
     user: User = Depends(get_current_user),
 ):
     if payload.messages:
         base = datetime.now(timezone.utc)
+        added = 0
         for idx, message in enumerate(payload.messages):
             content = message.content.strip()
             if not content:
@@ -327,8 +539,10 @@ def append_system_history(
                 created_at=base + timedelta(milliseconds=idx),
             )
             session.add(row)
+            added += 1
         session.commit()
-        _prune_history(session, user.id)
+        if added and _history_prune_due(user.id, added):
+            background_tasks.add_task(_prune_history, user.id)
 
     rows = _read_history(session, user.id, limit=max(1, int(settings.ai_history_max_messages)))
     return SystemWindowHistoryOut(messages=[_to_history_out(row) for row in rows])
@@ -367,6 +581,41 @@ async def monitor_hunter(
     return await _monitor_hunter_message(payload.mensagem)
 
 
+@router.post(
+    "/hunter/stream",
+    dependencies=[Depends(rate_limit("ai_hunter", _AI_BURST_RULE))],
+)
+async def stream_hunter(
+    payload: HunterMessageIn,
+    request: Request,
+    user: User | None = Depends(get_optional_user),
+):
+    """SSE variant of /ai/hunter: ``delta`` events with ``resposta_texto``, then ``result``."""
+    if user is None:
+        await enforce_guest_daily_limit(request)
+    else:
+        await enforce_user_burst_limit(user)
+        await enforce_user_daily_limit(user)
+    return await _hunter_stream_response(payload.mensagem)
+
+
+@chat_router.post(
+    "/chat/stream",
+    dependencies=[Depends(rate_limit("ai_chat", _AI_BURST_RULE))],
+)
+async def chat_sistema_stream(
+    payload: HunterMessageIn,
+    request: Request,
+    user: User | None = Depends(get_optional_user),
+):
+    if user is None:
+        await enforce_guest_daily_limit(request)
+    else:
+        await enforce_user_burst_limit(user)
+        await enforce_user_daily_limit(user)
+    return await _hunter_stream_response(payload.mensagem)
+
+
 @chat_router.post(
     "/chat",
     response_model=HunterSystemOut,
@@ -1,16 +1,35 @@
 from __future__ import annotations
 
 import json
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from typing import Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
-from sqlmodel import Session, delete, select
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, status
+from sqlmodel import Session, select
 
 from app.core.deps import db_session, get_current_user
 from app.core.rate_limit import Rule, rate_limit
-from app.models import DailyQuest, Drill, DrillReview, StudyPlan, StudySession, User
-from app.schemas import BackupImportIn, BackupOut, UserOut
-from app.services.utils import dump_goals, parse_goals
+from app.models import (
+    DailyQuest,
+    Drill,
+    DrillReview,
+    StudyPlan,
+    StudySession,
+    User,
+    XpLedgerEvent,
+)
+from app.schemas import BackupImportIn, BackupImportJobOut, BackupOut, UserOut
+from app.services.backup import (
+    IMPORT_MODE_MERGE,
+    BackupImportJob,
+    count_backup_rows,
+    create_import_job,
+    get_import_job,
+    import_backup_payload,
+    merge_backup_payload,
+    run_import_job,
+)
+from app.services.utils import parse_goals
 
 router = APIRouter()
 _BACKUP_IMPORT_RULE = Rule(max_requests=2, window_seconds=60)
@@ -20,6 +39,12 @@ _MAX_BACKUP_SESSIONS = 5000
 _MAX_BACKUP_QUESTS = 5000
 _MAX_BACKUP_REVIEWS = 10000
 _MAX_BACKUP_DRILLS = 4000
+# Background jobs run outside the request cycle, so they accept larger archives.
+_BACKUP_JOB_LIMIT_FACTOR = 10
+# Incremental exports reach this far before ``since``: a row is stamped before its
+# transaction commits, so one committed after the previous export's reads may
+# carry an updated_at older than its exportedAt. Re-sent rows merge idempotently.
+_SINCE_OVERLAP = timedelta(minutes=15)
 
 
 def _http_413(message: str) -> HTTPException:
@@ -33,29 +58,35 @@ def _http_413(message: str) -> HTTPException:
     )
 
 
-def _validate_backup_import_limits(request: Request, payload: BackupImportIn) -> None:
+def _validate_backup_import_limits(
+    request: Request, payload: BackupImportIn, *, factor: int = 1
+) -> None:
+    max_bytes = _MAX_BACKUP_IMPORT_BYTES * factor
+    too_large = f"Backup payload exceeded {max_bytes // 1_000_000}MB limit"
     content_length = request.headers.get("content-length", "").strip()
-    if content_length.isdigit() and int(content_length) > _MAX_BACKUP_IMPORT_BYTES:
-        raise _http_413("Backup payload exceeded 1MB limit")
+    if content_length.isdigit() and int(content_length) > max_bytes:
+        raise _http_413(too_large)
 
     estimated_size = len(
         json.dumps(
             payload.model_dump(mode="json"), ensure_ascii=False, separators=(",", ":")
         ).encode("utf-8")
     )
-    if estimated_size > _MAX_BACKUP_IMPORT_BYTES:
-        raise _http_413("Backup payload exceeded 1MB limit")
+    if estimated_size > max_bytes:
+        raise _http_413(too_large)
 
     if len(payload.goals) > _MAX_GOALS:
         raise HTTPException(status_code=422, detail="Too many goals in backup payload")
-    if len(payload.sessions) > _MAX_BACKUP_SESSIONS:
+    if len(payload.sessions) > _MAX_BACKUP_SESSIONS * factor:
         raise HTTPException(status_code=422, detail="Too many sessions in backup payload")
-    if len(payload.dailyQuests) > _MAX_BACKUP_QUESTS:
+    if len(payload.dailyQuests) > _MAX_BACKUP_QUESTS * factor:
         raise HTTPException(status_code=422, detail="Too many daily quests in backup payload")
-    if len(payload.drillReviews) > _MAX_BACKUP_REVIEWS:
+    if len(payload.drillReviews) > _MAX_BACKUP_REVIEWS * factor:
         raise HTTPException(status_code=422, detail="Too many drill reviews in backup payload")
-    if len(payload.customDrills) > _MAX_BACKUP_DRILLS:
+    if len(payload.customDrills) > _MAX_BACKUP_DRILLS * factor:
         raise HTTPException(status_code=422, detail="Too many custom drills in backup payload")
+    if len(payload.deletedSessionIds) > _MAX_BACKUP_SESSIONS * factor:
+        raise HTTPException(status_code=422, detail="Too many deleted sessions in backup payload")
 
 
 def _user_out(user: User) -> UserOut:
@@ -63,26 +94,80 @@ def _user_out(user: User) -> UserOut:
     return UserOut(id=user.id, email=user.email, isAdmin=False)
 
 
+def _job_out(job: BackupImportJob) -> BackupImportJobOut:
+    return BackupImportJobOut(
+        id=job.id,
+        status=job.status,
+        phase=job.phase,
+        processed=job.processed,
+        total=job.total,
+        error=job.error,
+        createdAt=job.created_at,
+        updatedAt=job.updated_at,
+        finishedAt=job.finished_at,
+    )
+
+
 @router.get("/export", response_model=BackupOut)
 def export_backup(
+    since: Optional[datetime] = Query(default=None),
     session: Session = Depends(db_session),
     user: User = Depends(get_current_user),
 ):
+    """Full backup, or with ``since`` only the rows written after that time.
+
+    Incremental exports overlap the previous one by a few minutes, so a row may
+    come again; importing it with ``mode=merge`` is idempotent.
+
+    Incremental exports carry soft-deleted session ids in ``deletedSessionIds``;
+    drills and reviews are hard-deleted, so their deletions are not carried and
+    a merge import keeps them. ``xpLedger`` is informational and never imported.
+    """
+    # Taken before reading so rows written during the export land in the next one.
+    exported_at = datetime.now(timezone.utc)
+    if since is not None and since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    written_from = since - _SINCE_OVERLAP if since is not None else None
+
     plan = session.exec(select(StudyPlan).where(StudyPlan.user_id == user.id)).first()
     goals = parse_goals(plan.goals_json) if plan else {}
 
-    sessions = session.exec(
-        select(StudySession).where(
-            StudySession.user_id == user.id,
-            StudySession.deleted_at.is_(None),
+    sessions_stmt = select(StudySession).where(
+        StudySession.user_id == user.id,
+        StudySession.deleted_at.is_(None),
+    )
+    quests_stmt = select(DailyQuest).where(DailyQuest.user_id == user.id)
+    reviews_stmt = select(DrillReview).where(DrillReview.user_id == user.id)
+    drills_stmt = select(Drill).where(Drill.created_by_user_id == user.id)
+    deleted_session_ids: list[str] = []
+    ledger: list[XpLedgerEvent] = []
+    if since is not None:
+        sessions_stmt = sessions_stmt.where(StudySession.updated_at >= written_from)
+        quests_stmt = quests_stmt.where(DailyQuest.updated_at >= written_from)
+        reviews_stmt = reviews_stmt.where(DrillReview.updated_at >= written_from)
+        drills_stmt = drills_stmt.where(Drill.updated_at >= written_from)
+        deleted_session_ids = list(
+            session.exec(
+                select(StudySession.id).where(
+                    StudySession.user_id == user.id,
+                    StudySession.deleted_at >= written_from,
+                )
+            ).all()
         )
-    ).all()
-    quests = session.exec(select(DailyQuest).where(DailyQuest.user_id == user.id)).all()
-    reviews = session.exec(select(DrillReview).where(DrillReview.user_id == user.id)).all()
-    custom_drills = session.exec(select(Drill).where(Drill.created_by_user_id == user.id)).all()
+        ledger = session.exec(
+            select(XpLedgerEvent)
+            .where(XpLedgerEvent.user_id == user.id, XpLedgerEvent.created_at >= written_from)
+            .order_by(XpLedgerEvent.created_at.asc())
+        ).all()
+
+    sessions = session.exec(sessions_stmt).all()
+    quests = session.exec(quests_stmt).all()
+    reviews = session.exec(reviews_stmt).all()
+    custom_drills = session.exec(drills_stmt).all()
 
     return BackupOut(
-        exportedAt=datetime.now(timezone.utc),
+        exportedAt=exported_at,
+        since=since,
         user=_user_out(user),
         goals={k: int(v) for k, v in goals.items()},
         sessions=[
@@ -142,6 +227,21 @@ def export_backup(
             }
             for d in custom_drills
         ],
+        deletedSessionIds=deleted_session_ids,
+        xpLedger=[
+            {
+                "id": e.id,
+                "eventType": e.event_type,
+                "sourceType": e.source_type,
+                "sourceRef": e.source_ref,
+                "xpDelta": int(e.xp_delta),
+                "goldDelta": int(e.gold_delta),
+                "rulesetVersion": int(e.ruleset_version),
+                "payload": dict(e.payload_json or {}),
+                "createdAt": e.created_at,
+            }
+            for e in ledger
+        ],
     )
 
 
@@ -153,6 +253,7 @@ def export_backup(
 def import_backup(
     request: Request,
     payload: BackupImportIn,
+    mode: Literal["replace", "merge"] = Query(default="replace"),
     session: Session = Depends(db_session),
     user: User = Depends(get_current_user),
 ):
@@ -161,107 +262,52 @@ def import_backup(
     if int(payload.version) != 1:
         raise HTTPException(status_code=400, detail="Unsupported backup version")
 
-    # Replace strategy: wipe user's data, then re-insert.
-    # Transaction-like behavior: do all writes before commit.
-
-    # 1) Delete dependent tables first
-    session.exec(delete(DrillReview).where(DrillReview.user_id == user.id))
-    session.exec(delete(DailyQuest).where(DailyQuest.user_id == user.id))
-    session.exec(delete(StudySession).where(StudySession.user_id == user.id))
+    if mode == IMPORT_MODE_MERGE:
+        # Merge strategy: upsert rows by id on top of existing data (incremental backups).
+        merge_backup_payload(session, user_id=user.id, payload=payload)
+    else:
+        # Replace strategy: wipe user's data, then bulk re-insert in one transaction.
+        import_backup_payload(session, user_id=user.id, payload=payload)
+    session.commit()
+    return None
 
-    # Delete user's custom drills (global drills are preserved)
-    session.exec(delete(Drill).where(Drill.created_by_user_id == user.id))
 
-    # 2) Upsert plan
-    plan = session.exec(select(StudyPlan).where(StudyPlan.user_id == user.id)).first()
-    if not plan:
-        plan = StudyPlan(user_id=user.id, goals_json=dump_goals(payload.goals))
-    else:
-        plan.goals_json = dump_goals(payload.goals)
-        plan.updated_at = datetime.now(timezone.utc)
-    session.add(plan)
-
-    # 3) Insert custom drills (and map ids if collision)
-    id_map: dict[str, str] = {}
-    for d in payload.customDrills:
-        existing = session.exec(select(Drill).where(Drill.id == d.id)).first()
-        new_id = d.id
-        if existing is not None:
-            # Collision with existing global or other user's drill.
-            # Generate a new id and remap reviews.
-            new_id = f"{user.id[:8]}-{d.id}"
-        id_map[d.id] = new_id
-        session.add(
-            Drill(
-                id=new_id,
-                subject=d.subject,
-                question=d.question,
-                answer=d.answer,
-                tags_json=json.dumps(d.tags or []),
-                created_by_user_id=user.id,
-                is_active=True,
-                created_at=datetime.now(timezone.utc),
-                updated_at=datetime.now(timezone.utc),
-            )
-        )
+@router.post(
+    "/import/jobs",
+    status_code=202,
+    response_model=BackupImportJobOut,
+    dependencies=[Depends(rate_limit("backup_import", _BACKUP_IMPORT_RULE))],
+)
+def create_backup_import_job(
+    request: Request,
+    payload: BackupImportIn,
+    background_tasks: BackgroundTasks,
+    mode: Literal["replace", "merge"] = Query(default="replace"),
+    user: User = Depends(get_current_user),
+    session: Session = Depends(db_session),
+):
+    _validate_backup_import_limits(request, payload, factor=_BACKUP_JOB_LIMIT_FACTOR)
 
-    # 4) Insert sessions
-    for s in payload.sessions:
-        session.add(
-            StudySession(
-                id=s.id,
-                user_id=user.id,
-                subject=s.subject,
-                minutes=int(s.minutes),
-                mode=s.mode,
-                notes=s.notes,
-                date_key=s.date,
-                started_at=s.startedAt,
-                created_at=s.createdAt,
-            )
-        )
+    if int(payload.version) != 1:
+        raise HTTPException(status_code=400, detail="Unsupported backup version")
 
-    # 5) Insert quests
-    for q in payload.dailyQuests:
-        session.add(
-            DailyQuest(
-                id=q.id,
-                user_id=user.id,
-                date_key=q.date,
-                subject=q.subject,
-                title=q.title,
-                description=q.description,
-                rank=q.rank,
-                difficulty=q.difficulty,
-                objective=q.objective,
-                tags_json=json.dumps(q.tags or []),
-                reward_xp=(int(q.rewardXp) if q.rewardXp is not None else None),
-                reward_gold=(int(q.rewardGold) if q.rewardGold is not None else None),
-                source=(q.source or "fallback"),
-                generated_at=(q.generatedAt or datetime.now(timezone.utc)),
-                target_minutes=int(q.targetMinutes),
-                progress_minutes=int(q.progressMinutes),
-                claimed=bool(q.claimed),
-                created_at=datetime.now(timezone.utc),
-            )
-        )
+    job = create_import_job(
+        session, user_id=user.id, total=count_backup_rows(payload, mode=mode), mode=mode
+    )
+    session.commit()
+    session.refresh(job)
+    background_tasks.add_task(run_import_job, job.id, payload, mode)
+    return _job_out(job)
 
-    # 6) Insert drill reviews (remap ids for custom drills)
-    for r in payload.drillReviews:
-        drill_id = id_map.get(r.drillId, r.drillId)
-        session.add(
-            DrillReview(
-                id=r.id,
-                user_id=user.id,
-                drill_id=drill_id,
-                next_review_at=r.nextReviewAt,
-                interval_days=int(r.intervalDays),
-                ease=float(r.ease),
-                reps=int(r.reps),
-                last_result=r.lastResult,
-                updated_at=r.updatedAt,
-            )
-        )
 
+@router.get("/import/jobs/{job_id}", response_model=BackupImportJobOut)
+def get_backup_import_job(
+    job_id: str,
+    user: User = Depends(get_current_user),
+    session: Session = Depends(db_session),
+):
+    job = get_import_job(session, job_id, user_id=user.id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Import job not found")
     session.commit()
-    return None
+    return _job_out(job)
@@ -18,9 +18,17 @@ from app.schemas import (
     CombatQuestionOutEnvelope,
     CombatStartIn,
     CombatStartOut,
+    CombatTurnOut,
 )
 from app.services.backend_first import CommandError, require_idempotency_key
-from app.services.combat import answer_question, consume_item_in_battle, draw_question, flee_battle, start_battle
+from app.services.combat import (
+    answer_and_draw,
+    answer_question,
+    consume_item_in_battle,
+    draw_question,
+    flee_battle,
+    start_battle,
+)
 
 router = APIRouter(prefix="/combat", tags=["combat"])
 _COMBAT_RULE = Rule(max_requests=40, window_seconds=60)
@@ -159,6 +167,57 @@ def answer_combat_question(
         raise
 
 
+@router.post(
+    "/turn",
+    response_model=CombatTurnOut,
+    dependencies=[Depends(rate_limit("combat_turn", _COMBAT_RULE))],
+)
+def combat_turn(
+    payload: CombatAnswerIn,
+    request: Request,
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+    session: Session = Depends(db_session),
+    user: User = Depends(get_current_user),
+):
+    """Answer the active question and draw the next one in a single round trip."""
+    try:
+        key = require_idempotency_key(idempotency_key)
+        result = answer_and_draw(
+            session,
+            user=user,
+            battle_id=payload.battleId,
+            question_id=payload.questionId,
+            option_index=int(payload.optionIndex),
+            idempotency_key=key,
+        )
+        next_question = result["nextQuestion"]
+        log_event(
+            session,
+            request,
+            "combat.turn",
+            user=user,
+            metadata=command_audit_metadata(
+                command_type="combat.turn",
+                idempotency_key=key,
+                extra={
+                    "battleId": payload.battleId,
+                    "questionId": payload.questionId,
+                    "result": result["result"],
+                    "nextQuestionId": next_question["id"] if next_question else None,
+                },
+            ),
+            commit=False,
+        )
+        session.commit()
+        return result
+    except CommandError as exc:
+        session.rollback()
+        raise HTTPException(status_code=exc.status_code, detail=exc.to_http_detail()) from exc
+    except Exception:
+        session.rollback()
+        raise
+
+
 @router.post(
     "/flee",
     response_model=CombatFleeOut,
@@ -10,6 +10,7 @@ from sqlmodel import Session, select
 from app.core.deps import db_session, get_current_user, require_admin
 from app.models import Drill, User
 from app.schemas import DrillCreateIn, DrillListOut, DrillOut, DrillReviewIn, DrillUpdateIn
+from app.services.achievements import mark_drill_reviewers_stale
 from app.services.cursor import decode_cursor, encode_cursor
 from app.services.reviews import apply_review
 from app.services.webhooks import enqueue_event
@@ -143,6 +144,7 @@ def delete_drill(
     d = session.exec(select(Drill).where(Drill.id == drill_id)).first()
     if not d:
         return None
+    mark_drill_reviewers_stale(session, d.id)
     session.delete(d)
     session.commit()
     return None
@@ -171,6 +173,7 @@ def review_drill(
         payload.result,
         elapsed_ms=payload.elapsedMs,
         difficulty=str(payload.difficulty) if payload.difficulty is not None else None,
+        background_tasks=background,
     )
 
     enqueue_event(
@@ -30,6 +30,7 @@ from app.models import (
     UserSettings,
     UserStats,
     WeeklyQuest,
+    XpLedgerDailyTotal,
     XpLedgerEvent,
 )
 from app.schemas import (
@@ -47,8 +48,15 @@ from app.schemas import (
     VitalsOut,
     WeeklyQuestOut,
 )
-from app.services.inventory import INVENTORY_CATALOG, list_inventory
+from app.services.achievements import mark_counters_stale
+from app.services.activity import load_activity, streak_window_start
+from app.services.inventory import (
+    INVENTORY_CATALOG,
+    invalidate_inventory_cache,
+    list_inventory,
+)
 from app.services.quests import ensure_daily_quests, ensure_weekly_quests
+from app.services.report_views import mark_sessions_changed
 from app.services.utils import date_key, now_local, parse_goals, week_key
 
 
@@ -92,41 +100,6 @@ def update_me(
     return UserOut(id=user.id, username=user.username, email=user.email, isAdmin=is_admin(user))
 
 
-def _sum_minutes(session: Session, user: User, dk: str) -> int:
-    total = session.exec(
-        select(func.coalesce(func.sum(StudySession.minutes), 0)).where(
-            StudySession.user_id == user.id,
-            StudySession.date_key == dk,
-            StudySession.deleted_at.is_(None),
-        )
-    ).one()
-    return int(total or 0)
-
-
-def _minutes_by_day(
-    session: Session,
-    user: User,
-    *,
-    date_from: str,
-    date_to: str,
-) -> dict[str, int]:
-    rows = session.exec(
-        select(
-            StudySession.date_key,
-            func.coalesce(func.sum(StudySession.minutes), 0),
-        )
-        .where(
-            StudySession.user_id == user.id,
-            StudySession.date_key >= date_from,
-            StudySession.date_key <= date_to,
-            StudySession.deleted_at.is_(None),
-        )
-        .group_by(StudySession.date_key)
-    ).all()
-
-    return {str(dk): int(minutes or 0) for dk, minutes in rows}
-
-
 def _quest_tags(raw: str | None) -> list[str]:
     if not raw:
         return []
@@ -147,47 +120,17 @@ def state(
     now = now_local()
     today = now.date()
     today_dk = date_key(now)
-    today_minus_6 = today - timedelta(days=6)
-    week_start_key = today_minus_6.strftime("%Y-%m-%d")
-    streak_scan_start_key = (today - timedelta(days=365)).strftime("%Y-%m-%d")
 
     plan = session.exec(select(StudyPlan).where(StudyPlan.user_id == user.id)).first()
     settings_row = session.exec(select(UserSettings).where(UserSettings.user_id == user.id)).first()
     stats_row = session.exec(select(UserStats).where(UserStats.user_id == user.id)).first()
     goals = parse_goals(plan.goals_json) if plan else {}
 
-    today_minutes = _sum_minutes(session, user, today_dk)
-
-    # week (last 7 days incl today)
-    week_minutes = int(
-        session.exec(
-            select(func.coalesce(func.sum(StudySession.minutes), 0)).where(
-                StudySession.user_id == user.id,
-                StudySession.date_key >= week_start_key,
-                StudySession.date_key <= today_dk,
-                StudySession.deleted_at.is_(None),
-            )
-        ).one()
-        or 0
-    )
-
-    # streak: consecutive days ending today with at least 1 minute.
-    minutes_by_day = _minutes_by_day(
-        session,
-        user,
-        date_from=streak_scan_start_key,
-        date_to=today_dk,
-    )
-    streak = 0
-    cursor = today
-    while True:
-        k = cursor.strftime("%Y-%m-%d")
-        if minutes_by_day.get(k, 0) <= 0:
-            break
-        streak += 1
-        cursor = cursor - timedelta(days=1)
-        if streak > 365:
-            break
+    # Today, the last 7 days (incl. today) and the streak from one calendar query.
+    activity = load_activity(session, user_id=user.id, start=streak_window_start(today), end=today)
+    today_minutes = activity.minutes_on(today)
+    week_minutes = activity.minutes_between(today - timedelta(days=6), today)
+    streak = activity.streak_ending(today)
 
     due_reviews_total = int(
         session.exec(
@@ -220,7 +163,7 @@ def state(
         .order_by(StudyBlock.day_of_week, StudyBlock.start_time)
     ).all()
 
-    inventory = list_inventory(session, user, ensure_defaults=False)
+    inventory = list_inventory(session, user)
 
     settings_out = (
         UserSettingsOut(
@@ -394,6 +337,8 @@ def reset_state(
             for row in session_rows:
                 session.delete(row)
             summary["sessionsDeleted"] = len(session_rows)
+            mark_counters_stale(session, user.id)
+            mark_sessions_changed(session, user.id)
 
         if "missions" in normalized:
             daily_rows = session.exec(select(DailyQuest).where(DailyQuest.user_id == user.id)).all()
@@ -470,6 +415,7 @@ def reset_state(
                 session.add(row)
                 touched += 1
 
+            invalidate_inventory_cache(session, user.id)
             summary["inventoryItemsReset"] = touched
 
         if "reviews" in normalized:
@@ -477,6 +423,7 @@ def reset_state(
             for row in review_rows:
                 session.delete(row)
             summary["reviewsDeleted"] = len(review_rows)
+            mark_counters_stale(session, user.id)
 
         if full_reset:
             history_rows = session.exec(
@@ -493,6 +440,12 @@ def reset_state(
                 session.delete(row)
             summary["xpLedgerEventsDeleted"] = len(ledger_rows)
 
+            ledger_total_rows = session.exec(
+                select(XpLedgerDailyTotal).where(XpLedgerDailyTotal.user_id == user.id)
+            ).all()
+            for row in ledger_total_rows:
+                session.delete(row)
+
         session.commit()
     except Exception:
         session.rollback()
@@ -35,6 +35,7 @@ from app.services.mission_generator import (
     overwrite_daily_quests,
     overwrite_weekly_quests,
 )
+from app.services.single_flight import coalesce
 from app.services.utils import date_key, now_local, parse_goals, week_key
 
 router = APIRouter(prefix="/missions", tags=["missions"])
@@ -235,6 +236,22 @@ async def regenerate_missions(
     session: Session = Depends(db_session),
     user: User = Depends(get_current_user),
 ):
+    # Double clicks / several tabs share one regeneration (and one provider call).
+    return await coalesce(
+        f"missions:regen:{user.id}:{payload.cycle}",
+        lambda: _regenerate_missions(payload, request, session, user),
+        scope="missions_regenerate",
+        lock_ttl_sec=int(settings.mission_regen_lock_ttl_sec),
+        wait_sec=float(settings.mission_regen_coalesce_wait_sec),
+    )
+
+
+async def _regenerate_missions(
+    payload: RegenerateMissionsIn,
+    request: Request,
+    session: Session,
+    user: User,
+) -> dict:
     now_utc = datetime.now(timezone.utc)
     last_at = _coerce_utc(_last_regen_at(session, user.id))
     cooldown_sec = max(1, int(settings.ai_mission_regen_cooldown_sec))
@@ -258,8 +275,28 @@ async def regenerate_missions(
         select(UserSettings).where(UserSettings.user_id == user.id)
     ).first()
 
+    current_titles = set(
+        session.exec(
+            select(DailyQuest.title).where(
+                DailyQuest.user_id == user.id, DailyQuest.date_key == day_key
+            )
+        ).all()
+    ) | set(
+        session.exec(
+            select(WeeklyQuest.title).where(
+                WeeklyQuest.user_id == user.id, WeeklyQuest.week_key == week_key_value
+            )
+        ).all()
+    )
+
     generated = await generate_official_mission_specs(
-        goals=goals, cycle=payload.cycle, user_settings=user_settings_obj
+        goals=goals,
+        cycle=payload.cycle,
+        user_settings=user_settings_obj,
+        user_id=user.id,
+        day_key=day_key,
+        week_key=week_key_value,
+        exclude_titles=current_titles,
     )
 
     if payload.cycle in {"daily", "both"}:
@@ -305,6 +342,8 @@ async def regenerate_missions(
             "weeklyCount": len(weekly_rows),
             "durationMs": duration_ms,
         },
+        # Read back by _last_regen_at for the cooldown, so it must not be deferred.
+        inline=True,
     )
 
     return RegenerateMissionsOut(
@@ -313,4 +352,4 @@ async def regenerate_missions(
         nextAllowedAt=next_allowed_at,
         dailyQuests=[_daily_out(row) for row in daily_rows],
         weeklyQuests=[_weekly_out(row) for row in weekly_rows],
-    )
+    ).model_dump(mode="json")
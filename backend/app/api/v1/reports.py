@@ -1,30 +1,41 @@
 from __future__ import annotations
 
+import hashlib
 import logging
-from datetime import timedelta
+from datetime import date, timedelta
 from typing import Literal
 
-import sqlalchemy as sa
-from fastapi import APIRouter, Depends, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from pydantic import BaseModel, Field
-from sqlalchemy import func
-from sqlmodel import Session, select
+from sqlmodel import Session
 
 from app.core.deps import db_session, get_current_user, get_optional_user
 from app.core.rate_limit import Rule, client_ip, rate_limit
-from app.models import StudySession, User
+from app.models import User
 from app.schemas import (
+    CalendarReportOut,
+    CalendarSeriesOut,
     MonthlyReportOut,
     MonthlyReportRowOut,
     WeeklyReportDayOut,
     WeeklyReportOut,
     WeeklyReportSubjectOut,
 )
+from app.services.activity import (
+    calendar_series,
+    load_activity,
+    streak_window_start,
+)
+from app.services.report_views import monthly_stats
 from app.services.utils import now_local
 
 router = APIRouter()
 logger = logging.getLogger("app")
 _WEB_VITALS_RULE = Rule(max_requests=120, window_seconds=60)
+# Bump when the calendar payload changes shape so cached ETags stop matching.
+_CALENDAR_VERSION = 1
+_CALENDAR_MAX_DAYS = 366
+_DATE_PATTERN = r"^\d{4}-\d{2}-\d{2}$"
 
 
 class WebVitalIn(BaseModel):
@@ -68,64 +79,25 @@ def weekly_report(
 ):
     end = now_local().date()
     start = end - timedelta(days=6)
-    start_key = start.strftime("%Y-%m-%d")
-    end_key = end.strftime("%Y-%m-%d")
-    keys = [(start + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(7)]
-    rows = session.exec(
-        select(
-            StudySession.date_key,
-            StudySession.subject,
-            func.coalesce(func.sum(StudySession.minutes), 0),
-        )
-        .where(
-            StudySession.user_id == user.id,
-            StudySession.deleted_at.is_(None),
-            StudySession.date_key >= start_key,
-            StudySession.date_key <= end_key,
-        )
-        .group_by(StudySession.date_key, StudySession.subject)
-    ).all()
-
-    by_day = {k: 0 for k in keys}
-    by_subject: dict[str, int] = {}
-    for dk, subject, minutes in rows:
-        if dk in by_day:
-            by_day[dk] += int(minutes or 0)
-        by_subject[str(subject)] = by_subject.get(str(subject), 0) + int(minutes or 0)
-
-    total = sum(by_day.values())
-
-    # streak: consecutive days ending today
-    streak_start_key = (end - timedelta(days=365)).strftime("%Y-%m-%d")
-    streak_rows = session.exec(
-        select(
-            StudySession.date_key,
-            func.coalesce(func.sum(StudySession.minutes), 0),
-        )
-        .where(
-            StudySession.user_id == user.id,
-            StudySession.deleted_at.is_(None),
-            StudySession.date_key >= streak_start_key,
-            StudySession.date_key <= end_key,
-        )
-        .group_by(StudySession.date_key)
-    ).all()
-
-    streak = 0
-    cursor = end
-    minutes_map = {str(dk): int(minutes or 0) for dk, minutes in streak_rows}
-    while minutes_map.get(cursor.strftime("%Y-%m-%d"), 0) > 0:
-        streak += 1
-        cursor = cursor - timedelta(days=1)
-        if streak > 365:
-            break
+    # One query covers the week, its subjects and the streak window.
+    activity = load_activity(
+        session,
+        user_id=user.id,
+        start=streak_window_start(end),
+        end=end,
+        subjects_from=start,
+    )
+    by_day = activity.days(start, end)
+    total = sum(minutes for _, minutes in by_day)
+    by_subject = activity.minutes_by_subject
+    streak = activity.streak_ending(end)
 
     return WeeklyReportOut(
         **{
             "from": start.strftime("%Y-%m-%d"),
             "to": end.strftime("%Y-%m-%d"),
             "totalMinutes": int(total),
-            "byDay": [WeeklyReportDayOut(date=k, minutes=int(by_day[k])) for k in keys],
+            "byDay": [WeeklyReportDayOut(date=k, minutes=int(m)) for k, m in by_day],
             "bySubject": [
                 WeeklyReportSubjectOut(subject=s, minutes=int(m))
                 for s, m in sorted(by_subject.items(), key=lambda x: x[1], reverse=True)
@@ -143,63 +115,88 @@ def monthly_report(
 ):
     """Monthly aggregation.
 
-    Uses DB views when available (created by Alembic), otherwise falls back to in-memory grouping.
+    Served from the ``mv_user_monthly_stats`` materialized view on Postgres while it is
+    fresh for this user, otherwise from a live ``GROUP BY`` month query.
     """
     months = max(1, min(int(months), 36))
-
-    # Try the view first
-    try:
-        stmt = sa.text(
-            "SELECT month_key, minutes, sessions, xp, gold "
-            "FROM v_user_monthly_stats WHERE user_id = :uid "
-            "ORDER BY month_key DESC LIMIT :lim"
-        )
-        res = session.exec(stmt, {"uid": user.id, "lim": months}).all()
-        out = [
-            MonthlyReportRowOut(
-                month=str(r[0]),
-                minutes=int(r[1] or 0),
-                sessions=int(r[2] or 0),
-                xp=int(r[3] or 0),
-                gold=int(r[4] or 0),
-            )
-            for r in res
-        ]
-        return {"months": out}
-    except Exception:
-        pass
-
-    # Fallback (works with AUTO_CREATE_DB / SQLite)
-    rows = session.exec(
-        select(
-            StudySession.date_key,
-            StudySession.minutes,
-            StudySession.xp_earned,
-            StudySession.gold_earned,
-        ).where(StudySession.user_id == user.id, StudySession.deleted_at.is_(None))
-    ).all()
-
-    agg: dict[str, dict[str, int]] = {}
-    for date_key, minutes_val, xp_val, gold_val in rows:
-        month_key = str(date_key)[:7]
-        if month_key not in agg:
-            agg[month_key] = {"minutes": 0, "sessions": 0, "xp": 0, "gold": 0}
-        agg[month_key]["minutes"] += int(minutes_val or 0)
-        agg[month_key]["sessions"] += 1
-        agg[month_key]["xp"] += int(xp_val or 0)
-        agg[month_key]["gold"] += int(gold_val or 0)
-
-    # sort and limit
-    keys = sorted(agg.keys(), reverse=True)[:months]
+    rows = monthly_stats(session, user_id=user.id, months=months)
     return {
         "months": [
-            MonthlyReportRowOut(
-                month=k,
-                minutes=agg[k]["minutes"],
-                sessions=agg[k]["sessions"],
-                xp=agg[k]["xp"],
-                gold=agg[k]["gold"],
-            )
-            for k in keys
+            MonthlyReportRowOut(month=month, minutes=minutes, sessions=sessions, xp=xp, gold=gold)
+            for month, minutes, sessions, xp, gold in rows
         ]
     }
+
+
+def _parse_report_date(value: str, name: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=422, detail=f"{name} must be a valid YYYY-MM-DD") from None
+
+
+@router.get("/calendar", response_model=CalendarReportOut)
+def calendar_report(
+    request: Request,
+    response: Response,
+    from_: str | None = Query(default=None, alias="from", pattern=_DATE_PATTERN),
+    to: str | None = Query(default=None, pattern=_DATE_PATTERN),
+    groupBy: Literal["subject", "mode"] = Query(default="subject"),
+    session: Session = Depends(db_session),
+    user: User = Depends(get_current_user),
+):
+    """Per-day minutes/xp per subject or mode as aligned arrays (heatmaps, trend lines).
+
+    Defaults to the last 365 days. The ETag changes with any write to the user's
+    sessions, so clients revalidate with ``If-None-Match`` and usually get a 304.
+    """
+    end = _parse_report_date(to, "to") if to else now_local().date()
+    start = _parse_report_date(from_, "from") if from_ else end - timedelta(days=364)
+    if start > end:
+        raise HTTPException(status_code=422, detail="from must not be after to")
+    if (end - start).days + 1 > _CALENDAR_MAX_DAYS:
+        raise HTTPException(
+            status_code=422, detail=f"range must not exceed {_CALENDAR_MAX_DAYS} days"
+        )
+
+    # Every session write path stamps the marker (hard deletes included), and the
+    # user row is already loaded: revalidating costs no query over the history.
+    changed_at = user.sessions_changed_at
+    fingerprint = changed_at.isoformat() if changed_at else "-"
+    digest = hashlib.sha256(
+        f"{_CALENDAR_VERSION}|{user.id}|{start}|{end}|{groupBy}|{fingerprint}".encode()
+    ).hexdigest()[:32]
+    etag = f'"{digest}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    # Proxies may weaken the tag (W/"..."); If-None-Match compares weakly anyway.
+    client_tags = {
+        tag.strip().removeprefix("W/")
+        for tag in request.headers.get("if-none-match", "").split(",")
+    }
+    if etag in client_tags or "*" in client_tags:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    dates, series, totals = calendar_series(
+        session, user_id=user.id, start=start, end=end, group_by=groupBy
+    )
+    response.headers.update(headers)
+    return CalendarReportOut(
+        **{
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "groupBy": groupBy,
+            "dates": dates,
+            "minutes": totals.minutes,
+            "xp": totals.xp,
+            "series": [
+                CalendarSeriesOut(
+                    key=s.key,
+                    minutes=s.minutes,
+                    xp=s.xp,
+                    totalMinutes=sum(s.minutes),
+                    totalXp=sum(s.xp),
+                )
+                for s in series
+            ],
+        }
+    )
@@ -18,9 +18,11 @@ from app.core.deps import (
 )
 from app.models import StudySession, User
 from app.schemas import CreateSessionIn, SessionListOut, SessionOut, UpdateSessionIn
+from app.services.achievements import mark_counters_stale, record_session
 from app.services.cursor import decode_cursor, encode_cursor
 from app.services.progression import (
     DEFAULT_REWARD_MULTIPLIER_BPS,
+    DuplicateLedgerSource,
     apply_reward_multiplier,
     apply_vitals,
     apply_xp_gold,
@@ -35,6 +37,7 @@ from app.services.quests import (
     recompute_daily_quests_for_day,
     recompute_weekly_quests_for_week,
 )
+from app.services.report_views import mark_sessions_changed
 from app.services.utils import date_key, now_local, parse_goals, week_key
 from app.services.webhooks import enqueue_event
 
@@ -268,6 +271,14 @@ def create_session(
         )
         session.add(s)
         session.flush()
+        mark_sessions_changed(session, user.id)
+        record_session(
+            session,
+            user.id,
+            date_key=s.date_key,
+            minutes=int(s.minutes),
+            background_tasks=background,
+        )
 
         source_type = "study_session"
         source_ref = s.id
@@ -356,6 +367,13 @@ def create_session(
         )
 
         session.commit()
+    except DuplicateLedgerSource:
+        # Only the video completion ref can repeat; an archived grant is a replay too.
+        session.rollback()
+        if video_completion_ref:
+            response.status_code = 200
+            return {"ok": True, "xpEarned": 0, "goldEarned": 0}
+        raise
     except IntegrityError as exc:
         session.rollback()
         if video_completion_ref and _is_duplicate_video_completion_integrity_error(exc):
@@ -449,6 +467,9 @@ def update_session(
             row.notes = payload.notes
         if payload.date is not None:
             row.date_key = payload.date
+        if payload.minutes is not None or payload.date is not None:
+            mark_counters_stale(session, user.id)
+        mark_sessions_changed(session, user.id)
 
         session.add(row)
         session.flush()
@@ -663,6 +684,8 @@ def delete_session(
 
         row.deleted_at = datetime.now(timezone.utc)
         session.add(row)
+        mark_counters_stale(session, user.id)
+        mark_sessions_changed(session, user.id)
 
         plan = get_or_create_study_plan(user, session, autocommit=False)
         goals = parse_goals(plan.goals_json)
@@ -1,17 +1,233 @@
 from __future__ import annotations
 
 import hashlib
+import json
+import logging
+import os
+import queue
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
 from datetime import datetime, timezone
+from pathlib import Path
 from typing import Any
+from uuid import uuid4
 
 from fastapi import Request
+from sqlalchemy import event as sa_event
+from sqlalchemy import insert
+from sqlalchemy.orm import Session as OrmSession
 from sqlmodel import Session
 
 from app.core.config import settings
+from app.core.metrics import (
+    record_audit_dropped,
+    record_audit_spilled,
+    record_audit_written,
+    set_audit_queue_depth,
+)
 from app.core.rate_limit import client_ip
 from app.core.request_context import get_request_id
 from app.models import AuditEvent, User
 
+try:
+    import fcntl
+except ImportError:  # Windows: single-process dev server, the thread lock is enough.
+    fcntl = None
+
+logger = logging.getLogger("app")
+
+_PENDING_AUDIT_KEY = "pending_audit_events"
+# Queued by stop() to wake the writer thread without waiting for the poll timeout.
+_WAKE: dict[str, Any] = {}
+
+
+class AuditWriter:
+    """Bounded in-process queue flushed to ``audit_events`` in multi-row batches.
+
+    A single daemon thread drains the queue in FIFO order, so events keep their
+    enqueue order (and thus their order within a request id). Events that do not
+    fit in the queue, or whose batch fails to insert, are appended to
+    ``spill_path`` (JSON Lines) when configured and replayed on the next flush.
+    Every worker process shares the spill file; appends and the replay's rename
+    hold an ``flock`` on ``<spill_path>.lock`` so no append lands in a file that
+    is being replayed.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_queue: int,
+        batch_size: int,
+        flush_interval_s: float,
+        spill_path: str = "",
+        autostart: bool = True,
+    ) -> None:
+        self._queue: queue.Queue[dict[str, Any]] = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._batch_size = max(1, int(batch_size))
+        self._flush_interval_s = max(0.01, float(flush_interval_s))
+        self._spill_path = Path(spill_path) if spill_path.strip() else None
+        self._autostart = autostart
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self.running:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the background thread and flush whatever is still queued."""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            try:
+                self._queue.put_nowait(_WAKE)
+            except queue.Full:
+                pass
+            thread.join(timeout=timeout)
+        self._thread = None
+        self.flush()
+
+    def submit(self, row: dict[str, Any]) -> None:
+        if self._autostart and not self.running:
+            self.start()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self._spill([row], reason="queue_full")
+        set_audit_queue_depth(self._queue.qsize())
+
+    def flush(self) -> int:
+        """Synchronously write everything queued (and spilled). Returns rows written."""
+        written = self._replay_spill()
+        while True:
+            batch = self._drain(block=False)
+            if not batch:
+                break
+            written += self._write(batch)
+        return written
+
+    def _drain(self, *, block: bool) -> list[dict[str, Any]]:
+        batch: list[dict[str, Any]] = []
+        try:
+            if block:
+                batch.append(self._queue.get(timeout=self._flush_interval_s))
+            while len(batch) < self._batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        set_audit_queue_depth(self._queue.qsize())
+        return [row for row in batch if row is not _WAKE]
+
+    def _run(self) -> None:
+        self._replay_spill()
+        while not self._stop.is_set():
+            batch = self._drain(block=True)
+            if batch:
+                self._write(batch)
+
+    def _write(self, rows: list[dict[str, Any]]) -> int:
+        from app.db import get_session
+
+        with self._write_lock:
+            try:
+                with get_session() as session:
+                    session.execute(insert(AuditEvent), rows)
+                    session.commit()
+            except Exception:
+                logger.warning("audit_batch_write_failed", exc_info=True)
+                self._spill(rows, reason="write_failed")
+                return 0
+        record_audit_written(len(rows))
+        return len(rows)
+
+    @contextmanager
+    def _locked_spill(self) -> Iterator[Path]:
+        """Exclusive access to the spill file across threads and processes."""
+        assert self._spill_path is not None
+        with self._spill_lock:
+            self._spill_path.parent.mkdir(parents=True, exist_ok=True)
+            lock_path = self._spill_path.with_name(f"{self._spill_path.name}.lock")
+            with lock_path.open("a") as lock_fh:
+                if fcntl is not None:
+                    fcntl.flock(lock_fh.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield self._spill_path
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_fh.fileno(), fcntl.LOCK_UN)
+
+    def _spill(self, rows: list[dict[str, Any]], *, reason: str) -> None:
+        if self._spill_path is None:
+            record_audit_dropped(reason, len(rows))
+            return
+        try:
+            with self._locked_spill() as spill_path:
+                with spill_path.open("a", encoding="utf-8") as fh:
+                    for row in rows:
+                        record = {**row, "created_at": row["created_at"].isoformat()}
+                        fh.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            record_audit_spilled(len(rows))
+        except Exception:
+            logger.warning("audit_spill_failed", exc_info=True)
+            record_audit_dropped(reason, len(rows))
+
+    def _replay_spill(self) -> int:
+        if self._spill_path is None:
+            return 0
+        if not self._spill_path.exists():
+            return 0
+        with self._locked_spill() as spill_path:
+            if not spill_path.exists():
+                return 0
+            replay_path = spill_path.with_name(f"{spill_path.name}.{uuid4().hex}")
+            os.replace(spill_path, replay_path)
+
+        rows: list[dict[str, Any]] = []
+        with replay_path.open("r", encoding="utf-8") as fh:
+            for line in fh:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                record["created_at"] = datetime.fromisoformat(record["created_at"])
+                rows.append(record)
+        replay_path.unlink()
+
+        written = 0
+        for start in range(0, len(rows), self._batch_size):
+            written += self._write(rows[start : start + self._batch_size])
+        return written
+
+
+audit_writer = AuditWriter(
+    max_queue=int(settings.audit_queue_max),
+    batch_size=int(settings.audit_batch_size),
+    flush_interval_s=int(settings.audit_flush_interval_ms) / 1000,
+    spill_path=settings.audit_spill_path,
+)
+
+
+@sa_event.listens_for(OrmSession, "after_commit")
+def _submit_pending_audit_events(session: OrmSession) -> None:
+    for row in session.info.pop(_PENDING_AUDIT_KEY, None) or []:
+        audit_writer.submit(row)
+
+
+@sa_event.listens_for(OrmSession, "after_rollback")
+def _discard_pending_audit_events(session: OrmSession) -> None:
+    session.info.pop(_PENDING_AUDIT_KEY, None)
+
 
 def idempotency_key_hash(idempotency_key: str | None) -> str:
     key = (idempotency_key or "").strip()
@@ -41,33 +257,49 @@ def log_event(
     metadata: dict[str, Any] | None = None,
     *,
     commit: bool = True,
+    inline: bool = False,
 ) -> None:
     """Persist an audit event (best-effort).
 
     This is intentionally resilient: failures in audit logging should never block
     user requests.
+
+    In ``async`` mode the row is handed to :data:`audit_writer` instead of the
+    request transaction: immediately when ``commit=True``, or once the caller's
+    session commits when ``commit=False`` (dropped if it rolls back).
+    ``inline=True`` forces the synchronous path for events that are read back
+    as state (e.g. the mission regeneration cooldown).
     """
 
     if not settings.audit_enabled:
         return
 
+    use_writer = False
     try:
         request_id = get_request_id()
         event_metadata = metadata or {}
         if request_id:
             event_metadata["request_id"] = request_id
 
-        row = AuditEvent(
-            user_id=(user.id if user else None),
-            event=event,
-            metadata_json=event_metadata,
-            ip=client_ip(request),
-            user_agent=request.headers.get("user-agent"),
-            created_at=datetime.now(timezone.utc),
-        )
-        session.add(row)
-        if commit:
-            session.commit()
+        values = {
+            "id": str(uuid4()),
+            "user_id": (user.id if user else None),
+            "event": event,
+            "metadata_json": event_metadata,
+            "ip": client_ip(request),
+            "user_agent": request.headers.get("user-agent"),
+            "created_at": datetime.now(timezone.utc),
+        }
+        use_writer = settings.audit_write_mode == "async" and not inline
+        if use_writer:
+            if commit:
+                audit_writer.submit(values)
+            else:
+                session.info.setdefault(_PENDING_AUDIT_KEY, []).append(values)
+        else:
+            session.add(AuditEvent(**values))
+            if commit:
+                session.commit()
 
         # Tag Sentry with request_id for cross-system correlation
         if request_id:
@@ -79,5 +311,5 @@ def log_event(
     except Exception:
         # Keep audit best-effort; never break caller flow.
         # Avoid rolling back outer transactions when commit=False.
-        if commit:
+        if commit and not use_writer:
             session.rollback()
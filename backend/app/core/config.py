@@ -99,6 +99,20 @@ class Settings(BaseSettings):
     sentry_dsn: str = ""  # set to enable Sentry
     sentry_traces_sample_rate: float = 0.0
     audit_enabled: bool = True
+    # "async": audit rows go through an in-process queue flushed in batches by a
+    # background writer. "sync": rows are added inline to the request transaction.
+    audit_write_mode: str = "async"
+    audit_queue_max: int = 10000
+    audit_batch_size: int = 200
+    audit_flush_interval_ms: int = 500
+    # Optional JSONL file for events that overflow the queue or fail to write.
+    audit_spill_path: str = ""
+    # Retention: on Postgres, audit_events/system_window_messages are range-partitioned
+    # by month and expired partitions are dropped; leftovers (and SQLite) are deleted
+    # in committed batches with a short pause between them.
+    retention_delete_batch_size: int = 5000
+    retention_delete_sleep_ms: int = 50
+    retention_partition_months_ahead: int = 3
 
     # AI provider (server-side only)
     gemini_api_key: str = ""
@@ -109,6 +123,29 @@ class Settings(BaseSettings):
     ai_user_daily_max: int = 120
     ai_user_daily_window_sec: int = 60 * 60 * 24
     ai_history_max_messages: int = 200
+    # Gemini SDK clients are pooled per API key (system key + BYO user keys).
+    ai_client_pool_max: int = 64
+    ai_client_pool_idle_sec: int = 15 * 60
+    # Hedged requests: when the running model is slower than its AI_HEDGE_PERCENTILE
+    # latency, the next model of the chain is fired concurrently (first answer wins).
+    ai_hedge_enabled: bool = False
+    ai_hedge_percentile: float = 0.95
+    ai_hedge_min_samples: int = 20
+    ai_hedge_default_delay_ms: int = 4000
+    ai_hedge_min_delay_ms: int = 500
+    # Provider quota scheduler in front of Gemini calls, tracked per API key. Requests over
+    # the per-minute request/token budget or concurrency wait up to max_wait_ms in a FIFO
+    # queue instead of failing; a provider retry-after pauses the whole key.
+    ai_scheduler_enabled: bool = True
+    ai_scheduler_system_rpm: int = 600
+    ai_scheduler_system_tpm: int = 1_000_000
+    ai_scheduler_system_concurrency: int = 16
+    ai_scheduler_user_rpm: int = 15
+    ai_scheduler_user_tpm: int = 250_000
+    ai_scheduler_user_concurrency: int = 2
+    ai_scheduler_max_queue: int = 32
+    ai_scheduler_max_wait_ms: int = 5000
+    ai_scheduler_quota_backoff_sec: int = 10
     ai_rate_limit_max: int = 30
     ai_rate_limit_window_sec: int = 60
     ai_hunter_retry_max: int = 2
@@ -117,7 +154,49 @@ class Settings(BaseSettings):
     ai_hunter_retry_jitter_ms: int = 250
     ai_hunter_quota_retry_max_sec: int = 8
     ai_mission_regen_cooldown_sec: int = 60 * 60
+    # Concurrent regenerations of the same user+cycle share one run (Redis lock across
+    # workers); followers wait up to wait_sec for the leader's result.
+    mission_regen_lock_ttl_sec: int = 60
+    mission_regen_coalesce_wait_sec: int = 30
+    # Output of scripts/generate_mission_pool.py; regenerations are served from it and
+    # only fall back to Gemini for subjects it does not cover. Empty disables the pool.
+    mission_pool_path: str = "missions_pool.json"
+    # Nightly job pre-building tomorrow's/next week's quests for users active in the window.
+    quest_pregen_enabled: bool = True
+    quest_pregen_active_days: int = 14
+    quest_pregen_batch_size: int = 500
+    # Response cache for Gemini generations (Redis when REDIS_URL is set, else in-process LRU).
+    # Only the comma-separated scopes listed here are cached. hunter chat and missions are
+    # opt-in: the mission prompt repeats per user and cycle, so a cached "regenerate"
+    # would return the same missions until the TTL expires.
+    ai_response_cache_enabled: bool = True
+    ai_response_cache_ttl_sec: int = 60 * 60
+    ai_response_cache_max_entries: int = 1000
+    ai_response_cache_scopes: str = "ai_text"
+    # Directory of versioned combat content packs (*.json); empty uses app/content/combat.
+    combat_content_dir: str = ""
+    # Battle turn state cache with write-behind to combat_battles. Requires REDIS_URL
+    # (stays off with a warning otherwise). Rows are written every flush_every turns and
+    # when a battle ends.
+    combat_state_cache_enabled: bool = False
+    combat_state_flush_every: int = 5
+    combat_state_ttl_sec: int = 6 * 60 * 60
+    # Per-user inventory quantities cached in Redis. Requires REDIS_URL (stays off with a
+    # warning otherwise). Entries are dropped whenever a transaction writes the inventory.
+    inventory_cache_enabled: bool = False
+    inventory_cache_ttl_sec: int = 5 * 60
+    # Monthly/daily report aggregates come from materialized views on Postgres, refreshed
+    # concurrently every refresh_sec. Views older than max_staleness_sec, or older than
+    # the user's latest session write, are bypassed for a live GROUP BY query.
+    reports_matview_enabled: bool = True
+    reports_matview_refresh_sec: int = 5 * 60
+    reports_matview_max_staleness_sec: int = 15 * 60
     xp_ruleset_version: int = 1
+    # XP ledger archival: months older than keep_months are rolled up into daily totals.
+    # When ledger_archive_dir is set, raw rows are exported there (gzip JSONL) and pruned.
+    ledger_archive_enabled: bool = False
+    ledger_archive_keep_months: int = 12
+    ledger_archive_dir: str = ""
     ff_ledger_write: bool = True
     ff_enforce_idempotency: bool = True
 
@@ -163,6 +242,13 @@ class Settings(BaseSettings):
                     f"CORS origin invalida: {origin!r}. Nao inclua path/query/fragment."
                 )
 
+        if self.audit_write_mode not in ("async", "sync"):
+            raise ValueError("AUDIT_WRITE_MODE must be 'async' or 'sync'.")
+        if int(self.audit_queue_max) < 1 or int(self.audit_batch_size) < 1:
+            raise ValueError("AUDIT_QUEUE_MAX and AUDIT_BATCH_SIZE must be >= 1.")
+        if int(self.retention_delete_batch_size) < 1:
+            raise ValueError("RETENTION_DELETE_BATCH_SIZE must be >= 1.")
+
         if int(self.webhook_worker_batch_size) < 1:
             raise ValueError("WEBHOOK_WORKER_BATCH_SIZE must be >= 1.")
         if int(self.webhook_worker_poll_interval_ms) < 100:
@@ -233,6 +319,10 @@ class Settings(BaseSettings):
     def trusted_proxy_ips_list(self) -> list[str]:
         return [ip.strip() for ip in self.trusted_proxy_ips.split(",") if ip.strip()]
 
+    @property
+    def ai_response_cache_scopes_list(self) -> list[str]:
+        return [s.strip() for s in self.ai_response_cache_scopes.split(",") if s.strip()]
+
     @property
     def metrics_allowed_ips_list(self) -> list[str]:
         return [ip.strip() for ip in self.metrics_allowed_ips.split(",") if ip.strip()]
@@ -67,6 +67,101 @@ AI_RATE_LIMITED_TOTAL = Counter(
     labelnames=["scope"],
 )
 
+AI_HEDGED_REQUESTS_TOTAL = Counter(
+    "ai_hedged_requests_total",
+    "Hedged AI attempts (launched: next model fired early, won: a hedge answered first)",
+    labelnames=["outcome"],
+)
+
+AI_CACHE_HITS_TOTAL = Counter(
+    "ai_response_cache_hits_total",
+    "Total AI generations served from the response cache",
+    labelnames=["scope"],
+)
+
+AI_CACHE_MISSES_TOTAL = Counter(
+    "ai_response_cache_misses_total",
+    "Total AI response cache lookups that fell through to the provider",
+    labelnames=["scope"],
+)
+
+AI_SCHEDULER_QUEUE_DEPTH = Gauge(
+    "ai_scheduler_queue_depth",
+    "AI requests waiting for provider quota, by API key kind",
+    labelnames=["key_kind"],
+)
+
+AI_SCHEDULER_WAIT_SECONDS = Histogram(
+    "ai_scheduler_wait_seconds",
+    "Time AI requests waited in the quota scheduler before being admitted",
+    labelnames=["key_kind"],
+    buckets=(0.005, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10),
+)
+
+AI_SCHEDULER_REJECTED_TOTAL = Counter(
+    "ai_scheduler_rejected_total",
+    "AI requests rejected by the quota scheduler (queue_full, deadline, backoff)",
+    labelnames=["key_kind", "reason"],
+)
+
+SINGLE_FLIGHT_TOTAL = Counter(
+    "single_flight_requests_total",
+    "Coalesced requests by role (leader ran it, follower shared it, timeout ran it again)",
+    labelnames=["scope", "role"],
+)
+
+AUDIT_EVENTS_WRITTEN_TOTAL = Counter(
+    "audit_events_written_total",
+    "Total audit events persisted by the batched audit writer",
+)
+
+AUDIT_EVENTS_SPILLED_TOTAL = Counter(
+    "audit_events_spilled_total",
+    "Total audit events spilled to disk (queue full or write failure)",
+)
+
+AUDIT_EVENTS_DROPPED_TOTAL = Counter(
+    "audit_events_dropped_total",
+    "Total audit events dropped by the batched audit writer",
+    labelnames=["reason"],
+)
+
+AUDIT_QUEUE_DEPTH = Gauge(
+    "audit_queue_depth",
+    "Audit events waiting in the in-process writer queue",
+)
+
+RETENTION_ROWS_DELETED_TOTAL = Counter(
+    "retention_rows_deleted_total",
+    "Total rows removed by batched retention deletes",
+    labelnames=["table"],
+)
+
+RETENTION_DELETE_BATCHES_TOTAL = Counter(
+    "retention_delete_batches_total",
+    "Total committed retention delete batches",
+    labelnames=["table"],
+)
+
+RETENTION_PARTITIONS_DROPPED_TOTAL = Counter(
+    "retention_partitions_dropped_total",
+    "Total expired partitions detached and dropped by retention",
+    labelnames=["table"],
+)
+
+REPORT_VIEW_REFRESH_SECONDS = Histogram(
+    "report_view_refresh_seconds",
+    "Duration of concurrent materialized view refreshes",
+    labelnames=["view"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+
+REPORT_QUERIES_TOTAL = Counter(
+    "report_queries_total",
+    "Report aggregate reads by source (materialized view or live query)",
+    labelnames=["report", "source"],
+)
+
 
 def route_label(scope: dict[str, Any]) -> str:
     """Return a stable route label (template path) when possible."""
@@ -137,6 +232,76 @@ def record_ai_rate_limited(scope: str) -> None:
     AI_RATE_LIMITED_TOTAL.labels(scope=scope).inc()
 
 
+def record_ai_hedge(outcome: str) -> None:
+    AI_HEDGED_REQUESTS_TOTAL.labels(outcome=outcome).inc()
+
+
+def record_ai_cache_hit(scope: str) -> None:
+    AI_CACHE_HITS_TOTAL.labels(scope=scope).inc()
+
+
+def record_ai_cache_miss(scope: str) -> None:
+    AI_CACHE_MISSES_TOTAL.labels(scope=scope).inc()
+
+
+def set_ai_scheduler_queue_depth(key_kind: str, depth: int) -> None:
+    AI_SCHEDULER_QUEUE_DEPTH.labels(key_kind=key_kind).set(max(0, int(depth)))
+
+
+def record_ai_scheduler_wait(key_kind: str, wait_s: float) -> None:
+    AI_SCHEDULER_WAIT_SECONDS.labels(key_kind=key_kind).observe(max(0.0, wait_s))
+
+
+def record_ai_scheduler_rejected(key_kind: str, reason: str) -> None:
+    AI_SCHEDULER_REJECTED_TOTAL.labels(key_kind=key_kind, reason=reason).inc()
+
+
+def record_single_flight(scope: str, role: str) -> None:
+    SINGLE_FLIGHT_TOTAL.labels(scope=scope, role=role).inc()
+
+
+def record_audit_written(count: int = 1) -> None:
+    if count <= 0:
+        return
+    AUDIT_EVENTS_WRITTEN_TOTAL.inc(count)
+
+
+def record_audit_spilled(count: int = 1) -> None:
+    if count <= 0:
+        return
+    AUDIT_EVENTS_SPILLED_TOTAL.inc(count)
+
+
+def record_audit_dropped(reason: str, count: int = 1) -> None:
+    if count <= 0:
+        return
+    AUDIT_EVENTS_DROPPED_TOTAL.labels(reason=reason).inc(count)
+
+
+def set_audit_queue_depth(depth: int) -> None:
+    AUDIT_QUEUE_DEPTH.set(max(0, int(depth)))
+
+
+def record_retention_batch(table: str, deleted: int) -> None:
+    RETENTION_DELETE_BATCHES_TOTAL.labels(table=table).inc()
+    if deleted > 0:
+        RETENTION_ROWS_DELETED_TOTAL.labels(table=table).inc(deleted)
+
+
+def record_retention_partition_dropped(table: str, count: int = 1) -> None:
+    if count <= 0:
+        return
+    RETENTION_PARTITIONS_DROPPED_TOTAL.labels(table=table).inc(count)
+
+
+def record_report_view_refresh(view: str, duration_s: float) -> None:
+    REPORT_VIEW_REFRESH_SECONDS.labels(view=view).observe(max(0.0, float(duration_s)))
+
+
+def record_report_query(report: str, source: str) -> None:
+    REPORT_QUERIES_TOTAL.labels(report=report, source=source).inc()
+
+
 def render_metrics() -> tuple[bytes, str]:
     data = generate_latest()
     return data, CONTENT_TYPE_LATEST
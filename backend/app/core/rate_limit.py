@@ -40,6 +40,10 @@ class InMemoryRateLimiter:
         bucket.append(now)
         return True
 
+    def reset(self) -> None:
+        """Forget every recorded hit (tests, admin tooling)."""
+        self._buckets.clear()
+
 
 limiter = InMemoryRateLimiter()
 
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+from collections.abc import Iterator
+from contextlib import contextmanager
 from typing import Any
 
-from sqlalchemy import event
+from sqlalchemy import event, text
 from sqlmodel import Session, SQLModel, create_engine
 
 from app.core.config import settings
@@ -22,6 +24,7 @@ engine = create_engine(settings.database_url, connect_args=connect_args, **pool_
 _SQLITE_COMPAT_COLUMNS: dict[str, dict[str, str]] = {
     "users": {
         "username": "TEXT",
+        "sessions_changed_at": "DATETIME",
     },
     "daily_quests": {
         "title": "TEXT",
@@ -34,6 +37,7 @@ _SQLITE_COMPAT_COLUMNS: dict[str, dict[str, str]] = {
         "reward_gold": "INTEGER",
         "source": "TEXT DEFAULT 'fallback'",
         "generated_at": "DATETIME",
+        "updated_at": "DATETIME",
     },
     "weekly_quests": {
         "title": "TEXT",
@@ -59,11 +63,18 @@ _SQLITE_COMPAT_COLUMNS: dict[str, dict[str, str]] = {
         "rank": "TEXT DEFAULT 'F'",
         "version": "INTEGER DEFAULT 1",
     },
+    "combat_battles": {
+        "rng_seed": "BIGINT",
+        "content_hash": "TEXT",
+        "turn_seq": "INTEGER DEFAULT 0",
+        "turn_log_json": "JSON DEFAULT '[]'",
+    },
     "study_sessions": {
         "hp_delta": "INTEGER DEFAULT 0",
         "mana_delta": "INTEGER DEFAULT 0",
         "fatigue_delta": "INTEGER DEFAULT 0",
         "reward_multiplier_bps": "INTEGER DEFAULT 10000",
+        "updated_at": "DATETIME",
     },
 }
 
@@ -77,6 +88,10 @@ _SQLITE_QUEST_INDEXES = (
     "CREATE INDEX IF NOT EXISTS ix_weekly_quests_generated_at ON weekly_quests (generated_at)",
     "CREATE INDEX IF NOT EXISTS ix_user_stats_rank ON user_stats (rank)",
     "CREATE INDEX IF NOT EXISTS ix_users_username ON users (username)",
+    "CREATE INDEX IF NOT EXISTS ix_daily_quests_updated_at ON daily_quests (updated_at)",
+    "CREATE INDEX IF NOT EXISTS ix_study_sessions_updated_at ON study_sessions (updated_at)",
+    "CREATE INDEX IF NOT EXISTS ix_system_window_messages_user_created "
+    "ON system_window_messages (user_id, created_at)",
 )
 
 # Enable foreign keys on SQLite (important for tests/dev)
@@ -149,6 +164,13 @@ def _ensure_sqlite_schema_compatibility() -> None:
             "UPDATE study_sessions SET reward_multiplier_bps = 10000 "
             "WHERE reward_multiplier_bps IS NULL OR reward_multiplier_bps < 1"
         )
+        connection.exec_driver_sql(
+            "UPDATE study_sessions SET updated_at = COALESCE(deleted_at, created_at) "
+            "WHERE updated_at IS NULL"
+        )
+        connection.exec_driver_sql(
+            "UPDATE daily_quests SET updated_at = created_at WHERE updated_at IS NULL"
+        )
 
         for statement in _SQLITE_QUEST_INDEXES:
             connection.exec_driver_sql(statement)
@@ -161,3 +183,27 @@ def create_db_and_tables() -> None:
 
 def get_session() -> Session:
     return Session(engine)
+
+
+@contextmanager
+def try_advisory_lock(session: Session, key: int) -> Iterator[bool]:
+    """Hold a Postgres advisory lock for the block; yields False if another process has it.
+
+    The lock lives on a dedicated connection, so work inside the block may
+    commit as often as it likes. Other dialects run single-process: always True.
+    """
+    bind = session.get_bind()
+    if bind.dialect.name != "postgresql":
+        yield True
+        return
+    with bind.engine.connect() as conn:
+        locked = bool(
+            conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": key}).scalar()
+        )
+        conn.commit()
+        try:
+            yield locked
+        finally:
+            if locked:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+                conn.commit()
@@ -12,6 +12,7 @@ from starlette.exceptions import HTTPException as StarletteHTTPException
 
 from app.api.v1.ai import chat_alias_router
 from app.api.v1.router import api_router
+from app.core.audit import audit_writer
 from app.core.config import settings
 from app.core.logging import setup_logging
 from app.core.metrics import render_metrics
@@ -41,6 +42,8 @@ logger = logging.getLogger("app")
 async def lifespan(_: FastAPI):
     _init_sentry()
     init_redis()
+    if settings.audit_enabled and settings.audit_write_mode == "async":
+        audit_writer.start()
     if settings.auto_create_db:
         create_db_and_tables()
         with get_session() as s:
@@ -63,8 +66,58 @@ async def lifespan(_: FastAPI):
             except Exception:
                 logger.exception("retention_job_failed")
 
+        def _run_ledger_archive() -> None:
+            try:
+                from app.services.ledger_archive import archive_closed_ledger_months
+
+                with get_session() as s:
+                    archive_closed_ledger_months(s)
+            except Exception:
+                logger.exception("ledger_archive_job_failed")
+
+        def _run_quest_pregen() -> None:
+            try:
+                from app.services.quests import pregenerate_quests
+
+                with get_session() as s:
+                    pregenerate_quests(s)
+            except Exception:
+                logger.exception("quest_pregen_job_failed")
+
+        def _run_report_view_refresh() -> None:
+            try:
+                from app.services.report_views import refresh_report_views
+
+                with get_session() as s:
+                    refresh_report_views(s)
+            except Exception:
+                logger.exception("report_view_refresh_job_failed")
+
         scheduler = BackgroundScheduler()
         scheduler.add_job(_run_retention, "cron", hour=3, minute=0, id="retention_cleanup")
+        if settings.ledger_archive_enabled:
+            scheduler.add_job(
+                _run_ledger_archive, "cron", day=1, hour=4, minute=0, id="xp_ledger_archive"
+            )
+        if settings.quest_pregen_enabled:
+            # Late evening in the app timezone, ahead of the daily rollover.
+            scheduler.add_job(
+                _run_quest_pregen,
+                "cron",
+                hour=23,
+                minute=15,
+                timezone=settings.tz,
+                id="quest_pregen",
+            )
+        if settings.reports_matview_enabled and engine.dialect.name == "postgresql":
+            scheduler.add_job(
+                _run_report_view_refresh,
+                "interval",
+                seconds=max(30, int(settings.reports_matview_refresh_sec)),
+                id="report_view_refresh",
+                coalesce=True,
+                max_instances=1,
+            )
         scheduler.start()
         logger.info("retention_scheduler_started")
     except Exception:
@@ -74,6 +127,7 @@ async def lifespan(_: FastAPI):
 
     if scheduler is not None:
         scheduler.shutdown(wait=False)
+    audit_writer.stop()
 
 
 # ------------------------------------------------------------------
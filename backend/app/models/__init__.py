@@ -21,7 +21,7 @@ from .quest import DailyQuest, RewardClaim, WeeklyQuest  # noqa: F401
 from .drill import Drill, DrillReview  # noqa: F401
 
 # combat domain
-from .combat import CombatBattle  # noqa: F401
+from .combat import CombatBattle, CombatTurn  # noqa: F401
 
 # webhook domain
 from .webhook import UserWebhook, WebhookOutbox  # noqa: F401
@@ -29,9 +29,15 @@ from .webhook import UserWebhook, WebhookOutbox  # noqa: F401
 # system / infrastructure domain
 from .system import (  # noqa: F401
     AuditEvent,
+    BackupImportJob,
     CommandIdempotency,
     RefreshToken,
+    ReportViewRefresh,
     SystemWindowMessage,
     UserAchievement,
+    UserAchievementCounters,
+    XpLedgerArchive,
+    XpLedgerDailyTotal,
     XpLedgerEvent,
+    XpLedgerSourceKey,
 )
@@ -1,10 +1,10 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Optional
+from typing import Any, Optional
 from uuid import uuid4
 
-from sqlalchemy import JSON, Column, ForeignKey, String
+from sqlalchemy import JSON, BigInteger, Column, ForeignKey, Integer, String
 from sqlmodel import Field, SQLModel
 
 from .base import utcnow
@@ -33,5 +33,36 @@ class CombatBattle(SQLModel, table=True):
     current_question_id: Optional[str] = Field(default=None, index=True)
     last_question_id: Optional[str] = Field(default=None, index=True)
     deck_json: list[str] = Field(default_factory=list, sa_column=Column(JSON, nullable=False))
+    # Every random draw of the battle derives from (rng_seed, turn_seq); see combat_log.
+    rng_seed: Optional[int] = Field(default=None, sa_column=Column(BigInteger, nullable=True))
+    # combat_content.CombatModule.content_hash at battle start; replays need the same content.
+    content_hash: Optional[str] = Field(default=None)
+    turn_seq: int = Field(default=0)
+    # Turns of the ongoing battle, moved to combat_turns when it ends.
+    turn_log_json: list[list[Any]] = Field(
+        default_factory=list, sa_column=Column(JSON, nullable=False)
+    )
     created_at: datetime = Field(default_factory=utcnow, index=True)
     updated_at: datetime = Field(default_factory=utcnow, index=True)
+
+
+class CombatTurn(SQLModel, table=True):
+    """One logged event of a finished battle (start, draw, answer, item, flee)."""
+
+    __tablename__ = "combat_turns"
+
+    battle_id: str = Field(
+        sa_column=Column(
+            String,
+            ForeignKey("combat_battles.id", ondelete="CASCADE"),
+            primary_key=True,
+        )
+    )
+    seq: int = Field(sa_column=Column(Integer, primary_key=True, autoincrement=False))
+    kind: str
+    ref: Optional[str] = Field(default=None)  # question id, item id or module id
+    option_index: Optional[int] = Field(default=None)
+    player_damage: int = Field(default=0)
+    enemy_damage: int = Field(default=0)
+    player_hp: int = Field(default=0)
+    enemy_hp: int = Field(default=0)
@@ -39,6 +39,10 @@ class DailyQuest(SQLModel, table=True):
     source: str = Field(default="fallback", index=True)
     generated_at: datetime = Field(default_factory=utcnow, index=True)
     created_at: datetime = Field(default_factory=utcnow)
+    # Bumped on every ORM update; incremental backups use it as a watermark.
+    updated_at: datetime = Field(
+        default_factory=utcnow, index=True, sa_column_kwargs={"onupdate": utcnow}
+    )
 
 
 class WeeklyQuest(SQLModel, table=True):
@@ -52,6 +52,10 @@ class StudySession(SQLModel, table=True):
     reward_multiplier_bps: int = Field(default=10_000)
     started_at: datetime = Field(default_factory=utcnow)
     created_at: datetime = Field(default_factory=utcnow)
+    # Bumped on every ORM update; incremental backups use it as a watermark.
+    updated_at: datetime = Field(
+        default_factory=utcnow, index=True, sa_column_kwargs={"onupdate": utcnow}
+    )
     deleted_at: Optional[datetime] = Field(default=None, index=True)
     date_key: str = Field(index=True)  # YYYY-MM-DD (user local)
 
@@ -4,7 +4,7 @@ from datetime import datetime
 from typing import Any, Optional
 from uuid import uuid4
 
-from sqlalchemy import JSON, Column, ForeignKey, String, Text, UniqueConstraint
+from sqlalchemy import JSON, Column, ForeignKey, Index, String, Text, UniqueConstraint
 from sqlmodel import Field, SQLModel
 
 from .base import utcnow
@@ -12,6 +12,9 @@ from .base import utcnow
 
 class SystemWindowMessage(SQLModel, table=True):
     __tablename__ = "system_window_messages"
+    __table_args__ = (
+        Index("ix_system_window_messages_user_created", "user_id", "created_at"),
+    )
 
     id: str = Field(default_factory=lambda: str(uuid4()), primary_key=True)
     user_id: str = Field(
@@ -76,6 +79,66 @@ class UserAchievement(SQLModel, table=True):
     unlocked_at: datetime = Field(default_factory=utcnow, index=True)
 
 
+class UserAchievementCounters(SQLModel, table=True):
+    """Per-user metrics achievements are defined on (see app.services.achievements).
+
+    ``stale`` marks counters that must be rebuilt from history before use.
+    """
+
+    __tablename__ = "user_achievement_counters"
+
+    user_id: str = Field(
+        sa_column=Column(
+            String,
+            ForeignKey("users.id", ondelete="CASCADE"),
+            primary_key=True,
+        )
+    )
+    total_sessions: int = Field(default=0)
+    total_minutes: int = Field(default=0)
+    review_count: int = Field(default=0)
+    # Latest run of consecutive study days (date keys); it only counts while it ends today.
+    streak_days: int = Field(default=0)
+    streak_end: Optional[str] = Field(default=None)
+    stale: bool = Field(default=False)
+    updated_at: datetime = Field(default_factory=utcnow)
+
+
+class ReportViewRefresh(SQLModel, table=True):
+    """Last refresh of each reporting materialized view (Postgres only)."""
+
+    __tablename__ = "report_view_refreshes"
+
+    name: str = Field(primary_key=True)
+    refreshed_at: datetime = Field(default_factory=utcnow)
+    duration_ms: int = Field(default=0)
+
+
+class BackupImportJob(SQLModel, table=True):
+    """Progress of a background backup import, readable from every worker."""
+
+    __tablename__ = "backup_import_jobs"
+
+    id: str = Field(default_factory=lambda: str(uuid4()), primary_key=True)
+    user_id: str = Field(
+        sa_column=Column(
+            String,
+            ForeignKey("users.id", ondelete="CASCADE"),
+            index=True,
+            nullable=False,
+        )
+    )
+    mode: str = Field(default="replace")
+    status: str = Field(default="queued", index=True)
+    phase: str = Field(default="queued")
+    processed: int = Field(default=0)
+    total: int = Field(default=0)
+    error: Optional[str] = Field(default=None)
+    created_at: datetime = Field(default_factory=utcnow, index=True)
+    updated_at: datetime = Field(default_factory=utcnow)
+    finished_at: Optional[datetime] = Field(default=None)
+
+
 class AuditEvent(SQLModel, table=True):
     """Append-only audit log for security/forensics.
 
@@ -130,6 +193,67 @@ class XpLedgerEvent(SQLModel, table=True):
     created_at: datetime = Field(default_factory=utcnow, index=True)
 
 
+class XpLedgerSourceKey(SQLModel, table=True):
+    """Idempotency key of a ledger event pruned by the archiver.
+
+    Keeps ``uq_xp_ledger_source`` effective once the raw row is gone; checked by
+    app.services.progression.apply_xp_gold.
+    """
+
+    __tablename__ = "xp_ledger_source_keys"
+
+    user_id: str = Field(
+        sa_column=Column(
+            String,
+            ForeignKey("users.id", ondelete="CASCADE"),
+            primary_key=True,
+        )
+    )
+    source_type: str = Field(primary_key=True)
+    source_ref: str = Field(primary_key=True)
+
+
+class XpLedgerDailyTotal(SQLModel, table=True):
+    """Compact per user/day/event_type rollup of archived ledger months."""
+
+    __tablename__ = "xp_ledger_daily_totals"
+    __table_args__ = (
+        UniqueConstraint("user_id", "day_key", "event_type", name="uq_xp_ledger_daily_total"),
+    )
+
+    id: str = Field(default_factory=lambda: str(uuid4()), primary_key=True)
+    user_id: str = Field(
+        sa_column=Column(
+            String,
+            ForeignKey("users.id", ondelete="CASCADE"),
+            index=True,
+            nullable=False,
+        )
+    )
+    day_key: str = Field(index=True)  # YYYY-MM-DD (UTC)
+    event_type: str = Field(index=True)
+    event_count: int = Field(default=0)
+    xp_total: int = Field(default=0)
+    gold_total: int = Field(default=0)
+    created_at: datetime = Field(default_factory=utcnow)
+
+
+class XpLedgerArchive(SQLModel, table=True):
+    """Manifest of ledger months rolled up (and optionally exported) by the archiver."""
+
+    __tablename__ = "xp_ledger_archives"
+
+    id: str = Field(default_factory=lambda: str(uuid4()), primary_key=True)
+    month_key: str = Field(index=True, unique=True)  # YYYY-MM (UTC)
+    row_count: int = Field(default=0)
+    xp_total: int = Field(default=0)
+    gold_total: int = Field(default=0)
+    file_path: Optional[str] = Field(default=None)
+    file_sha256: Optional[str] = Field(default=None)
+    raw_deleted: bool = Field(default=False)
+    created_at: datetime = Field(default_factory=utcnow)
+
+
 class CommandIdempotency(SQLModel, table=True):
     """Persist command outcomes keyed by user + command + idempotency key."""
 
@@ -19,6 +19,8 @@ class User(SQLModel, table=True):
     password_hash: str
     onboarding_done: bool = Field(default=False)
     created_at: datetime = Field(default_factory=utcnow)
+    # Bumped by every study session write, see app.services.report_views.
+    sessions_changed_at: Optional[datetime] = Field(default=None)
 
 
 class UserSettings(SQLModel, table=True):
@@ -54,6 +54,7 @@ from .combat import (  # noqa: F401
     CombatQuestionOutEnvelope,
     CombatStartIn,
     CombatStartOut,
+    CombatTurnOut,
 )
 
 # settings / app state
@@ -114,6 +115,8 @@ from .drills import (  # noqa: F401
 # backup
 from .backup import (  # noqa: F401
     BackupImportIn,
+    BackupImportJobOut,
+    BackupLedgerEventOut,
     BackupOut,
     BackupQuestOut,
     BackupReviewOut,
@@ -123,6 +126,8 @@ from .backup import (  # noqa: F401
 # reports / leaderboard / achievements
 from .reports import (  # noqa: F401
     AchievementOut,
+    CalendarReportOut,
+    CalendarSeriesOut,
     LeaderboardEntryOut,
     LeaderboardOut,
     MonthlyReportOut,
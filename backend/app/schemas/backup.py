@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Literal, Optional
+from typing import Any, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -50,15 +50,34 @@ class BackupReviewOut(BaseModel):
     updatedAt: datetime
 
 
+class BackupLedgerEventOut(BaseModel):
+    id: str = Field(min_length=1, max_length=128)
+    eventType: str = Field(min_length=1, max_length=64)
+    sourceType: str = Field(min_length=1, max_length=64)
+    sourceRef: str = Field(min_length=1, max_length=256)
+    xpDelta: int
+    goldDelta: int
+    rulesetVersion: int = 1
+    payload: dict[str, Any] = Field(default_factory=dict)
+    createdAt: datetime
+
+
 class BackupOut(BaseModel):
     version: int = 1
     exportedAt: datetime
+    # Set on incremental exports; pass the previous ``exportedAt`` as ``since``.
+    since: Optional[datetime] = None
     user: UserOut
     goals: dict[str, int]
     sessions: list[BackupSessionOut]
     dailyQuests: list[BackupQuestOut]
     drillReviews: list[BackupReviewOut]
     customDrills: list[DrillOut] = []
+    # Incremental exports only. Only session deletions are carried: drills and
+    # reviews are hard-deleted and leave no tombstone.
+    deletedSessionIds: list[str] = []
+    # Export-only audit trail; imports ignore it and never grant XP/gold.
+    xpLedger: list[BackupLedgerEventOut] = []
 
 
 class BackupImportIn(BaseModel):
@@ -68,3 +87,17 @@ class BackupImportIn(BaseModel):
     dailyQuests: list[BackupQuestOut] = Field(default_factory=list)
     drillReviews: list[BackupReviewOut] = Field(default_factory=list)
     customDrills: list[DrillOut] = Field(default_factory=list)
+    # Only applied by merge-mode imports.
+    deletedSessionIds: list[str] = Field(default_factory=list)
+
+
+class BackupImportJobOut(BaseModel):
+    id: str
+    status: Literal["queued", "running", "done", "failed"]
+    phase: str
+    processed: int
+    total: int
+    error: Optional[str] = None
+    createdAt: datetime
+    updatedAt: datetime
+    finishedAt: Optional[datetime] = None
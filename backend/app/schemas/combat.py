@@ -66,6 +66,15 @@ class CombatAnswerOut(BaseModel):
     progress: ProgressionOut
 
 
+class CombatTurnOut(BaseModel):
+    result: Literal["correct", "incorrect"]
+    playerDamage: int
+    enemyDamage: int
+    battleState: CombatBattleStateOut
+    nextQuestion: Optional[CombatQuestionOut] = None
+    progress: ProgressionOut
+
+
 class CombatFleeIn(BaseModel):
     battleId: str
 
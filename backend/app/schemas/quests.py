@@ -53,7 +53,7 @@ class RegenerateMissionsIn(BaseModel):
 
 
 class RegenerateMissionsOut(BaseModel):
-    source: Literal["gemini", "fallback", "mixed"]
+    source: Literal["gemini", "fallback", "mixed", "pool"]
     nextAllowedAt: datetime
     warnings: list[str] = Field(default_factory=list)
     dailyQuests: list[DailyQuestOut] = Field(default_factory=list)
@@ -37,6 +37,24 @@ class MonthlyReportOut(BaseModel):
     months: list[MonthlyReportRowOut]
 
 
+class CalendarSeriesOut(BaseModel):
+    key: str  # subject or mode
+    minutes: list[int]  # aligned with CalendarReportOut.dates
+    xp: list[int]
+    totalMinutes: int
+    totalXp: int
+
+
+class CalendarReportOut(BaseModel):
+    from_: str = Field(alias="from")
+    to: str
+    groupBy: Literal["subject", "mode"]
+    dates: list[str]
+    minutes: list[int]  # all series, per date
+    xp: list[int]
+    series: list[CalendarSeriesOut]
+
+
 class LeaderboardEntryOut(BaseModel):
     position: int
     userId: str
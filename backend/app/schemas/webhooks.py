@@ -21,6 +21,7 @@ ALLOWED_WEBHOOK_EVENTS = frozenset(
         "session.updated",
         "session.deleted",
         "drill.reviewed",
+        "achievement.unlocked",
         "test",
     }
 )
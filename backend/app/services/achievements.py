@@ -1,12 +1,31 @@
+"""Achievements evaluated from per-user counters.
+
+``user_achievement_counters`` holds the metrics achievements are defined on
+(sessions, minutes, reviews and the latest study streak). Write paths apply
+their delta with ``record_session`` / ``record_review`` inside their own
+transaction; only achievements on the metrics that moved are checked, and new
+unlocks are stored and emitted as ``achievement.unlocked`` webhook events.
+
+Writes that are not a simple delta (session edits and deletes, backup import,
+resets, drill deletion) call ``mark_counters_stale``; stale or missing counters
+are rebuilt from history on next use, after which every achievement is checked.
+"""
+
 from __future__ import annotations
 
 from dataclasses import dataclass
-from datetime import datetime, timedelta, timezone
-from typing import Callable, Optional
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Optional
 
+from sqlalchemy import func, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlmodel import Session, select
 
-from app.models import DrillReview, StudySession, User, UserAchievement
+from app.models import DrillReview, User, UserAchievement, UserAchievementCounters
+from app.services.activity import load_activity
+from app.services.webhooks import enqueue_event
+
+METRICS = ("total_sessions", "total_minutes", "streak_days", "review_count")
 
 
 @dataclass(frozen=True)
@@ -15,51 +34,8 @@ class AchievementDef:
     name: str
     description: str
     icon: Optional[str]
-    predicate: Callable[[dict[str, int]], bool]
-
-
-def _review_count(db: Session, user_id: str) -> int:
-    return len(db.exec(select(DrillReview.id).where(DrillReview.user_id == user_id)).all())
-
-
-def _session_rows(db: Session, user_id: str) -> list[tuple[str, int]]:
-    return db.exec(
-        select(StudySession.date_key, StudySession.minutes).where(
-            StudySession.user_id == user_id,
-            StudySession.deleted_at.is_(None),
-        )
-    ).all()
-
-
-def _streak_days(rows: list[tuple[str, int]]) -> int:
-    if not rows:
-        return 0
-
-    totals: dict[str, int] = {}
-    for dk, minutes in rows:
-        totals[str(dk)] = totals.get(str(dk), 0) + int(minutes or 0)
-
-    streak = 0
-    cursor = datetime.now(timezone.utc).date()
-    while True:
-        key = cursor.strftime("%Y-%m-%d")
-        if totals.get(key, 0) <= 0:
-            break
-        streak += 1
-        cursor = cursor - timedelta(days=1)
-        if streak > 365:
-            break
-    return streak
-
-
-def _metrics(db: Session, user_id: str) -> dict[str, int]:
-    rows = _session_rows(db, user_id)
-    return {
-        "total_sessions": len(rows),
-        "total_minutes": int(sum(int(minutes or 0) for _, minutes in rows)),
-        "streak_days": _streak_days(rows),
-        "review_count": _review_count(db, user_id),
-    }
+    metric: str
+    threshold: int
 
 
 ACHIEVEMENTS: list[AchievementDef] = [
@@ -68,73 +44,279 @@ ACHIEVEMENTS: list[AchievementDef] = [
         name="Primeira Sessao",
         description="Registre sua primeira sessao de estudo.",
         icon="sparkles",
-        predicate=lambda m: m["total_sessions"] >= 1,
+        metric="total_sessions",
+        threshold=1,
     ),
     AchievementDef(
         key="ten_sessions",
         name="Ritmo de Cacador",
         description="Complete 10 sessoes de estudo.",
         icon="trending-up",
-        predicate=lambda m: m["total_sessions"] >= 10,
+        metric="total_sessions",
+        threshold=10,
     ),
     AchievementDef(
         key="hundred_minutes",
         name="100 Minutos",
         description="Acumule 100 minutos estudando.",
         icon="clock",
-        predicate=lambda m: m["total_minutes"] >= 100,
+        metric="total_minutes",
+        threshold=100,
     ),
     AchievementDef(
         key="streak_3",
         name="Sequencia 3 Dias",
         description="Mantenha uma sequencia de 3 dias.",
         icon="flame",
-        predicate=lambda m: m["streak_days"] >= 3,
+        metric="streak_days",
+        threshold=3,
     ),
     AchievementDef(
         key="streak_7",
         name="Sequencia 7 Dias",
         description="Mantenha uma sequencia de 7 dias.",
         icon="flame",
-        predicate=lambda m: m["streak_days"] >= 7,
+        metric="streak_days",
+        threshold=7,
     ),
     AchievementDef(
         key="first_review",
         name="Primeira Revisao",
         description="Faca sua primeira revisao espacada.",
         icon="check",
-        predicate=lambda m: m["review_count"] >= 1,
+        metric="review_count",
+        threshold=1,
     ),
     AchievementDef(
         key="ten_reviews",
         name="Memoria de Acao",
         description="Conclua 10 revisoes espacadas.",
         icon="brain",
-        predicate=lambda m: m["review_count"] >= 10,
+        metric="review_count",
+        threshold=10,
     ),
 ]
 
 
-def list_and_unlock_achievements(db: Session, user: User) -> list[dict]:
-    """Return achievements with unlock status and persist new unlocks."""
+def _today_key() -> str:
+    return datetime.now(timezone.utc).date().isoformat()
 
-    metrics = _metrics(db, user.id)
-    unlocked_rows = db.exec(select(UserAchievement).where(UserAchievement.user_id == user.id)).all()
-    unlocked_by_key = {row.key: row for row in unlocked_rows}
 
-    changed = False
-    result: list[dict] = []
+def _parse_day(value: str) -> date | None:
+    try:
+        return date.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def _review_count(db: Session, user_id: str) -> int:
+    return int(
+        db.exec(
+            select(func.count()).select_from(DrillReview).where(DrillReview.user_id == user_id)
+        ).one()
+    )
+
+
+def _rebuild_counters(db: Session, counters: UserAchievementCounters) -> None:
+    # One aggregated row per study day rather than per session; never from the
+    # report rollup, which may lag behind hard deletes.
+    activity = load_activity(db, user_id=counters.user_id, use_view=False)
+    counters.total_sessions = activity.total_sessions
+    counters.total_minutes = activity.total_minutes
+    counters.streak_days, counters.streak_end = activity.latest_run()
+    counters.review_count = _review_count(db, counters.user_id)
+    counters.stale = False
+    counters.updated_at = datetime.now(timezone.utc)
+    db.add(counters)
+
+
+def _ensure_counters(db: Session, user_id: str) -> None:
+    """Create a stale counters row unless one exists; concurrent callers never collide."""
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    db.exec(
+        dialect.insert(UserAchievementCounters)
+        .values(user_id=user_id, stale=True, updated_at=datetime.now(timezone.utc))
+        .on_conflict_do_nothing(index_elements=["user_id"])
+    )
+
+
+def _load_counters(db: Session, user_id: str) -> tuple[UserAchievementCounters, bool]:
+    """The user's counters (locked for the transaction) and whether they were rebuilt.
+
+    The row is created first: ``FOR UPDATE`` locks nothing on a missing row, so
+    two first writes would otherwise both insert it.
+    """
+    query = (
+        select(UserAchievementCounters)
+        .where(UserAchievementCounters.user_id == user_id)
+        .with_for_update()
+    )
+    counters = db.exec(query).first()
+    if counters is None:
+        _ensure_counters(db, user_id)
+        counters = db.exec(query).one()
+    if not counters.stale:
+        return counters, False
+    _rebuild_counters(db, counters)
+    db.flush()
+    return counters, True
+
+
+def _metric_values(counters: UserAchievementCounters) -> dict[str, int]:
+    return {
+        "total_sessions": int(counters.total_sessions),
+        "total_minutes": int(counters.total_minutes),
+        # A run that did not reach today is broken.
+        "streak_days": int(counters.streak_days) if counters.streak_end == _today_key() else 0,
+        "review_count": int(counters.review_count),
+    }
+
+
+def _extend_streak(counters: UserAchievementCounters, dk: str) -> bool:
+    """Add a study day to the latest run; True when the streak changed."""
+    day = _parse_day(dk)
+    end = _parse_day(counters.streak_end) if counters.streak_end else None
+    if day is None:
+        return False
+    if end is None or day > end + timedelta(days=1):
+        counters.streak_days, counters.streak_end = 1, dk
+        return True
+    if day == end + timedelta(days=1):
+        counters.streak_days, counters.streak_end = int(counters.streak_days) + 1, dk
+        return True
+    if day == end - timedelta(days=int(counters.streak_days)):
+        # Extends the run backwards, possibly joining an older run: recount.
+        counters.stale = True
+    return False
+
+
+def _unlock(
+    db: Session,
+    user_id: str,
+    counters: UserAchievementCounters,
+    changed: set[str] | tuple[str, ...],
+    *,
+    background_tasks: Any = None,
+) -> list[AchievementDef]:
+    metrics = _metric_values(counters)
+    reached = [a for a in ACHIEVEMENTS if a.metric in changed and metrics[a.metric] >= a.threshold]
+    if not reached:
+        return []
+    have = set(
+        db.exec(
+            select(UserAchievement.key).where(
+                UserAchievement.user_id == user_id,
+                UserAchievement.key.in_([a.key for a in reached]),
+            )
+        ).all()
+    )
+    unlocked = [a for a in reached if a.key not in have]
+    if not unlocked:
+        return []
+    rows = [UserAchievement(user_id=user_id, key=a.key) for a in unlocked]
+    db.add_all(rows)
+    db.flush()
+    for ach, row in zip(unlocked, rows, strict=True):
+        enqueue_event(
+            background_tasks,
+            db,
+            user_id,
+            "achievement.unlocked",
+            {
+                "key": ach.key,
+                "name": ach.name,
+                "metric": ach.metric,
+                "value": metrics[ach.metric],
+                "unlockedAt": row.unlocked_at.isoformat(),
+            },
+            commit=False,
+        )
+    return unlocked
+
+
+def record_session(
+    db: Session,
+    user_id: str,
+    *,
+    date_key: str,
+    minutes: int,
+    background_tasks: Any = None,
+) -> list[AchievementDef]:
+    """Count a new (already flushed) study session; returns new unlocks."""
+    counters, rebuilt = _load_counters(db, user_id)
+    if rebuilt:
+        return _unlock(db, user_id, counters, METRICS, background_tasks=background_tasks)
+
+    changed = {"total_sessions", "total_minutes"}
+    counters.total_sessions = int(counters.total_sessions) + 1
+    counters.total_minutes = int(counters.total_minutes) + int(minutes)
+    if int(minutes) > 0 and _extend_streak(counters, date_key):
+        changed.add("streak_days")
+    counters.updated_at = datetime.now(timezone.utc)
+    db.add(counters)
+    return _unlock(db, user_id, counters, changed, background_tasks=background_tasks)
+
+
+def record_review(
+    db: Session, user_id: str, *, background_tasks: Any = None
+) -> list[AchievementDef]:
+    """Count a new (already flushed) drill review row; returns new unlocks."""
+    counters, rebuilt = _load_counters(db, user_id)
+    if not rebuilt:
+        counters.review_count = int(counters.review_count) + 1
+        counters.updated_at = datetime.now(timezone.utc)
+        db.add(counters)
+    changed = METRICS if rebuilt else ("review_count",)
+    return _unlock(db, user_id, counters, changed, background_tasks=background_tasks)
 
-    for ach in ACHIEVEMENTS:
-        is_unlocked = bool(unlocked_by_key.get(ach.key))
-        if not is_unlocked and ach.predicate(metrics):
-            row = UserAchievement(user_id=user.id, key=ach.key)
-            db.add(row)
-            db.flush()
-            unlocked_by_key[ach.key] = row
-            is_unlocked = True
-            changed = True
 
+def mark_counters_stale(db: Session, user_id: str) -> None:
+    db.exec(
+        update(UserAchievementCounters)
+        .where(UserAchievementCounters.user_id == user_id)
+        .values(stale=True)
+    )
+
+
+def mark_drill_reviewers_stale(db: Session, drill_id: str) -> None:
+    """Before a drill (and its cascaded reviews) is deleted."""
+    db.exec(
+        update(UserAchievementCounters)
+        .where(
+            UserAchievementCounters.user_id.in_(
+                select(DrillReview.user_id).where(DrillReview.drill_id == drill_id)
+            )
+        )
+        .values(stale=True)
+    )
+
+
+def list_and_unlock_achievements(
+    db: Session, user: User, *, background_tasks: Any = None
+) -> list[dict]:
+    """Return achievements with unlock status.
+
+    Unlocks normally happen on the write paths; listing only evaluates when the
+    counters had to be rebuilt (first use, or after a stale-marking write).
+    Up-to-date counters are read without a lock, so listing never holds up writes.
+    """
+
+    stale = db.exec(
+        select(UserAchievementCounters.stale).where(UserAchievementCounters.user_id == user.id)
+    ).first()
+    if stale is None or stale:
+        counters, rebuilt = _load_counters(db, user.id)
+        if rebuilt:
+            _unlock(db, user.id, counters, METRICS, background_tasks=background_tasks)
+        # Also when another request rebuilt them first: release the row lock now.
+        db.commit()
+
+    unlocked_by_key = {
+        row.key: row
+        for row in db.exec(select(UserAchievement).where(UserAchievement.user_id == user.id)).all()
+    }
+    result: list[dict] = []
+    for ach in ACHIEVEMENTS:
         row = unlocked_by_key.get(ach.key)
         result.append(
             {
@@ -142,12 +324,8 @@ def list_and_unlock_achievements(db: Session, user: User) -> list[dict]:
                 "name": ach.name,
                 "description": ach.description,
                 "icon": ach.icon,
-                "unlocked": is_unlocked,
+                "unlocked": row is not None,
                 "unlockedAt": row.unlocked_at if row else None,
             }
         )
-
-    if changed:
-        db.commit()
-
     return result
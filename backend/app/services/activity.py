@@ -0,0 +1,186 @@
+"""Per-day study activity of a user: the calendar behind reports, state, progress
+and achievements.
+
+``load_activity`` reads the minutes and session count of every study day in a
+date range with one aggregate query; the ``mv_user_daily_stats`` rollup is used
+when it is fresh for the user (see app.services.report_views). With
+``subjects_from`` the same query is also grouped by subject and per-subject
+totals from that day on are accumulated in the same pass. Streaks are derived
+from the loaded days, so callers never query again for them.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from app.models import StudySession
+from app.services.report_views import daily_stats
+
+# A streak counts at most this many days; loading this window ending today is enough.
+STREAK_MAX_DAYS = 366
+
+
+def streak_window_start(end: date) -> date:
+    return end - timedelta(days=STREAK_MAX_DAYS - 1)
+
+
+def streak_ending(minutes_by_day: dict[str, int], day: date) -> int:
+    """Consecutive days with minutes ending on ``day`` (0 when ``day`` has none)."""
+    streak = 0
+    cursor = day
+    while streak < STREAK_MAX_DAYS and minutes_by_day.get(cursor.isoformat(), 0) > 0:
+        streak += 1
+        cursor -= timedelta(days=1)
+    return streak
+
+
+@dataclass(frozen=True)
+class Activity:
+    minutes_by_day: dict[str, int] = field(default_factory=dict)
+    sessions_by_day: dict[str, int] = field(default_factory=dict)
+    minutes_by_subject: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def total_minutes(self) -> int:
+        return sum(self.minutes_by_day.values())
+
+    @property
+    def total_sessions(self) -> int:
+        return sum(self.sessions_by_day.values())
+
+    def minutes_on(self, day: date) -> int:
+        return self.minutes_by_day.get(day.isoformat(), 0)
+
+    def days(self, start: date, end: date) -> list[tuple[str, int]]:
+        """Every day of the range, oldest first, with its minutes (0 when idle)."""
+        keys = ((start + timedelta(days=i)).isoformat() for i in range((end - start).days + 1))
+        return [(key, self.minutes_by_day.get(key, 0)) for key in keys]
+
+    def minutes_between(self, start: date, end: date) -> int:
+        return sum(minutes for _, minutes in self.days(start, end))
+
+    def streak_ending(self, day: date) -> int:
+        return streak_ending(self.minutes_by_day, day)
+
+    def latest_run(self) -> tuple[int, str | None]:
+        """Length and last day of the most recent run of days with minutes."""
+        active = [key for key, minutes in self.minutes_by_day.items() if minutes > 0]
+        if not active:
+            return 0, None
+        end = max(active)
+        try:
+            return self.streak_ending(date.fromisoformat(end)), end
+        except ValueError:
+            return 1, end
+
+
+def load_activity(
+    session: Session,
+    *,
+    user_id: str,
+    start: date | None = None,
+    end: date | None = None,
+    subjects_from: date | None = None,
+    use_view: bool = True,
+) -> Activity:
+    """Study days of the user in ``[start, end]`` (open ends: whole history).
+
+    ``subjects_from`` also fills ``minutes_by_subject`` with the minutes from that
+    day on; it needs the subject grouping, so the daily rollup is not used.
+    """
+    start_key = start.isoformat() if start else None
+    end_key = end.isoformat() if end else None
+    if subjects_from is None:
+        rows = daily_stats(
+            session, user_id=user_id, start_key=start_key, end_key=end_key, use_view=use_view
+        )
+        return Activity(
+            minutes_by_day={key: minutes for key, minutes, _, _, _ in rows},
+            sessions_by_day={key: count for key, _, count, _, _ in rows},
+        )
+
+    stmt = select(
+        StudySession.date_key,
+        StudySession.subject,
+        func.coalesce(func.sum(StudySession.minutes), 0),
+        func.count(),
+    ).where(StudySession.user_id == user_id, StudySession.deleted_at.is_(None))
+    if start_key is not None:
+        stmt = stmt.where(StudySession.date_key >= start_key)
+    if end_key is not None:
+        stmt = stmt.where(StudySession.date_key <= end_key)
+    rows = session.exec(stmt.group_by(StudySession.date_key, StudySession.subject)).all()
+
+    subjects_key = subjects_from.isoformat()
+    by_day: dict[str, int] = {}
+    sessions: dict[str, int] = {}
+    by_subject: dict[str, int] = {}
+    for key, subject, minutes, count in rows:
+        key, minutes = str(key), int(minutes or 0)
+        by_day[key] = by_day.get(key, 0) + minutes
+        sessions[key] = sessions.get(key, 0) + int(count or 0)
+        if key >= subjects_key:
+            by_subject[str(subject)] = by_subject.get(str(subject), 0) + minutes
+    return Activity(minutes_by_day=by_day, sessions_by_day=sessions, minutes_by_subject=by_subject)
+
+
+@dataclass(frozen=True)
+class CalendarSeries:
+    key: str
+    minutes: list[int]
+    xp: list[int]
+
+
+def calendar_series(
+    session: Session,
+    *,
+    user_id: str,
+    start: date,
+    end: date,
+    group_by: str,
+) -> tuple[list[str], list[CalendarSeries], CalendarSeries]:
+    """Columnar per-day minutes/xp for each subject or mode, from one GROUP BY.
+
+    Returns the dates of ``[start, end]``, one series per group ordered by total
+    minutes (largest first) and the per-day totals of all groups (key ``total``);
+    every array is aligned with the dates.
+    """
+    column = StudySession.subject if group_by == "subject" else StudySession.mode
+    dates = [(start + timedelta(days=i)).isoformat() for i in range((end - start).days + 1)]
+    index = {key: i for i, key in enumerate(dates)}
+    rows = session.exec(
+        select(
+            StudySession.date_key,
+            column,
+            func.coalesce(func.sum(StudySession.minutes), 0),
+            func.coalesce(func.sum(StudySession.xp_earned), 0),
+        )
+        .where(
+            StudySession.user_id == user_id,
+            StudySession.deleted_at.is_(None),
+            StudySession.date_key >= dates[0],
+            StudySession.date_key <= dates[-1],
+        )
+        .group_by(StudySession.date_key, column)
+    ).all()
+
+    series: dict[str, CalendarSeries] = {}
+    totals = CalendarSeries("total", [0] * len(dates), [0] * len(dates))
+    for key, group, minutes, xp in rows:
+        pos = index.get(str(key))
+        if pos is None:
+            continue
+        group = str(group)
+        if group not in series:
+            series[group] = CalendarSeries(group, [0] * len(dates), [0] * len(dates))
+        minutes, xp = int(minutes or 0), int(xp or 0)
+        series[group].minutes[pos] += minutes
+        series[group].xp[pos] += xp
+        totals.minutes[pos] += minutes
+        totals.xp[pos] += xp
+    ordered = sorted(series.values(), key=lambda s: (-sum(s.minutes), s.key))
+    return dates, ordered, totals
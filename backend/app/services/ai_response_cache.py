@@ -0,0 +1,130 @@
+"""Content-addressed cache for Gemini text generations.
+
+Keys are a sha256 of (model chain, system instruction, mime type, normalized
+prompt), so identical `/ai/text` prompts and mission prompts for users with the
+same goals share one provider call. Entries live in Redis (``SET ... EX``) when
+REDIS_URL is configured and in a bounded in-process LRU otherwise; both honour
+AI_RESPONSE_CACHE_TTL_SEC.
+
+Callers opt in per scope (``ai_text``, ``missions``, ``hunter``...) through
+AI_RESPONSE_CACHE_SCOPES; scopes not listed always hit the provider. Only
+``ai_text`` is on by default: mission prompts serve "regenerate", which must not
+return the previous answer.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from app.core.config import settings
+from app.core.metrics import record_ai_cache_hit, record_ai_cache_miss
+from app.core.rate_limit import get_redis_client
+
+_REDIS_PREFIX = "ai:resp:"
+
+
+def normalize_prompt(prompt: str) -> str:
+    return " ".join(prompt.split())
+
+
+def cache_key(
+    *,
+    models: list[str],
+    prompt: str,
+    system_instruction: str | None = None,
+    response_mime_type: str | None = None,
+) -> str:
+    material = json.dumps(
+        [
+            list(models),
+            (system_instruction or "").strip(),
+            (response_mime_type or "").strip(),
+            normalize_prompt(prompt),
+        ],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def cache_enabled_for(scope: str | None) -> bool:
+    if not scope or not settings.ai_response_cache_enabled:
+        return False
+    return scope in settings.ai_response_cache_scopes_list
+
+
+class InMemoryResponseCache:
+    """Thread-safe LRU with per-entry expiry."""
+
+    def __init__(self) -> None:
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, *, ttl_sec: int, max_entries: int) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl_sec, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > max(1, max_entries):
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+response_cache = InMemoryResponseCache()
+
+
+async def get_cached_response(key: str, *, scope: str) -> str | None:
+    redis_client = get_redis_client()
+    value: str | None = None
+    if redis_client is not None:
+        try:
+            value = await redis_client.get(_REDIS_PREFIX + key)
+        except Exception:
+            value = response_cache.get(key)
+    else:
+        value = response_cache.get(key)
+
+    if value:
+        record_ai_cache_hit(scope)
+        return value
+    record_ai_cache_miss(scope)
+    return None
+
+
+async def store_cached_response(key: str, value: str) -> None:
+    ttl_sec = max(1, int(settings.ai_response_cache_ttl_sec))
+    redis_client = get_redis_client()
+    if redis_client is not None:
+        try:
+            await redis_client.set(_REDIS_PREFIX + key, value, ex=ttl_sec)
+            return
+        except Exception:
+            pass
+    response_cache.set(
+        key,
+        value,
+        ttl_sec=ttl_sec,
+        max_entries=int(settings.ai_response_cache_max_entries),
+    )
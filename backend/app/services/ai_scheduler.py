@@ -0,0 +1,233 @@
+"""Quota-aware admission for Gemini calls, tracked per API key.
+
+The limits in ai_rate_limiter protect the app per user/guest; this scheduler
+protects the provider quota of each API key (the system key and every BYO user
+key). A request is admitted when the key has a free concurrency slot and its
+trailing 60s window has room for one more request and the estimated prompt
+tokens. Otherwise it waits in a FIFO queue for at most AI_SCHEDULER_MAX_WAIT_MS
+and is rejected when the queue is full or the wait would exceed the deadline.
+
+When the provider answers with a quota error, :meth:`AIRequestScheduler.backoff`
+pauses the whole key for its retry-after, so concurrent requests queue (or fail
+fast) instead of each hitting the provider 429.
+
+State is per process and guarded by a threading lock; waiters poll with
+``asyncio.sleep`` so the scheduler works across event loops. Keys that are idle
+(nothing in flight or queued, no backoff, empty window) are dropped by a sweep
+that runs at most once per window, so BYO keys do not accumulate forever.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import itertools
+import math
+import threading
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Literal
+
+from app.core.config import settings
+from app.core.metrics import (
+    record_ai_scheduler_rejected,
+    record_ai_scheduler_wait,
+    set_ai_scheduler_queue_depth,
+)
+
+KeyKind = Literal["system", "user"]
+
+_WINDOW_SEC = 60.0
+_POLL_SEC = 0.025
+
+
+class SchedulerRejected(Exception):
+    """Raised when a request cannot be admitted before its deadline."""
+
+    def __init__(self, reason: str, *, key_kind: KeyKind, retry_after_sec: int) -> None:
+        super().__init__(f"AI provider quota scheduler rejected request: {reason}")
+        self.reason = reason
+        self.key_kind = key_kind
+        self.retry_after_sec = retry_after_sec
+
+
+@dataclass(slots=True)
+class _KeyState:
+    kind: KeyKind
+    in_flight: int = 0
+    blocked_until: float = 0.0
+    admitted: deque[tuple[float, int]] = field(default_factory=deque)
+    waiting: deque[int] = field(default_factory=deque)
+
+    def idle(self, now: float) -> bool:
+        return (
+            self.in_flight == 0
+            and not self.waiting
+            and self.blocked_until <= now
+            and (not self.admitted or self.admitted[-1][0] <= now - _WINDOW_SEC)
+        )
+
+
+def estimate_tokens(text: str) -> int:
+    # Roughly four characters per token for Gemini's tokenizer on mixed pt/en text.
+    return max(1, math.ceil(len(text or "") / 4))
+
+
+def key_kind_for(api_key: str) -> KeyKind:
+    return "system" if api_key == settings.gemini_api_key.strip() else "user"
+
+
+class AIRequestScheduler:
+    def __init__(self) -> None:
+        self._keys: dict[str, _KeyState] = {}
+        self._lock = threading.Lock()
+        self._tickets = itertools.count()
+        self._last_sweep = time.monotonic()
+
+    @staticmethod
+    def _slot(api_key: str) -> str:
+        return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _limits(kind: KeyKind) -> tuple[int, int, int]:
+        if kind == "system":
+            return (
+                max(1, int(settings.ai_scheduler_system_rpm)),
+                max(1, int(settings.ai_scheduler_system_tpm)),
+                max(1, int(settings.ai_scheduler_system_concurrency)),
+            )
+        return (
+            max(1, int(settings.ai_scheduler_user_rpm)),
+            max(1, int(settings.ai_scheduler_user_tpm)),
+            max(1, int(settings.ai_scheduler_user_concurrency)),
+        )
+
+    def _state(self, api_key: str) -> _KeyState:
+        slot = self._slot(api_key)
+        state = self._keys.get(slot)
+        if state is None:
+            self._sweep(time.monotonic())
+            state = self._keys[slot] = _KeyState(kind=key_kind_for(api_key))
+        return state
+
+    def _sweep(self, now: float) -> None:
+        """Drop idle key states; runs at most once per window (caller holds the lock)."""
+        if now - self._last_sweep < _WINDOW_SEC:
+            return
+        self._last_sweep = now
+        for slot in [slot for slot, state in self._keys.items() if state.idle(now)]:
+            del self._keys[slot]
+
+    def _delay(self, state: _KeyState, *, tokens: int, now: float) -> float | None:
+        """Seconds until the key can admit ``tokens`` (0 = now, None = waits on a slot)."""
+        rpm, tpm, concurrency = self._limits(state.kind)
+        while state.admitted and state.admitted[0][0] <= now - _WINDOW_SEC:
+            state.admitted.popleft()
+
+        delay = max(0.0, state.blocked_until - now)
+        if len(state.admitted) >= rpm:
+            delay = max(delay, state.admitted[len(state.admitted) - rpm][0] + _WINDOW_SEC - now)
+        budget = max(0, tpm - min(tokens, tpm))
+        used = sum(cost for _, cost in state.admitted)
+        if used > budget:
+            for at, cost in state.admitted:
+                used -= cost
+                if used <= budget:
+                    delay = max(delay, at + _WINDOW_SEC - now)
+                    break
+        if delay <= 0 and state.in_flight >= concurrency:
+            return None
+        return delay
+
+    def _reject(self, state: _KeyState, reason: str, retry_after: float) -> SchedulerRejected:
+        record_ai_scheduler_rejected(state.kind, reason)
+        return SchedulerRejected(
+            reason, key_kind=state.kind, retry_after_sec=max(1, math.ceil(retry_after))
+        )
+
+    async def _admit(self, api_key: str, *, tokens: int) -> _KeyState:
+        max_wait = max(0, int(settings.ai_scheduler_max_wait_ms)) / 1000
+        started = time.monotonic()
+        deadline = started + max_wait
+        ticket = next(self._tickets)
+
+        with self._lock:
+            state = self._state(api_key)
+            delay = self._delay(state, tokens=tokens, now=started)
+            if delay == 0 and not state.waiting:
+                state.in_flight += 1
+                state.admitted.append((started, tokens))
+                record_ai_scheduler_wait(state.kind, 0.0)
+                return state
+            if delay is not None and started + delay > deadline:
+                reason = "backoff" if state.blocked_until > started else "deadline"
+                raise self._reject(state, reason, delay)
+            if len(state.waiting) >= max(1, int(settings.ai_scheduler_max_queue)):
+                raise self._reject(state, "queue_full", delay or _POLL_SEC)
+            state.waiting.append(ticket)
+            set_ai_scheduler_queue_depth(state.kind, len(state.waiting))
+
+        try:
+            while True:
+                await asyncio.sleep(min(_POLL_SEC, max(0.0, delay or _POLL_SEC)))
+                now = time.monotonic()
+                with self._lock:
+                    delay = self._delay(state, tokens=tokens, now=now)
+                    if delay == 0 and state.waiting[0] == ticket:
+                        state.waiting.popleft()
+                        set_ai_scheduler_queue_depth(state.kind, len(state.waiting))
+                        state.in_flight += 1
+                        state.admitted.append((now, tokens))
+                        record_ai_scheduler_wait(state.kind, now - started)
+                        return state
+                    if now + (delay or 0.0) > deadline:
+                        reason = "backoff" if state.blocked_until > now else "deadline"
+                        raise self._reject(state, reason, delay or _POLL_SEC)
+        except BaseException:
+            with self._lock:
+                if ticket in state.waiting:
+                    state.waiting.remove(ticket)
+                    set_ai_scheduler_queue_depth(state.kind, len(state.waiting))
+            raise
+
+    def _release(self, state: _KeyState) -> None:
+        with self._lock:
+            state.in_flight = max(0, state.in_flight - 1)
+
+    @asynccontextmanager
+    async def slot(self, api_key: str, *, prompt: str = "") -> AsyncIterator[None]:
+        """Hold a provider slot for ``api_key`` while the body runs."""
+        if not settings.ai_scheduler_enabled:
+            yield
+            return
+        state = await self._admit(api_key, tokens=estimate_tokens(prompt))
+        try:
+            yield
+        finally:
+            self._release(state)
+
+    def backoff(self, api_key: str, retry_after_sec: float | None) -> None:
+        """Pause every request on ``api_key`` after a provider quota error."""
+        seconds = retry_after_sec or settings.ai_scheduler_quota_backoff_sec
+        until = time.monotonic() + max(0.0, float(seconds))
+        with self._lock:
+            state = self._state(api_key)
+            state.blocked_until = max(state.blocked_until, until)
+
+    def queue_depth(self, api_key: str) -> int:
+        with self._lock:
+            return len(self._state(api_key).waiting)
+
+    def tracked_keys(self) -> int:
+        with self._lock:
+            return len(self._keys)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._keys.clear()
+
+
+ai_scheduler = AIRequestScheduler()
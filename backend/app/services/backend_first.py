@@ -22,7 +22,13 @@ from app.models import (
     WeeklyQuest,
     XpLedgerEvent,
 )
-from app.services.progression import apply_xp_gold, progress_to_dict, rank_from_level
+from app.services.activity import load_activity, streak_window_start
+from app.services.progression import (
+    DuplicateLedgerSource,
+    apply_xp_gold,
+    progress_to_dict,
+    rank_from_level,
+)
 from app.services.utils import now_local, week_key
 
 MissionCycle = Literal["daily", "weekly"]
@@ -581,7 +587,7 @@ def apply_xp_event(
                 "occurredAt": normalized_occurred_at.isoformat(),
             },
         )
-    except IntegrityError as exc:
+    except (IntegrityError, DuplicateLedgerSource) as exc:
         raise CommandError(
             status_code=409,
             code="duplicate_event",
@@ -616,34 +622,8 @@ def apply_xp_event(
 
 def _streak_days(session: Session, *, user_id: str) -> int:
     today = now_local().date()
-    scan_start = (today - timedelta(days=365)).strftime("%Y-%m-%d")
-    today_key = today.strftime("%Y-%m-%d")
-    rows = session.exec(
-        select(
-            StudySession.date_key,
-            func.coalesce(func.sum(StudySession.minutes), 0),
-        )
-        .where(
-            StudySession.user_id == user_id,
-            StudySession.date_key >= scan_start,
-            StudySession.date_key <= today_key,
-            StudySession.deleted_at.is_(None),
-        )
-        .group_by(StudySession.date_key)
-    ).all()
-    by_day = {str(day_key): int(minutes or 0) for day_key, minutes in rows}
-
-    streak = 0
-    cursor = today
-    while True:
-        key = cursor.strftime("%Y-%m-%d")
-        if by_day.get(key, 0) <= 0:
-            break
-        streak += 1
-        if streak > 365:
-            break
-        cursor = cursor - timedelta(days=1)
-    return streak
+    activity = load_activity(session, user_id=user_id, start=streak_window_start(today), end=today)
+    return activity.streak_ending(today)
 
 
 def get_progress_payload(session: Session, *, user: User) -> dict[str, Any]:
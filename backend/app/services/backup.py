@@ -0,0 +1,526 @@
+"""Bulk backup import pipeline.
+
+Rows from a validated backup payload are converted lazily, section by section,
+into plain dicts and written with executemany-style ``INSERT`` statements in
+fixed-size chunks. Background jobs record their progress in the
+``backup_import_jobs`` table so any worker can answer a status poll; jobs whose
+worker died are marked failed once they stop updating.
+
+Two import modes exist:
+- replace: wipe the user's backed-up tables, then bulk insert (full backups).
+  The wipe and the inserts always share one transaction, so a failed import
+  leaves the previous data untouched.
+- merge: upsert rows by id and apply tombstones (incremental backups). Jobs
+  commit after every chunk; upserts are idempotent, so rerunning a failed merge
+  completes it.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from collections.abc import Callable, Iterable, Iterator
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy import insert, update
+from sqlmodel import Session, delete, select
+
+from app.models import (
+    BackupImportJob,
+    DailyQuest,
+    Drill,
+    DrillReview,
+    StudyPlan,
+    StudySession,
+)
+from app.schemas import BackupImportIn
+from app.services.achievements import mark_counters_stale
+from app.services.report_views import mark_sessions_changed
+from app.services.utils import dump_goals
+
+logger = logging.getLogger("app")
+
+BACKUP_IMPORT_CHUNK_SIZE = 500
+# Finished jobs older than this are dropped when the user starts a new one.
+_JOB_RETENTION = timedelta(days=7)
+# Unfinished jobs without an update for this long lost their worker (crash, restart).
+_JOB_STALL_TIMEOUT = timedelta(minutes=30)
+
+IMPORT_MODE_REPLACE = "replace"
+IMPORT_MODE_MERGE = "merge"
+
+JOB_STATUS_QUEUED = "queued"
+JOB_STATUS_RUNNING = "running"
+JOB_STATUS_DONE = "done"
+JOB_STATUS_FAILED = "failed"
+
+ProgressCallback = Callable[[str, int, int], None]
+
+
+def _now_utc() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def iter_chunks(rows: Iterable[dict[str, Any]], size: int) -> Iterator[list[dict[str, Any]]]:
+    chunk: list[dict[str, Any]] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def resolve_drill_id_map(session: Session, *, user_id: str, drill_ids: list[str]) -> dict[str, str]:
+    """Map imported custom drill ids to collision-free ids with one query per chunk.
+
+    Must run after the user's own custom drills were deleted, so any remaining
+    match belongs to a global drill or to another user.
+    """
+    taken: set[str] = set()
+    unique_ids = list(dict.fromkeys(drill_ids))
+    for start in range(0, len(unique_ids), BACKUP_IMPORT_CHUNK_SIZE):
+        batch = unique_ids[start : start + BACKUP_IMPORT_CHUNK_SIZE]
+        taken.update(session.exec(select(Drill.id).where(Drill.id.in_(batch))).all())
+    return {
+        drill_id: (f"{user_id[:8]}-{drill_id}" if drill_id in taken else drill_id)
+        for drill_id in unique_ids
+    }
+
+
+def _drill_rows(
+    payload: BackupImportIn, user_id: str, id_map: dict[str, str]
+) -> Iterator[dict[str, Any]]:
+    now = _now_utc()
+    for d in payload.customDrills:
+        yield {
+            "id": id_map.get(d.id, d.id),
+            "subject": d.subject,
+            "question": d.question,
+            "answer": d.answer,
+            "tags_json": json.dumps(d.tags or []),
+            "created_by_user_id": user_id,
+            "is_active": True,
+            "created_at": now,
+            "updated_at": now,
+        }
+
+
+def _session_rows(payload: BackupImportIn, user_id: str) -> Iterator[dict[str, Any]]:
+    for s in payload.sessions:
+        yield {
+            "id": s.id,
+            "user_id": user_id,
+            "subject": s.subject,
+            "minutes": int(s.minutes),
+            "mode": s.mode,
+            "notes": s.notes,
+            "date_key": s.date,
+            "started_at": s.startedAt,
+            "created_at": s.createdAt,
+        }
+
+
+def _quest_rows(payload: BackupImportIn, user_id: str) -> Iterator[dict[str, Any]]:
+    now = _now_utc()
+    for q in payload.dailyQuests:
+        yield {
+            "id": q.id,
+            "user_id": user_id,
+            "date_key": q.date,
+            "subject": q.subject,
+            "title": q.title,
+            "description": q.description,
+            "rank": q.rank,
+            "difficulty": q.difficulty,
+            "objective": q.objective,
+            "tags_json": json.dumps(q.tags or []),
+            "reward_xp": (int(q.rewardXp) if q.rewardXp is not None else None),
+            "reward_gold": (int(q.rewardGold) if q.rewardGold is not None else None),
+            "source": (q.source or "fallback"),
+            "generated_at": (q.generatedAt or now),
+            "target_minutes": int(q.targetMinutes),
+            "progress_minutes": int(q.progressMinutes),
+            "claimed": bool(q.claimed),
+            "created_at": now,
+        }
+
+
+def _review_rows(
+    payload: BackupImportIn, user_id: str, id_map: dict[str, str]
+) -> Iterator[dict[str, Any]]:
+    for r in payload.drillReviews:
+        yield {
+            "id": r.id,
+            "user_id": user_id,
+            "drill_id": id_map.get(r.drillId, r.drillId),
+            "next_review_at": r.nextReviewAt,
+            "interval_days": int(r.intervalDays),
+            "ease": float(r.ease),
+            "reps": int(r.reps),
+            "last_result": r.lastResult,
+            "updated_at": r.updatedAt,
+        }
+
+
+def count_backup_rows(payload: BackupImportIn, *, mode: str = IMPORT_MODE_REPLACE) -> int:
+    total = (
+        len(payload.customDrills)
+        + len(payload.sessions)
+        + len(payload.dailyQuests)
+        + len(payload.drillReviews)
+    )
+    if mode == IMPORT_MODE_MERGE:
+        total += len(payload.deletedSessionIds)
+    return total
+
+
+def _upsert_plan(session: Session, *, user_id: str, goals: dict[str, int]) -> None:
+    plan = session.exec(select(StudyPlan).where(StudyPlan.user_id == user_id)).first()
+    if not plan:
+        plan = StudyPlan(user_id=user_id, goals_json=dump_goals(goals))
+    else:
+        plan.goals_json = dump_goals(goals)
+        plan.updated_at = _now_utc()
+    session.add(plan)
+    session.flush()
+
+
+def import_backup_payload(
+    session: Session,
+    *,
+    user_id: str,
+    payload: BackupImportIn,
+    chunk_size: int = BACKUP_IMPORT_CHUNK_SIZE,
+    on_progress: ProgressCallback | None = None,
+) -> int:
+    """Replace the user's backed-up data with ``payload`` using bulk inserts.
+
+    Never commits: the wipe must stay in the caller's transaction together with
+    the inserts. Returns the number of inserted rows.
+    """
+    chunk_size = max(1, int(chunk_size))
+    total = count_backup_rows(payload)
+    processed = 0
+
+    def _progress(phase: str) -> None:
+        if on_progress is not None:
+            on_progress(phase, processed, total)
+
+    # 1) Delete dependent tables first; global drills are preserved.
+    session.exec(delete(DrillReview).where(DrillReview.user_id == user_id))
+    session.exec(delete(DailyQuest).where(DailyQuest.user_id == user_id))
+    session.exec(delete(StudySession).where(StudySession.user_id == user_id))
+    session.exec(delete(Drill).where(Drill.created_by_user_id == user_id))
+    mark_counters_stale(session, user_id)
+    mark_sessions_changed(session, user_id)
+
+    # 2) Upsert plan
+    _upsert_plan(session, user_id=user_id, goals=payload.goals)
+    _progress("prepared")
+
+    # 3) Resolve every custom drill id collision with a set-based lookup.
+    id_map = resolve_drill_id_map(
+        session, user_id=user_id, drill_ids=[d.id for d in payload.customDrills]
+    )
+
+    sections: tuple[tuple[str, Any, Iterator[dict[str, Any]]], ...] = (
+        ("customDrills", Drill, _drill_rows(payload, user_id, id_map)),
+        ("sessions", StudySession, _session_rows(payload, user_id)),
+        ("dailyQuests", DailyQuest, _quest_rows(payload, user_id)),
+        ("drillReviews", DrillReview, _review_rows(payload, user_id, id_map)),
+    )
+    for phase, model, rows in sections:
+        for chunk in iter_chunks(rows, chunk_size):
+            session.execute(insert(model), chunk)
+            processed += len(chunk)
+            _progress(phase)
+    return processed
+
+
+def _resolve_merge_drill_ids(
+    session: Session, *, user_id: str, drill_ids: list[str]
+) -> dict[str, str]:
+    """Map incoming custom drill ids onto the ids they were stored under.
+
+    Ids owned by the user are kept; ids taken by a global or foreign drill use
+    the same prefixed fallback as replace-mode imports.
+    """
+    prefixed = {drill_id: f"{user_id[:8]}-{drill_id}" for drill_id in dict.fromkeys(drill_ids)}
+    owners: dict[str, str | None] = {}
+    candidates = list(prefixed) + list(prefixed.values())
+    for start in range(0, len(candidates), BACKUP_IMPORT_CHUNK_SIZE):
+        batch = candidates[start : start + BACKUP_IMPORT_CHUNK_SIZE]
+        owners.update(
+            session.exec(select(Drill.id, Drill.created_by_user_id).where(Drill.id.in_(batch))).all()
+        )
+    return {
+        drill_id: (
+            drill_id
+            if drill_id not in owners or owners[drill_id] == user_id
+            else prefixed[drill_id]
+        )
+        for drill_id in prefixed
+    }
+
+
+def _adopt_existing_quest_ids(
+    session: Session, *, user_id: str, chunk: list[dict[str, Any]]
+) -> None:
+    """Reuse the stored id of quests matching ``(date_key, subject)`` in place."""
+    dates = {row["date_key"] for row in chunk}
+    existing = session.exec(
+        select(DailyQuest.date_key, DailyQuest.subject, DailyQuest.id).where(
+            DailyQuest.user_id == user_id,
+            DailyQuest.date_key.in_(dates),
+        )
+    ).all()
+    by_key = {(dk, subject): quest_id for dk, subject, quest_id in existing}
+    for row in chunk:
+        row["id"] = by_key.get((row["date_key"], row["subject"]), row["id"])
+
+
+def _upsert_owned_chunk(
+    session: Session,
+    *,
+    model: Any,
+    owner_column: Any,
+    user_id: str,
+    chunk: list[dict[str, Any]],
+    insert_only: tuple[str, ...] = (),
+) -> int:
+    """Insert new ids, update ids owned by ``user_id`` and skip foreign ones.
+
+    Columns in ``insert_only`` are written for new rows but left untouched on
+    updates (e.g. ``created_at`` when the payload has no original value).
+    """
+    ids = [row["id"] for row in chunk]
+    owners = dict(session.exec(select(model.id, owner_column).where(model.id.in_(ids))).all())
+    inserts = [row for row in chunk if row["id"] not in owners]
+    updates = [
+        {key: value for key, value in row.items() if key not in insert_only}
+        for row in chunk
+        if owners.get(row["id"]) == user_id
+    ]
+    if inserts:
+        session.execute(insert(model), inserts)
+    if updates:
+        session.execute(update(model), updates)
+    return len(inserts) + len(updates)
+
+
+def merge_backup_payload(
+    session: Session,
+    *,
+    user_id: str,
+    payload: BackupImportIn,
+    chunk_size: int = BACKUP_IMPORT_CHUNK_SIZE,
+    commit_chunks: bool = False,
+    on_progress: ProgressCallback | None = None,
+) -> int:
+    """Apply an (incremental) backup on top of the user's current data.
+
+    Rows are upserted by id and soft-deletes listed in ``deletedSessionIds`` are
+    replayed. Ledger events are never imported: XP and gold are only granted by
+    the server. With
+    ``commit_chunks=False`` (default) the caller owns the transaction and must
+    commit; with ``commit_chunks=True`` every chunk is committed as it completes.
+    Returns the number of applied rows.
+    """
+    chunk_size = max(1, int(chunk_size))
+    total = count_backup_rows(payload, mode=IMPORT_MODE_MERGE)
+    processed = 0
+    now = _now_utc()
+
+    def _progress(phase: str) -> None:
+        if on_progress is not None:
+            on_progress(phase, processed, total)
+
+    _upsert_plan(session, user_id=user_id, goals=payload.goals)
+    mark_counters_stale(session, user_id)
+    id_map = _resolve_merge_drill_ids(
+        session, user_id=user_id, drill_ids=[d.id for d in payload.customDrills]
+    )
+    _progress("prepared")
+
+    # Drill and quest payloads carry no creation time: keep the stored one on update.
+    sections: tuple[tuple[str, Any, Any, tuple[str, ...], Iterator[dict[str, Any]]], ...] = (
+        (
+            "customDrills",
+            Drill,
+            Drill.created_by_user_id,
+            ("created_at",),
+            _drill_rows(payload, user_id, id_map),
+        ),
+        (
+            "sessions",
+            StudySession,
+            StudySession.user_id,
+            (),
+            ({**row, "updated_at": now} for row in _session_rows(payload, user_id)),
+        ),
+        (
+            "dailyQuests",
+            DailyQuest,
+            DailyQuest.user_id,
+            ("created_at",),
+            ({**row, "updated_at": now} for row in _quest_rows(payload, user_id)),
+        ),
+        (
+            "drillReviews",
+            DrillReview,
+            DrillReview.user_id,
+            (),
+            _review_rows(payload, user_id, id_map),
+        ),
+    )
+    for phase, model, owner_column, insert_only, rows in sections:
+        for chunk in iter_chunks(rows, chunk_size):
+            if model is DailyQuest:
+                _adopt_existing_quest_ids(session, user_id=user_id, chunk=chunk)
+            processed += _upsert_owned_chunk(
+                session,
+                model=model,
+                owner_column=owner_column,
+                user_id=user_id,
+                chunk=chunk,
+                insert_only=insert_only,
+            )
+            if commit_chunks:
+                session.commit()
+            _progress(phase)
+
+    deleted_ids = list(dict.fromkeys(payload.deletedSessionIds))
+    for start in range(0, len(deleted_ids), chunk_size):
+        batch = deleted_ids[start : start + chunk_size]
+        result = session.exec(
+            update(StudySession)
+            .where(
+                StudySession.user_id == user_id,
+                StudySession.id.in_(batch),
+                StudySession.deleted_at.is_(None),
+            )
+            .values(deleted_at=now, updated_at=now)
+        )
+        processed += int(result.rowcount or 0)
+        if commit_chunks:
+            session.commit()
+        _progress("deletedSessionIds")
+
+    # Last, so a view refreshed between committed chunks is still bypassed.
+    mark_counters_stale(session, user_id)
+    mark_sessions_changed(session, user_id)
+    if commit_chunks:
+        session.commit()
+    return processed
+
+
+def _update_job(job_id: str, **changes: Any) -> None:
+    from app.db import get_session
+
+    with get_session() as session:
+        session.execute(
+            update(BackupImportJob)
+            .where(BackupImportJob.id == job_id)
+            .values(**changes, updated_at=_now_utc())
+        )
+        session.commit()
+
+
+def _fail_stalled_jobs(session: Session, *, user_id: str) -> None:
+    now = _now_utc()
+    session.exec(
+        update(BackupImportJob)
+        .where(
+            BackupImportJob.user_id == user_id,
+            BackupImportJob.status.in_((JOB_STATUS_QUEUED, JOB_STATUS_RUNNING)),
+            BackupImportJob.updated_at < now - _JOB_STALL_TIMEOUT,
+        )
+        .values(status=JOB_STATUS_FAILED, error="stalled", finished_at=now, updated_at=now)
+    )
+
+
+def create_import_job(
+    session: Session, *, user_id: str, total: int, mode: str = IMPORT_MODE_REPLACE
+) -> BackupImportJob:
+    """Queue a job row for the user and drop their long-finished ones (caller commits)."""
+    _fail_stalled_jobs(session, user_id=user_id)
+    session.exec(
+        delete(BackupImportJob).where(
+            BackupImportJob.user_id == user_id,
+            BackupImportJob.finished_at.is_not(None),
+            BackupImportJob.finished_at < _now_utc() - _JOB_RETENTION,
+        )
+    )
+    job = BackupImportJob(user_id=user_id, mode=mode, total=int(total))
+    session.add(job)
+    return job
+
+
+def get_import_job(session: Session, job_id: str, *, user_id: str) -> BackupImportJob | None:
+    """The user's job, failing it first if its worker stopped updating (caller commits)."""
+    _fail_stalled_jobs(session, user_id=user_id)
+    job = session.get(BackupImportJob, job_id)
+    if job is None or job.user_id != user_id:
+        return None
+    return job
+
+
+def run_import_job(
+    job_id: str, payload: BackupImportIn, mode: str = IMPORT_MODE_REPLACE
+) -> None:
+    """Execute a queued import job in its own DB session (background task).
+
+    Job updates use short sessions of their own. Intermediate progress is not
+    written on SQLite: the import transaction holds the database write lock.
+    """
+    from app.db import get_session
+
+    with get_session() as session:
+        job = session.get(BackupImportJob, job_id)
+        user_id = job.user_id if job is not None else None
+    if user_id is None:
+        return
+
+    _update_job(job_id, status=JOB_STATUS_RUNNING, phase="deleting")
+
+    def _on_progress(phase: str, processed: int, total: int) -> None:
+        _update_job(job_id, phase=phase, processed=processed, total=total)
+
+    with get_session() as session:
+        progress = _on_progress if session.get_bind().dialect.name != "sqlite" else None
+        try:
+            if mode == IMPORT_MODE_MERGE:
+                inserted = merge_backup_payload(
+                    session,
+                    user_id=user_id,
+                    payload=payload,
+                    commit_chunks=True,
+                    on_progress=progress,
+                )
+            else:
+                inserted = import_backup_payload(
+                    session, user_id=user_id, payload=payload, on_progress=progress
+                )
+            session.commit()
+        except Exception as exc:
+            session.rollback()
+            logger.exception("backup_import_job_failed", extra={"job_id": job_id})
+            _update_job(
+                job_id,
+                status=JOB_STATUS_FAILED,
+                error=exc.__class__.__name__,
+                finished_at=_now_utc(),
+            )
+            return
+
+    _update_job(
+        job_id,
+        status=JOB_STATUS_DONE,
+        phase="done",
+        processed=inserted,
+        finished_at=_now_utc(),
+    )
+    logger.info("backup_import_job_done", extra={"job_id": job_id, "rows": inserted})
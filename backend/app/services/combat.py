@@ -6,13 +6,22 @@ from typing import Any
 
 from sqlmodel import Session, select
 
-from app.models import CombatBattle, User
+from app.models import CombatBattle, CombatTurn, User
 from app.services.backend_first import (
     CommandError,
     idempotency_replay,
     save_idempotency_result,
 )
-from app.services.combat_content import CombatModule, get_combat_module
+from app.services.combat_content import CombatModule, CombatQuestion, get_combat_module
+from app.services.combat_log import (
+    LOG_COLUMNS,
+    battle_rng,
+    event_rng,
+    flush_turn_log,
+    new_seed,
+    record_event,
+)
+from app.services.combat_state import load_battle, refresh_from_cache, save_battle
 from app.services.inventory import use_inventory_item
 from app.services.progression import apply_vitals, apply_xp_gold, get_or_create_user_stats, progress_to_dict
 
@@ -24,6 +33,10 @@ PLAYER_ROLL_MIN = 0.8
 PLAYER_ROLL_MAX = 1.2
 PLAYER_EFFECTIVE_PERCENT_MIN = 0.05
 PLAYER_EFFECTIVE_PERCENT_MAX = 0.18
+# XP/gold for victory and flee are damage dealt // divisor; defeat pays half.
+REWARD_XP_DAMAGE_DIVISOR = 5
+REWARD_GOLD_DAMAGE_DIVISOR = 20
+DEFEAT_REWARD_DIVISOR = 2
 
 BOSS_DAMAGE_BY_RANK: dict[str, tuple[int, int]] = {
     "F": (4, 7),
@@ -59,28 +72,16 @@ def _clamp(value: float, min_value: float, max_value: float) -> float:
     return min(max_value, max(min_value, value))
 
 
-def _random_int_inclusive(min_value: int, max_value: int) -> int:
-    return random.randint(min_value, max_value)
-
-
-def _shuffle(question_ids: list[str]) -> list[str]:
+def _shuffle(question_ids: list[str], rng: random.Random) -> list[str]:
     deck = list(question_ids)
-    random.shuffle(deck)
+    rng.shuffle(deck)
     return deck
 
 
-def _question_bounds(module: CombatModule) -> tuple[int, int]:
-    questions = module["questions"]
-    if not questions:
-        return 1, 1
-    damages = [int(q["damage"]) for q in questions]
-    return min(damages), max(damages)
-
-
-def _question_by_id(module: CombatModule, question_id: str) -> dict[str, Any]:
-    for question in module["questions"]:
-        if question["id"] == question_id:
-            return question
+def _question_by_id(module: CombatModule, question_id: str) -> CombatQuestion:
+    question = module.question(question_id)
+    if question is not None:
+        return question
     raise CommandError(
         status_code=404,
         code="question_not_found",
@@ -89,11 +90,12 @@ def _question_by_id(module: CombatModule, question_id: str) -> dict[str, Any]:
     )
 
 
-def _build_deck(module: CombatModule, previous_question_id: str | None) -> list[str]:
-    question_ids = [q["id"] for q in module["questions"]]
-    if not question_ids:
+def _build_deck(
+    module: CombatModule, previous_question_id: str | None, rng: random.Random
+) -> list[str]:
+    if not module.question_ids:
         return []
-    deck = _shuffle(question_ids)
+    deck = _shuffle(list(module.question_ids), rng)
     if len(deck) > 1 and previous_question_id and deck[0] == previous_question_id:
         swap_idx = next((idx for idx, value in enumerate(deck) if value != previous_question_id), -1)
         if swap_idx > 0:
@@ -101,12 +103,14 @@ def _build_deck(module: CombatModule, previous_question_id: str | None) -> list[
     return deck
 
 
-def _compute_player_damage(question_damage: int, boss_max_hp: int, bounds: tuple[int, int]) -> int:
+def _compute_player_damage(
+    question_damage: int, boss_max_hp: int, bounds: tuple[int, int], rng: random.Random
+) -> int:
     min_damage, max_damage = bounds
     spread = max(1, max_damage - min_damage)
     normalized = _clamp((question_damage - min_damage) / spread, 0.0, 1.0)
     base_percent = PLAYER_BASE_PERCENT_MIN + normalized * PLAYER_BASE_PERCENT_SPAN
-    roll = random.uniform(PLAYER_ROLL_MIN, PLAYER_ROLL_MAX)
+    roll = rng.uniform(PLAYER_ROLL_MIN, PLAYER_ROLL_MAX)
     effective_percent = _clamp(
         base_percent * roll,
         PLAYER_EFFECTIVE_PERCENT_MIN,
@@ -115,9 +119,35 @@ def _compute_player_damage(question_damage: int, boss_max_hp: int, bounds: tuple
     return max(1, round(boss_max_hp * effective_percent))
 
 
-def _roll_boss_damage(rank: str) -> int:
+def _roll_boss_damage(rank: str, rng: random.Random) -> int:
     min_damage, max_damage = BOSS_DAMAGE_BY_RANK.get(rank.strip().upper(), BOSS_DAMAGE_BY_RANK["D"])
-    return _random_int_inclusive(min_damage, max_damage)
+    return rng.randint(min_damage, max_damage)
+
+
+def _roll_answer(
+    module: CombatModule,
+    question: CombatQuestion,
+    option_index: int,
+    *,
+    enemy_hp: int,
+    enemy_max_hp: int,
+    enemy_rank: str,
+    rng: random.Random,
+) -> tuple[bool, int, int]:
+    """(correct, player damage, boss damage) of an answer; the boss only hits back if alive."""
+    is_correct = int(option_index) == question.correct_answer
+    player_damage = 0
+    if is_correct:
+        player_damage = _compute_player_damage(
+            question_damage=question.damage,
+            boss_max_hp=enemy_max_hp,
+            bounds=module.damage_bounds,
+            rng=rng,
+        )
+    enemy_damage = 0
+    if enemy_hp - player_damage > 0:
+        enemy_damage = _roll_boss_damage(enemy_rank, rng)
+    return is_correct, player_damage, enemy_damage
 
 
 def _active_battle(session: Session, *, user_id: str, module_id: str) -> CombatBattle | None:
@@ -147,90 +177,20 @@ def _progress_payload(session: Session, user: User) -> dict[str, Any]:
     return progress_to_dict(stats)
 
 
-def start_battle(
-    session: Session,
-    *,
-    user: User,
-    module_id: str | None,
-    reset: bool = False,
-    idempotency_key: str,
-) -> dict[str, Any]:
-    command_type = "combat.start"
-    replay = idempotency_replay(
-        session,
-        user_id=user.id,
-        command_type=command_type,
-        idempotency_key=idempotency_key,
-    )
-    if replay:
-        return replay
-
-    module = get_combat_module(module_id)
-    battle = None if reset else _active_battle(session, user_id=user.id, module_id=module["id"])
-    if battle is None:
-        battle = CombatBattle(
-            user_id=user.id,
-            module_id=module["id"],
-            status="ongoing",
-            turn_state="PLAYER_IDLE",
-            player_hp=PLAYER_MAX_HP,
-            player_max_hp=PLAYER_MAX_HP,
-            enemy_hp=WORLD_BOSS_HP,
-            enemy_max_hp=WORLD_BOSS_HP,
-            enemy_rank=str(module["boss"]["rank"]).upper(),
-            current_question_id=None,
-            last_question_id=None,
-            deck_json=_build_deck(module, None),
-            created_at=datetime.now(timezone.utc),
-            updated_at=datetime.now(timezone.utc),
-        )
-        session.add(battle)
-        session.flush()
-
-    result_payload = {
-        "moduleId": module["id"],
-        "boss": {
-            "name": module["boss"]["name"],
-            "rank": module["boss"]["rank"],
-            "hp": WORLD_BOSS_HP,
-        },
-        "battleState": _battle_state_payload(battle),
-        "question": None,
-        "progress": _progress_payload(session, user),
-    }
-    return save_idempotency_result(
-        session,
-        user_id=user.id,
-        command_type=command_type,
-        idempotency_key=idempotency_key,
-        response_json=result_payload,
-        status_code=200,
-    )
+def _load_owned_battle(session: Session, *, user: User, battle_id: str) -> CombatBattle:
+    battle = load_battle(session, user_id=user.id, battle_id=battle_id)
+    if not battle:
+        raise CommandError(status_code=404, code="battle_not_found", message="Battle not found")
+    return battle
 
 
-def draw_question(
-    session: Session,
-    *,
-    user: User,
-    battle_id: str,
-    idempotency_key: str,
-) -> dict[str, Any]:
-    command_type = "combat.question"
-    replay = idempotency_replay(
-        session,
-        user_id=user.id,
-        command_type=command_type,
-        idempotency_key=idempotency_key,
-    )
-    if replay:
-        return replay
+def _save_battle(session: Session, battle: CombatBattle) -> None:
+    if battle.status != "ongoing":
+        flush_turn_log(session, battle)
+    save_battle(session, battle)
 
-    battle = session.exec(
-        select(CombatBattle).where(CombatBattle.id == battle_id, CombatBattle.user_id == user.id)
-    ).first()
-    if not battle:
-        raise CommandError(status_code=404, code="battle_not_found", message="Battle not found")
 
+def _draw_next_question(battle: CombatBattle) -> CombatQuestion:
     if battle.status != "ongoing":
         raise CommandError(
             status_code=409,
@@ -247,7 +207,7 @@ def draw_question(
         )
 
     module = get_combat_module(battle.module_id)
-    if not module["questions"]:
+    if not module.questions:
         raise CommandError(
             status_code=409,
             code="module_without_questions",
@@ -256,7 +216,7 @@ def draw_question(
 
     deck = list(battle.deck_json or [])
     if not deck:
-        deck = _build_deck(module, battle.last_question_id)
+        deck = _build_deck(module, battle.last_question_id, battle_rng(battle))
 
     question_id = deck.pop(0)
     question = _question_by_id(module, question_id)
@@ -264,51 +224,18 @@ def draw_question(
     battle.last_question_id = question_id
     battle.deck_json = deck
     battle.turn_state = "PLAYER_QUIZ"
-    battle.updated_at = datetime.now(timezone.utc)
-    session.add(battle)
-
-    result_payload = {
-        "battleState": _battle_state_payload(battle),
-        "question": {
-            "id": question["id"],
-            "text": question["text"],
-            "options": list(question["options"]),
-        },
-    }
-    return save_idempotency_result(
-        session,
-        user_id=user.id,
-        command_type=command_type,
-        idempotency_key=idempotency_key,
-        response_json=result_payload,
-        status_code=200,
-    )
+    record_event(battle, "draw", ref=question_id)
+    return question
 
 
-def answer_question(
+def _resolve_answer(
     session: Session,
     *,
     user: User,
-    battle_id: str,
+    battle: CombatBattle,
     question_id: str,
     option_index: int,
-    idempotency_key: str,
 ) -> dict[str, Any]:
-    command_type = "combat.answer"
-    replay = idempotency_replay(
-        session,
-        user_id=user.id,
-        command_type=command_type,
-        idempotency_key=idempotency_key,
-    )
-    if replay:
-        return replay
-
-    battle = session.exec(
-        select(CombatBattle).where(CombatBattle.id == battle_id, CombatBattle.user_id == user.id)
-    ).first()
-    if not battle:
-        raise CommandError(status_code=404, code="battle_not_found", message="Battle not found")
     if battle.status != "ongoing":
         raise CommandError(
             status_code=409,
@@ -333,18 +260,17 @@ def answer_question(
 
     module = get_combat_module(battle.module_id)
     question = _question_by_id(module, question_id)
-    is_correct = int(option_index) == int(question["correctAnswer"])
-
-    player_damage = 0
-    if is_correct:
-        player_damage = _compute_player_damage(
-            question_damage=int(question["damage"]),
-            boss_max_hp=int(battle.enemy_max_hp),
-            bounds=_question_bounds(module),
-        )
+    is_correct, player_damage, enemy_damage = _roll_answer(
+        module,
+        question,
+        option_index,
+        enemy_hp=int(battle.enemy_hp),
+        enemy_max_hp=int(battle.enemy_max_hp),
+        enemy_rank=str(battle.enemy_rank),
+        rng=battle_rng(battle),
+    )
 
     battle.enemy_hp = max(0, int(battle.enemy_hp) - int(player_damage))
-    enemy_damage = 0
     result = "correct" if is_correct else "incorrect"
 
     if int(battle.enemy_hp) <= 0:
@@ -352,8 +278,8 @@ def answer_question(
         battle.turn_state = "VICTORY"
         battle.current_question_id = None
         damage_dealt = WORLD_BOSS_HP - int(battle.enemy_hp)
-        reward_xp = max(0, damage_dealt // 5)
-        reward_gold = max(0, damage_dealt // 20)
+        reward_xp = max(0, damage_dealt // REWARD_XP_DAMAGE_DIVISOR)
+        reward_gold = max(0, damage_dealt // REWARD_GOLD_DAMAGE_DIVISOR)
         apply_xp_gold(
             session,
             user,
@@ -367,7 +293,6 @@ def answer_question(
             payload_json={"battleId": battle.id, "moduleId": battle.module_id, "bossRank": str(battle.enemy_rank)},
         )
     else:
-        enemy_damage = _roll_boss_damage(str(battle.enemy_rank))
         battle.player_hp = max(0, int(battle.player_hp) - enemy_damage)
         battle.current_question_id = None
         
@@ -378,8 +303,8 @@ def answer_question(
             battle.status = "defeat"
             battle.turn_state = "DEFEAT"
             damage_dealt = WORLD_BOSS_HP - int(battle.enemy_hp)
-            reward_xp = max(0, (damage_dealt // 5) // 2)
-            reward_gold = max(0, (damage_dealt // 20) // 2)
+            reward_xp = max(0, damage_dealt // REWARD_XP_DAMAGE_DIVISOR // DEFEAT_REWARD_DIVISOR)
+            reward_gold = max(0, damage_dealt // REWARD_GOLD_DAMAGE_DIVISOR // DEFEAT_REWARD_DIVISOR)
             apply_xp_gold(
                 session,
                 user,
@@ -395,14 +320,196 @@ def answer_question(
         else:
             battle.turn_state = "PLAYER_IDLE"
 
-    battle.updated_at = datetime.now(timezone.utc)
-    session.add(battle)
-
-    result_payload = {
+    record_event(
+        battle,
+        "answer",
+        ref=question_id,
+        option_index=int(option_index),
+        player_damage=player_damage,
+        enemy_damage=enemy_damage,
+    )
+    return {
         "result": result,
         "playerDamage": int(player_damage),
         "enemyDamage": int(enemy_damage),
+    }
+
+
+def start_battle(
+    session: Session,
+    *,
+    user: User,
+    module_id: str | None,
+    reset: bool = False,
+    idempotency_key: str,
+) -> dict[str, Any]:
+    command_type = "combat.start"
+    replay = idempotency_replay(
+        session,
+        user_id=user.id,
+        command_type=command_type,
+        idempotency_key=idempotency_key,
+    )
+    if replay:
+        return replay
+
+    module = get_combat_module(module_id)
+    battle = None if reset else _active_battle(session, user_id=user.id, module_id=module.id)
+    if battle is not None:
+        refresh_from_cache(session, battle)
+    if battle is None:
+        battle = CombatBattle(
+            user_id=user.id,
+            module_id=module.id,
+            status="ongoing",
+            turn_state="PLAYER_IDLE",
+            player_hp=PLAYER_MAX_HP,
+            player_max_hp=PLAYER_MAX_HP,
+            enemy_hp=WORLD_BOSS_HP,
+            enemy_max_hp=WORLD_BOSS_HP,
+            enemy_rank=str(module.boss.rank).upper(),
+            current_question_id=None,
+            last_question_id=None,
+            rng_seed=new_seed(),
+            content_hash=module.content_hash,
+            created_at=datetime.now(timezone.utc),
+            updated_at=datetime.now(timezone.utc),
+        )
+        battle.deck_json = _build_deck(module, None, battle_rng(battle))
+        record_event(battle, "start", ref=module.id)
+        session.add(battle)
+        session.flush()
+
+    result_payload = {
+        "moduleId": module.id,
+        "boss": {
+            "name": module.boss.name,
+            "rank": module.boss.rank,
+            "hp": WORLD_BOSS_HP,
+        },
         "battleState": _battle_state_payload(battle),
+        "question": None,
+        "progress": _progress_payload(session, user),
+    }
+    return save_idempotency_result(
+        session,
+        user_id=user.id,
+        command_type=command_type,
+        idempotency_key=idempotency_key,
+        response_json=result_payload,
+        status_code=200,
+    )
+
+
+def draw_question(
+    session: Session,
+    *,
+    user: User,
+    battle_id: str,
+    idempotency_key: str,
+) -> dict[str, Any]:
+    command_type = "combat.question"
+    replay = idempotency_replay(
+        session,
+        user_id=user.id,
+        command_type=command_type,
+        idempotency_key=idempotency_key,
+    )
+    if replay:
+        return replay
+
+    battle = _load_owned_battle(session, user=user, battle_id=battle_id)
+    question = _draw_next_question(battle)
+    _save_battle(session, battle)
+
+    result_payload = {
+        "battleState": _battle_state_payload(battle),
+        "question": question.payload,
+    }
+    return save_idempotency_result(
+        session,
+        user_id=user.id,
+        command_type=command_type,
+        idempotency_key=idempotency_key,
+        response_json=result_payload,
+        status_code=200,
+    )
+
+
+def answer_question(
+    session: Session,
+    *,
+    user: User,
+    battle_id: str,
+    question_id: str,
+    option_index: int,
+    idempotency_key: str,
+) -> dict[str, Any]:
+    command_type = "combat.answer"
+    replay = idempotency_replay(
+        session,
+        user_id=user.id,
+        command_type=command_type,
+        idempotency_key=idempotency_key,
+    )
+    if replay:
+        return replay
+
+    battle = _load_owned_battle(session, user=user, battle_id=battle_id)
+    outcome = _resolve_answer(
+        session, user=user, battle=battle, question_id=question_id, option_index=option_index
+    )
+    _save_battle(session, battle)
+
+    result_payload = {
+        **outcome,
+        "battleState": _battle_state_payload(battle),
+        "progress": _progress_payload(session, user),
+    }
+    return save_idempotency_result(
+        session,
+        user_id=user.id,
+        command_type=command_type,
+        idempotency_key=idempotency_key,
+        response_json=result_payload,
+        status_code=200,
+    )
+
+
+def answer_and_draw(
+    session: Session,
+    *,
+    user: User,
+    battle_id: str,
+    question_id: str,
+    option_index: int,
+    idempotency_key: str,
+) -> dict[str, Any]:
+    """Answer the active question and, if the battle goes on, draw the next one.
+
+    Same rules as answer_question followed by draw_question, in one command.
+    """
+    command_type = "combat.turn"
+    replay = idempotency_replay(
+        session,
+        user_id=user.id,
+        command_type=command_type,
+        idempotency_key=idempotency_key,
+    )
+    if replay:
+        return replay
+
+    battle = _load_owned_battle(session, user=user, battle_id=battle_id)
+    outcome = _resolve_answer(
+        session, user=user, battle=battle, question_id=question_id, option_index=option_index
+    )
+    next_question = _draw_next_question(battle) if battle.turn_state == "PLAYER_IDLE" else None
+    _save_battle(session, battle)
+
+    result_payload = {
+        **outcome,
+        "battleState": _battle_state_payload(battle),
+        "nextQuestion": next_question.payload if next_question is not None else None,
         "progress": _progress_payload(session, user),
     }
     return save_idempotency_result(
@@ -432,11 +539,7 @@ def flee_battle(
     if replay:
         return replay
 
-    battle = session.exec(
-        select(CombatBattle).where(CombatBattle.id == battle_id, CombatBattle.user_id == user.id)
-    ).first()
-    if not battle:
-        raise CommandError(status_code=404, code="battle_not_found", message="Battle not found")
+    battle = _load_owned_battle(session, user=user, battle_id=battle_id)
     if battle.status != "ongoing":
         raise CommandError(
             status_code=409,
@@ -446,13 +549,14 @@ def flee_battle(
         )
 
     damage_dealt = WORLD_BOSS_HP - int(battle.enemy_hp)
-    reward_xp = max(0, damage_dealt // 5)
-    reward_gold = max(0, damage_dealt // 20)
+    reward_xp = max(0, damage_dealt // REWARD_XP_DAMAGE_DIVISOR)
+    reward_gold = max(0, damage_dealt // REWARD_GOLD_DAMAGE_DIVISOR)
 
     battle.status = "victory"
     battle.turn_state = "VICTORY"
     battle.current_question_id = None
-    
+    record_event(battle, "flee")
+
     apply_xp_gold(
         session,
         user,
@@ -466,8 +570,7 @@ def flee_battle(
         payload_json={"battleId": battle.id, "moduleId": battle.module_id, "bossRank": str(battle.enemy_rank), "extracted": True},
     )
 
-    battle.updated_at = datetime.now(timezone.utc)
-    session.add(battle)
+    _save_battle(session, battle)
 
     result_payload = {
         "xpReward": reward_xp,
@@ -504,11 +607,7 @@ def consume_item_in_battle(
     if replay:
         return replay
 
-    battle = session.exec(
-        select(CombatBattle).where(CombatBattle.id == battle_id, CombatBattle.user_id == user.id)
-    ).first()
-    if not battle:
-        raise CommandError(status_code=404, code="battle_not_found", message="Battle not found")
+    battle = _load_owned_battle(session, user=user, battle_id=battle_id)
     if battle.status != "ongoing":
         raise CommandError(
             status_code=409,
@@ -524,7 +623,7 @@ def consume_item_in_battle(
         )
 
     # Consume directly from core inventory module
-    inv_result = use_inventory_item(session, user, item_id=item_id, qty=1)
+    inv_result = use_inventory_item(session, user, item_id=item_id, qty=1, autocommit=False)
     
     # Calculate In-Game specific healing bonuses (Coffee gives +40 HP in combat)
     heal_amount = 0
@@ -532,8 +631,8 @@ def consume_item_in_battle(
         heal_amount = 40
     
     battle.player_hp = min(int(battle.player_max_hp), int(battle.player_hp) + heal_amount)
-    battle.updated_at = datetime.now(timezone.utc)
-    session.add(battle)
+    record_event(battle, "item", ref=item_id)
+    _save_battle(session, battle)
 
     result_payload = {
         "healAmount": heal_amount,
@@ -549,3 +648,115 @@ def consume_item_in_battle(
         response_json=result_payload,
         status_code=200,
     )
+
+
+def replay_events(
+    module: CombatModule,
+    *,
+    seed: int,
+    enemy_rank: str,
+    events: list[list[Any]],
+) -> dict[str, Any]:
+    """Re-run logged events from the seed and check every recorded outcome.
+
+    Draws, damage rolls and HP are recomputed; item heals depend on inventory and
+    are taken from the log. ``divergedAt`` is the seq of the first mismatch.
+    """
+    if not events or events[0][0] != 0 or events[0][1] != "start":
+        return {"replayable": False, "events": len(events), "consistent": False, "divergedAt": None}
+
+    player_hp, enemy_hp = int(events[0][6]), int(events[0][7])
+    enemy_max_hp = enemy_hp
+    deck: list[str] = []
+    last_question_id: str | None = None
+    current_question_id: str | None = None
+    diverged_at: int | None = None
+
+    for raw in events:
+        event = dict(zip(LOG_COLUMNS, raw, strict=True))
+        seq, kind = int(event["seq"]), event["kind"]
+        rng = event_rng(seed, seq)
+        expected_ref = event["ref"]
+        player_damage = enemy_damage = 0
+        if kind == "start":
+            deck = _build_deck(module, None, rng)
+        elif kind == "draw":
+            if not deck:
+                deck = _build_deck(module, last_question_id, rng)
+            current_question_id = last_question_id = deck.pop(0) if deck else None
+            expected_ref = current_question_id
+        elif kind == "answer":
+            question = module.question(str(current_question_id))
+            if question is None or current_question_id != event["ref"]:
+                diverged_at = seq
+                break
+            _, player_damage, enemy_damage = _roll_answer(
+                module,
+                question,
+                int(event["option_index"]),
+                enemy_hp=enemy_hp,
+                enemy_max_hp=enemy_max_hp,
+                enemy_rank=enemy_rank,
+                rng=rng,
+            )
+            enemy_hp = max(0, enemy_hp - player_damage)
+            player_hp = max(0, player_hp - enemy_damage)
+            current_question_id = None
+        elif kind == "item":
+            player_hp = int(event["player_hp"])
+
+        if (
+            expected_ref != event["ref"]
+            or player_damage != event["player_damage"]
+            or enemy_damage != event["enemy_damage"]
+            or player_hp != event["player_hp"]
+            or enemy_hp != event["enemy_hp"]
+        ):
+            diverged_at = seq
+            break
+
+    return {
+        "replayable": True,
+        "events": len(events),
+        "consistent": diverged_at is None,
+        "divergedAt": diverged_at,
+        "playerHp": player_hp,
+        "enemyHp": enemy_hp,
+    }
+
+
+def replay_battle(session: Session, *, battle_id: str) -> dict[str, Any]:
+    """Replay a battle from ``combat_turns`` (or its inline log while ongoing).
+
+    Not replayable (with a ``reason``) without a seed, or when the module content
+    changed since the battle started.
+    """
+    battle = session.get(CombatBattle, battle_id)
+    if battle is None:
+        raise CommandError(status_code=404, code="battle_not_found", message="Battle not found")
+    turns = session.exec(
+        select(CombatTurn).where(CombatTurn.battle_id == battle_id).order_by(CombatTurn.seq)
+    ).all()
+    events = [[getattr(turn, column) for column in LOG_COLUMNS] for turn in turns]
+    events.extend(battle.turn_log_json or [])
+    module = get_combat_module(battle.module_id)
+    not_replayable = {
+        "battleId": battle.id,
+        "status": battle.status,
+        "replayable": False,
+        "events": len(events),
+        "consistent": False,
+        "divergedAt": None,
+    }
+    if battle.rng_seed is None:
+        return {**not_replayable, "reason": "no_seed"}
+    # Battles from before content hashing carry none; those replay on a best-effort basis.
+    if battle.content_hash is not None and battle.content_hash != module.content_hash:
+        return {**not_replayable, "reason": "content_changed"}
+    report = replay_events(
+        module,
+        seed=int(battle.rng_seed),
+        enemy_rank=str(battle.enemy_rank),
+        events=events,
+    )
+    return {"battleId": battle.id, "status": battle.status, **report}
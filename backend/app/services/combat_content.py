@@ -1,226 +1,130 @@
+"""Combat modules, compiled once at import from versioned JSON content packs.
+
+Each ``*.json`` file in the content directory (``app/content/combat`` unless
+COMBAT_CONTENT_DIR is set) holds ``{"version": 1, "modules": [...]}``; files are
+loaded in name order, so new modules ship as data files. Modules are compiled
+into frozen objects carrying a question-id index, the damage bounds used by the
+damage formula and the public (answer-free) payload of every question, so a
+combat turn does no scanning or re-serialization. ``content_hash`` fingerprints
+the module's source; battles record it so a replay can tell when the questions
+or damage values changed underneath it.
+"""
+
 from __future__ import annotations
 
-from typing import TypedDict
+import hashlib
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from app.core.config import settings
+
+CONTENT_VERSION = 1
+_BUNDLED_CONTENT_DIR = Path(__file__).resolve().parent.parent / "content" / "combat"
 
 
-class CombatQuestion(TypedDict):
+@dataclass(frozen=True, slots=True)
+class CombatQuestion:
     id: str
     text: str
-    options: list[str]
-    correctAnswer: int
+    options: tuple[str, ...]
+    correct_answer: int
     damage: int
+    # Shape returned to clients; never contains the answer. Treat as read-only.
+    payload: dict[str, Any] = field(compare=False, repr=False)
 
 
-class CombatBoss(TypedDict):
+@dataclass(frozen=True, slots=True)
+class CombatBoss:
     name: str
     hp: int
     rank: str
 
 
-class CombatModule(TypedDict):
+@dataclass(frozen=True, slots=True)
+class CombatModule:
     id: str
     title: str
     boss: CombatBoss
-    questions: list[CombatQuestion]
-
-
-COMBAT_MODULES: list[CombatModule] = [
-    {
-        "id": "basic",
-        "title": "Excel Essencial",
-        "boss": {"name": "O Planilhador Caotico", "hp": 100, "rank": "F"},
-        "questions": [
-            {
-                "id": "q1",
-                "text": "Qual atalho seleciona toda a coluna atual?",
-                "options": ["Ctrl + Espaco", "Shift + Espaco", "Ctrl + A", "Alt + F4"],
-                "correctAnswer": 0,
-                "damage": 15,
-            },
-            {
-                "id": "q2",
-                "text": "Qual simbolo inicia uma formula no Excel?",
-                "options": [">", "#", "=", "@"],
-                "correctAnswer": 2,
-                "damage": 15,
-            },
-            {
-                "id": "q3",
-                "text": "Como fixar uma celula em uma formula (referencia absoluta)?",
-                "options": ["Usando %", "Usando $", "Usando &", "Usando *"],
-                "correctAnswer": 1,
-                "damage": 20,
-            },
-        ],
-    },
-    {
-        "id": "intermediate",
-        "title": "Dominando Logica",
-        "boss": {"name": "Erro #N/D", "hp": 250, "rank": "D"},
-        "questions": [
-            {
-                "id": "q_int_1",
-                "text": "O que a funcao E(A1>10; A2<5) retorna se A1=12 e A2=4?",
-                "options": ["FALSO", "VERDADEIRO", "#N/D", "ERRO"],
-                "correctAnswer": 1,
-                "damage": 30,
-            },
-            {
-                "id": "q_int_2",
-                "text": "Qual o quarto argumento do PROCV (Procurar Intervalo)?",
-                "options": [
-                    "Numero da coluna",
-                    "Valor procurado",
-                    "Correspondencia (0 ou 1)",
-                    "Matriz tabela",
-                ],
-                "correctAnswer": 2,
-                "damage": 35,
-            },
-            {
-                "id": "q_int_3",
-                "text": "A funcao CONT.SE serve para:",
-                "options": [
-                    "Somar valores",
-                    "Contar celulas nao vazias",
-                    "Contar celulas que atendem a um criterio",
-                    "Contar caracteres",
-                ],
-                "correctAnswer": 2,
-                "damage": 25,
-            },
-        ],
-    },
-    {
-        "id": "advanced",
-        "title": "Mestrado em Dados",
-        "boss": {"name": "Leviata de Dados", "hp": 600, "rank": "B"},
-        "questions": [
-            {
-                "id": "q_adv_1",
-                "text": "O que e uma Segmentacao de Dados (Slicer)?",
-                "options": ["Uma formula de corte", "Um filtro visual interativo", "Uma macro", "Um grafico de pizza"],
-                "correctAnswer": 1,
-                "damage": 50,
-            },
-            {
-                "id": "q_adv_2",
-                "text": "Em Tabelas Dinamicas, onde colocamos campos numericos para somar?",
-                "options": ["Filtros", "Colunas", "Linhas", "Valores"],
-                "correctAnswer": 3,
-                "damage": 45,
-            },
-            {
-                "id": "q_adv_3",
-                "text": "Qual atalho atualiza todas as Tabelas Dinamicas?",
-                "options": ["F5", "Ctrl + Alt + F5", "Alt + F5", "Shift + F9"],
-                "correctAnswer": 1,
-                "damage": 60,
-            },
-        ],
-    },
-    {
-        "id": "dashboards",
-        "title": "Dashboards Impressionadores",
-        "boss": {"name": "O Ilusionista Visual", "hp": 800, "rank": "A"},
-        "questions": [
-            {
-                "id": "q_dash_1",
-                "text": "Qual grafico e ideal para mostrar tendencias ao longo do tempo?",
-                "options": ["Pizza", "Linha", "Radar", "Dispersao"],
-                "correctAnswer": 1,
-                "damage": 70,
-            },
-            {
-                "id": "q_dash_2",
-                "text": "Para criar um Grafico de Velocimetro, combinamos quais graficos?",
-                "options": ["Barra + Linha", "Rosca + Pizza", "Area + Coluna", "Bolhas + Radar"],
-                "correctAnswer": 1,
-                "damage": 80,
-            },
-            {
-                "id": "q_dash_3",
-                "text": "Qual regra de design ajuda a destacar o mais importante?",
-                "options": ["Usar todas as cores", "Espaco em branco (Respiro)", "Graficos 3D", "Muitas bordas"],
-                "correctAnswer": 1,
-                "damage": 60,
-            },
-        ],
-    },
-    {
-        "id": "vba",
-        "title": "O Codigo Proibido (VBA)",
-        "boss": {"name": "Loop Infinito", "hp": 1500, "rank": "S"},
-        "questions": [
-            {
-                "id": "q_vba_1",
-                "text": "Qual objeto representa uma celula no VBA?",
-                "options": ["Cell", "Box", "Range", "Sheet"],
-                "correctAnswer": 2,
-                "damage": 100,
-            },
-            {
-                "id": "q_vba_2",
-                "text": "Para declarar uma variavel de texto, usamos:",
-                "options": ["Dim x As String", "Dim x As Text", "Dim x As Char", "Var x = Text"],
-                "correctAnswer": 0,
-                "damage": 90,
-            },
-            {
-                "id": "q_vba_3",
-                "text": "Qual comando sai de um loop For?",
-                "options": ["Stop", "Exit For", "Break", "End"],
-                "correctAnswer": 1,
-                "damage": 110,
-            },
-        ],
-    },
-    {
-        "id": "powerquery",
-        "title": "Power Query & BI",
-        "boss": {"name": "A Hidra M", "hp": 1200, "rank": "S"},
-        "questions": [
-            {
-                "id": "q_pq_1",
-                "text": "Qual a linguagem utilizada pelo Power Query?",
-                "options": ["DAX", "SQL", "M", "VBA"],
-                "correctAnswer": 2,
-                "damage": 120,
-            },
-            {
-                "id": "q_pq_2",
-                "text": "O que a operacao 'Unpivot' faz?",
-                "options": [
-                    "Remove pivos",
-                    "Transforma colunas em linhas",
-                    "Transforma linhas em colunas",
-                    "Exclui duplicatas",
-                ],
-                "correctAnswer": 1,
-                "damage": 130,
-            },
-            {
-                "id": "q_pq_3",
-                "text": "Power Query e uma ferramenta de:",
-                "options": [
-                    "Design",
-                    "ETL (Extracao, Transformacao, Carregamento)",
-                    "Edicao de Video",
-                    "Criacao de Jogos",
-                ],
-                "correctAnswer": 1,
-                "damage": 100,
-            },
-        ],
-    },
-]
-
-
-MODULE_BY_ID: dict[str, CombatModule] = {m["id"]: m for m in COMBAT_MODULES}
+    questions: tuple[CombatQuestion, ...]
+    question_ids: tuple[str, ...]
+    questions_by_id: dict[str, CombatQuestion] = field(compare=False, repr=False)
+    damage_bounds: tuple[int, int] = (1, 1)
+    content_hash: str = ""
+
+    def question(self, question_id: str) -> CombatQuestion | None:
+        return self.questions_by_id.get(question_id)
+
+
+def _compile_question(raw: dict[str, Any], *, module_id: str) -> CombatQuestion:
+    question_id = str(raw["id"])
+    options = tuple(str(option) for option in raw["options"])
+    correct = int(raw["correctAnswer"])
+    if not 0 <= correct < len(options):
+        raise ValueError(f"combat question {module_id}/{question_id}: correctAnswer out of range")
+    text = str(raw["text"])
+    return CombatQuestion(
+        id=question_id,
+        text=text,
+        options=options,
+        correct_answer=correct,
+        damage=int(raw["damage"]),
+        payload={"id": question_id, "text": text, "options": list(options)},
+    )
+
+
+def content_hash(raw: dict[str, Any]) -> str:
+    canonical = json.dumps(raw, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def compile_module(raw: dict[str, Any]) -> CombatModule:
+    module_id = str(raw["id"])
+    boss = raw["boss"]
+    questions = tuple(_compile_question(q, module_id=module_id) for q in raw.get("questions", []))
+    by_id = {q.id: q for q in questions}
+    if len(by_id) != len(questions):
+        raise ValueError(f"combat module {module_id}: duplicate question ids")
+    damages = [q.damage for q in questions]
+    return CombatModule(
+        id=module_id,
+        title=str(raw["title"]),
+        boss=CombatBoss(name=str(boss["name"]), hp=int(boss["hp"]), rank=str(boss["rank"])),
+        questions=questions,
+        question_ids=tuple(by_id),
+        questions_by_id=by_id,
+        damage_bounds=(min(damages), max(damages)) if damages else (1, 1),
+        content_hash=content_hash(raw),
+    )
+
+
+def load_combat_modules(content_dir: str | Path) -> list[CombatModule]:
+    modules: list[CombatModule] = []
+    seen: set[str] = set()
+    for file in sorted(Path(content_dir).glob("*.json")):
+        pack = json.loads(file.read_text(encoding="utf-8"))
+        version = int(pack.get("version", 0))
+        if version != CONTENT_VERSION:
+            raise ValueError(f"{file.name}: unsupported combat content version {version}")
+        for raw in pack.get("modules", []):
+            module = compile_module(raw)
+            if module.id in seen:
+                raise ValueError(f"{file.name}: duplicate combat module id {module.id!r}")
+            seen.add(module.id)
+            modules.append(module)
+    if not modules:
+        raise ValueError(f"no combat modules found in {content_dir}")
+    return modules
+
+
+COMBAT_MODULES: list[CombatModule] = load_combat_modules(
+    settings.combat_content_dir.strip() or _BUNDLED_CONTENT_DIR
+)
+MODULE_BY_ID: dict[str, CombatModule] = {m.id: m for m in COMBAT_MODULES}
 
 
 def get_combat_module(module_id: str | None) -> CombatModule:
     if module_id and module_id in MODULE_BY_ID:
         return MODULE_BY_ID[module_id]
     return COMBAT_MODULES[0]
-
@@ -0,0 +1,90 @@
+"""Append-only combat turn log with seeded, replayable randomness.
+
+A battle gets a random ``rng_seed`` when it starts. Every logged event (start,
+draw, answer, item, flee) takes the next ``turn_seq``, and whatever randomness
+it needs (deck shuffles, damage rolls) comes from ``battle_rng``: a
+``random.Random`` seeded by (seed, seq). Given the seed, the module content and
+the logged player inputs, a battle can therefore be re-run exactly offline
+(``app.services.combat.replay_battle``).
+
+While the battle is ongoing its events are compact arrays in
+``combat_battles.turn_log_json``, so they travel with the battle state cache
+instead of costing a write per turn. When the battle ends they are inserted
+into ``combat_turns`` in one batch and the inline log is cleared.
+"""
+
+from __future__ import annotations
+
+import random
+import secrets
+from typing import Any
+
+from sqlalchemy import insert
+from sqlmodel import Session
+
+from app.models import CombatBattle, CombatTurn
+
+LOG_COLUMNS = (
+    "seq",
+    "kind",
+    "ref",
+    "option_index",
+    "player_damage",
+    "enemy_damage",
+    "player_hp",
+    "enemy_hp",
+)
+
+
+def new_seed() -> int:
+    return secrets.randbits(63)
+
+
+def event_rng(seed: int, seq: int) -> random.Random:
+    return random.Random(f"{seed}:{seq}")
+
+
+def battle_rng(battle: CombatBattle) -> random.Random:
+    """RNG for the battle's next event; battles from before the log get a seed here."""
+    if battle.rng_seed is None:
+        battle.rng_seed = new_seed()
+    return event_rng(int(battle.rng_seed), int(battle.turn_seq or 0))
+
+
+def record_event(
+    battle: CombatBattle,
+    kind: str,
+    *,
+    ref: str | None = None,
+    option_index: int | None = None,
+    player_damage: int = 0,
+    enemy_damage: int = 0,
+) -> None:
+    """Append an event with the battle's HP after it, and advance ``turn_seq``."""
+    seq = int(battle.turn_seq or 0)
+    entry = [
+        seq,
+        kind,
+        ref,
+        option_index,
+        int(player_damage),
+        int(enemy_damage),
+        int(battle.player_hp),
+        int(battle.enemy_hp),
+    ]
+    # Reassign rather than append so the JSON column is seen as changed.
+    battle.turn_log_json = [*(battle.turn_log_json or []), entry]
+    battle.turn_seq = seq + 1
+
+
+def event_rows(battle_id: str, entries: list[list[Any]]) -> list[dict[str, Any]]:
+    return [{"battle_id": battle_id, **dict(zip(LOG_COLUMNS, entry, strict=True))} for entry in entries]
+
+
+def flush_turn_log(session: Session, battle: CombatBattle) -> int:
+    """Move the inline log of a finished battle into ``combat_turns``."""
+    entries = list(battle.turn_log_json or [])
+    if entries:
+        session.execute(insert(CombatTurn), event_rows(battle.id, entries))
+    battle.turn_log_json = []
+    return len(entries)
@@ -0,0 +1,199 @@
+"""Per-battle state cache with write-behind to ``combat_battles``.
+
+With COMBAT_STATE_CACHE_ENABLED, combat commands read an ongoing battle from
+the cache and store turn results there instead of UPDATEing its row every turn.
+The row is written every COMBAT_STATE_FLUSH_EVERY turns and always when the
+battle ends (victory, defeat, flee), so everything that queries battles by
+status keeps seeing the truth; only HP/deck of ongoing battles may lag.
+
+The cache is Redis (``combat:battle:<id>``) and needs REDIS_URL: workers must
+share it, so without Redis the cache stays off (with a warning) and every turn
+is written to the row. Cache writes are staged on the session and applied after
+commit, so a rolled back command never leaks into the cache.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy import event as sa_event
+from sqlalchemy.orm import Session as OrmSession
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import flag_modified, set_committed_value
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.models import CombatBattle
+
+logger = logging.getLogger("app")
+
+_REDIS_PREFIX = "combat:battle:"
+_PENDING_KEY = "combat_state_pending"
+_UNFLUSHED_KEY = "combat_state_unflushed"
+_TERMINAL = {"victory", "defeat"}
+_FIELDS = (
+    "id",
+    "user_id",
+    "module_id",
+    "status",
+    "turn_state",
+    "player_hp",
+    "player_max_hp",
+    "enemy_hp",
+    "enemy_max_hp",
+    "enemy_rank",
+    "current_question_id",
+    "last_question_id",
+    "deck_json",
+    "rng_seed",
+    "content_hash",
+    "turn_seq",
+    "turn_log_json",
+)
+
+_redis: Any | None = None
+_redis_ready = False
+
+
+def cache_enabled() -> bool:
+    if not settings.combat_state_cache_enabled:
+        return False
+    return _redis_client() is not None
+
+
+def _redis_client() -> Any | None:
+    global _redis, _redis_ready
+    if not _redis_ready:
+        _redis_ready = True
+        if settings.redis_url:
+            try:
+                import redis
+
+                _redis = redis.Redis.from_url(settings.redis_url, decode_responses=True)
+            except Exception:
+                _redis = None
+        if _redis is None and settings.combat_state_cache_enabled:
+            logger.warning("combat_state_cache_disabled", extra={"reason": "redis_unavailable"})
+    return _redis
+
+
+def _get(battle_id: str) -> str | None:
+    client = _redis_client()
+    if client is None:
+        return None
+    try:
+        return client.get(_REDIS_PREFIX + battle_id)
+    except Exception:
+        return None
+
+
+def _set(battle_id: str, raw: str) -> None:
+    client = _redis_client()
+    if client is None:
+        return
+    try:
+        client.set(_REDIS_PREFIX + battle_id, raw, ex=int(settings.combat_state_ttl_sec))
+    except Exception:
+        pass
+
+
+def _delete(battle_id: str) -> None:
+    client = _redis_client()
+    if client is None:
+        return
+    try:
+        client.delete(_REDIS_PREFIX + battle_id)
+    except Exception:
+        pass
+
+
+def _snapshot(battle: CombatBattle, *, unflushed: int) -> str:
+    state = {name: getattr(battle, name) for name in _FIELDS}
+    state["unflushed"] = unflushed
+    return json.dumps(state, separators=(",", ":"))
+
+
+def _unflushed(session: Session) -> dict[str, int]:
+    return session.info.setdefault(_UNFLUSHED_KEY, {})
+
+
+def _cached_state(battle_id: str, *, user_id: str) -> dict[str, Any] | None:
+    raw = _get(battle_id)
+    if not raw:
+        return None
+    state = json.loads(raw)
+    if state.get("user_id") != user_id or state.get("status") != "ongoing":
+        return None
+    return state
+
+
+def load_battle(session: Session, *, user_id: str, battle_id: str) -> CombatBattle | None:
+    """The user's battle with its latest turn state; a cache hit costs no query."""
+    if cache_enabled():
+        state = _cached_state(battle_id, user_id=user_id)
+        if state is not None:
+            _unflushed(session)[battle_id] = int(state.pop("unflushed", 0))
+            battle = CombatBattle(**{name: state[name] for name in _FIELDS if name in state})
+            make_transient_to_detached(battle)
+            return session.merge(battle, load=False)
+    return session.exec(
+        select(CombatBattle).where(CombatBattle.id == battle_id, CombatBattle.user_id == user_id)
+    ).first()
+
+
+def refresh_from_cache(session: Session, battle: CombatBattle) -> CombatBattle:
+    """Apply cached turn state onto a battle row loaded by another query."""
+    if not cache_enabled():
+        return battle
+    state = _cached_state(battle.id, user_id=battle.user_id)
+    if state is not None:
+        _unflushed(session)[battle.id] = int(state.pop("unflushed", 0))
+        for name in _FIELDS:
+            if name in state:
+                set_committed_value(battle, name, state[name])
+    return battle
+
+
+def save_battle(session: Session, battle: CombatBattle) -> None:
+    """Persist a turn: to the cache, or to the row when a flush is due."""
+    battle.updated_at = datetime.now(timezone.utc)
+    if not cache_enabled():
+        session.add(battle)
+        return
+
+    counts = _unflushed(session)
+    unflushed = counts.get(battle.id, 0) + 1
+    terminal = battle.status in _TERMINAL
+    if terminal or unflushed >= max(1, int(settings.combat_state_flush_every)):
+        # State loaded from the cache counts as committed; force it into the UPDATE.
+        for name in _FIELDS[1:]:
+            flag_modified(battle, name)
+        session.add(battle)
+        counts[battle.id] = 0
+        staged = None if terminal else _snapshot(battle, unflushed=0)
+    else:
+        # Keep the turn out of the UPDATE: mark the new values as already persisted.
+        for name in (*_FIELDS[1:], "updated_at"):
+            set_committed_value(battle, name, getattr(battle, name))
+        counts[battle.id] = unflushed
+        staged = _snapshot(battle, unflushed=unflushed)
+    session.info.setdefault(_PENDING_KEY, []).append((battle.id, staged))
+
+
+@sa_event.listens_for(OrmSession, "after_commit")
+def _apply_pending_state(session: OrmSession) -> None:
+    session.info.pop(_UNFLUSHED_KEY, None)
+    for battle_id, raw in session.info.pop(_PENDING_KEY, None) or []:
+        if raw is None:
+            _delete(battle_id)
+        else:
+            _set(battle_id, raw)
+
+
+@sa_event.listens_for(OrmSession, "after_rollback")
+def _discard_pending_state(session: OrmSession) -> None:
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_UNFLUSHED_KEY, None)
@@ -2,15 +2,28 @@
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import inspect
 import json
 import re
+import threading
 import time
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterator, Callable
 from typing import Any, Literal
 
-from starlette.concurrency import run_in_threadpool
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
 
 from app.core.config import settings
-from app.core.metrics import record_ai_error, record_ai_request
+from app.core.metrics import record_ai_error, record_ai_hedge, record_ai_request
+from app.services.ai_response_cache import (
+    cache_enabled_for,
+    cache_key,
+    get_cached_response,
+    store_cached_response,
+)
+from app.services.ai_scheduler import SchedulerRejected, ai_scheduler
 
 _API_KEY_PLACEHOLDERS = {"", "SUA_CHAVE_AQUI", "YOUR_API_KEY_HERE"}
 _RETRY_AFTER_PATTERN = re.compile(
@@ -295,6 +308,93 @@ class GeminiError(Exception):
         self.details = details or {}
 
 
+def _scheduler_error(exc: SchedulerRejected) -> GeminiError:
+    return GeminiError(
+        429,
+        "ai_quota_exceeded",
+        "AI provider quota exceeded",
+        {
+            "scope": "provider_key",
+            "reason": exc.reason,
+            "keyKind": exc.key_kind,
+            "retryAfterSec": exc.retry_after_sec,
+        },
+    )
+
+
+# ---------------------------------------------------------------------------
+# Client pool
+# ---------------------------------------------------------------------------
+
+
+class GeminiClientPool:
+    """Reuse SDK clients (and their HTTP connection pools) per API key.
+
+    Keys are stored hashed. Least recently used clients are evicted past
+    ``max_size`` and clients idle for longer than ``idle_ttl_sec`` are rebuilt.
+    Dropped clients are never closed here: a coroutine that got one from ``get``
+    may still be awaiting a request on it, so it is left to the garbage collector.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_size: int,
+        idle_ttl_sec: float,
+        factory: Callable[[str], Any] | None = None,
+    ) -> None:
+        self._max_size = max(1, int(max_size))
+        self._idle_ttl_sec = max(0.0, float(idle_ttl_sec))
+        self._factory = factory
+        self._clients: OrderedDict[str, tuple[Any, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _slot(api_key: str) -> str:
+        return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+    def _build(self, api_key: str) -> Any:
+        if self._factory is not None:
+            return self._factory(api_key)
+        try:
+            from google import genai
+        except Exception as exc:
+            raise GeminiError(
+                503, "ai_sdk_unavailable", "AI SDK is not installed",
+            ) from exc
+        return genai.Client(api_key=api_key)
+
+    def get(self, api_key: str) -> Any:
+        slot = self._slot(api_key)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._clients.pop(slot, None)
+            if entry is not None and now - entry[1] <= self._idle_ttl_sec:
+                client = entry[0]
+            else:
+                client = None
+        if client is None:
+            client = self._build(api_key)
+        with self._lock:
+            self._clients[slot] = (client, now)
+            while len(self._clients) > self._max_size:
+                self._clients.popitem(last=False)
+        return client
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clients.clear()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+
+client_pool = GeminiClientPool(
+    max_size=settings.ai_client_pool_max,
+    idle_ttl_sec=settings.ai_client_pool_idle_sec,
+)
+
+
 def _create_client_tuple(
     *,
     model_name: str,
@@ -302,15 +402,8 @@ def _create_client_tuple(
     system_instruction: str | None = None,
     response_mime_type: str | None = None,
 ) -> tuple[Any, str, dict[str, Any] | None]:
-    """Create a (client, model, config) tuple. Raises GeminiError if SDK unavailable."""
-    try:
-        from google import genai
-    except Exception as exc:
-        raise GeminiError(
-            503, "ai_sdk_unavailable", "AI SDK is not installed",
-        ) from exc
-
-    client = genai.Client(api_key=api_key)
+    """Return a (pooled client, model, config) tuple. Raises GeminiError if SDK unavailable."""
+    client = client_pool.get(api_key)
     config: dict[str, Any] = {}
     if system_instruction:
         config["system_instruction"] = system_instruction
@@ -319,6 +412,106 @@ def _create_client_tuple(
     return (client, model_name, config or None)
 
 
+# ---------------------------------------------------------------------------
+# Latency tracking for hedged requests
+# ---------------------------------------------------------------------------
+
+_LATENCY_WINDOW = 200
+_model_latencies: dict[str, deque[float]] = {}
+_latency_lock = threading.Lock()
+
+
+def record_model_latency(model_name: str, duration_s: float) -> None:
+    with _latency_lock:
+        window = _model_latencies.get(model_name)
+        if window is None:
+            window = _model_latencies[model_name] = deque(maxlen=_LATENCY_WINDOW)
+        window.append(duration_s)
+
+
+def hedge_delay_sec(model_name: str) -> float:
+    """Deadline after which the next model is fired concurrently.
+
+    Uses the AI_HEDGE_PERCENTILE latency of ``model_name`` once enough samples
+    exist, else AI_HEDGE_DEFAULT_DELAY_MS; clamped to AI_HEDGE_MIN_DELAY_MS.
+    """
+    floor = max(0, int(settings.ai_hedge_min_delay_ms)) / 1000
+    with _latency_lock:
+        samples = sorted(_model_latencies.get(model_name, ()))
+    if len(samples) < max(1, int(settings.ai_hedge_min_samples)):
+        return max(floor, int(settings.ai_hedge_default_delay_ms) / 1000)
+    percentile = min(1.0, max(0.0, float(settings.ai_hedge_percentile)))
+    index = min(len(samples) - 1, int(round(percentile * (len(samples) - 1))))
+    return max(floor, samples[index])
+
+
+# ---------------------------------------------------------------------------
+# Model attempts
+# ---------------------------------------------------------------------------
+
+
+async def _call_model(client: Any, *, model: str, contents: str, config: Any) -> Any:
+    """Call the SDK's native async client, or the sync one in a worker thread."""
+    aio = getattr(client, "aio", None)
+    aio_models = getattr(aio, "models", None) if aio is not None else None
+    if aio_models is not None:
+        return await aio_models.generate_content(model=model, contents=contents, config=config)
+    return await run_in_threadpool(
+        client.models.generate_content,
+        model=model,
+        contents=contents,
+        config=config,
+    )
+
+
+async def _attempt_model(
+    model_name: str,
+    *,
+    prompt: str,
+    api_key: str,
+    system_instruction: str | None,
+    response_mime_type: str | None,
+) -> tuple[str | None, dict[str, Any] | None]:
+    """Run one model attempt. Returns (text, classified provider error)."""
+    try:
+        client, resolved_model, config = _create_client_tuple(
+            model_name=model_name,
+            api_key=api_key,
+            system_instruction=system_instruction,
+            response_mime_type=response_mime_type,
+        )
+    except GeminiError:
+        raise
+    except Exception as exc:
+        record_ai_error("generate", error_type="init_error")
+        return None, classify_provider_error(
+            exc, stage="initialization", model_name=model_name,
+        )
+
+    started = time.perf_counter()
+    try:
+        response = await _call_model(
+            client, model=resolved_model, contents=prompt, config=config
+        )
+    except GeminiError:
+        raise
+    except Exception as exc:
+        error = classify_provider_error(exc, stage="request", model_name=model_name)
+        record_ai_error("generate", error_type=error.get("code", "unknown"))
+        if error.get("code") == "ai_quota_exceeded":
+            ai_scheduler.backoff(api_key, error["details"].get("retryAfterSec"))
+        return None, error
+
+    record_model_latency(model_name, time.perf_counter() - started)
+    return extract_sdk_text(response), None
+
+
+async def _cancel_tasks(tasks: set[asyncio.Task[Any]]) -> None:
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
 async def generate_content_text(
     *,
     prompt: str,
@@ -326,9 +519,19 @@ async def generate_content_text(
     response_mime_type: str | None = None,
     api_key: str | None = None,
     model_override: str | None = None,
+    cache_scope: str | None = None,
 ) -> str | None:
     """Generate text via the Gemini SDK, trying the model chain.
 
+    Models are tried in order. With AI_HEDGE_ENABLED, if the running attempt has
+    not answered within :func:`hedge_delay_sec`, the next model in the chain is
+    fired concurrently; the first valid answer wins and the others are cancelled.
+
+    When ``cache_scope`` is enabled in AI_RESPONSE_CACHE_SCOPES, identical
+    requests are answered from the response cache (see ai_response_cache).
+    The attempts hold one ai_scheduler slot for the key, so bursts queue under
+    the key's provider quota instead of failing.
+
     Raises GeminiError on failure. Returns None only if all models return empty.
     """
     resolved_key = api_key or get_api_key()
@@ -336,49 +539,79 @@ async def generate_content_text(
         raise GeminiError(503, "ai_unavailable", "AI provider not configured")
 
     models = [model_override] if model_override else resolve_model_chain()
+    key: str | None = None
+    if cache_enabled_for(cache_scope):
+        key = cache_key(
+            models=models,
+            prompt=prompt,
+            system_instruction=system_instruction,
+            response_mime_type=response_mime_type,
+        )
+        cached = await get_cached_response(key, scope=cache_scope)
+        if cached is not None:
+            return cached
+
     last_provider_error: dict[str, Any] | None = None
     got_empty_payload = False
     t0 = time.perf_counter()
-
-    for model_name in models:
-        try:
-            client, resolved_model, config = _create_client_tuple(
-                model_name=model_name,
+    hedging = bool(settings.ai_hedge_enabled) and len(models) > 1
+
+    pending: dict[asyncio.Task[Any], str] = {}
+    next_index = 0
+    hedged = False
+
+    def _launch() -> None:
+        nonlocal next_index
+        model_name = models[next_index]
+        next_index += 1
+        task = asyncio.ensure_future(
+            _attempt_model(
+                model_name,
+                prompt=prompt,
                 api_key=resolved_key,
                 system_instruction=system_instruction,
                 response_mime_type=response_mime_type,
             )
-        except GeminiError:
-            raise
-        except Exception as exc:
-            last_provider_error = classify_provider_error(
-                exc, stage="initialization", model_name=model_name,
-            )
-            record_ai_error("generate", error_type="init_error")
-            continue
-
-        try:
-            response = await run_in_threadpool(
-                client.models.generate_content,
-                model=resolved_model,
-                contents=prompt,
-                config=config,
-            )
-        except GeminiError:
-            raise
-        except Exception as exc:
-            last_provider_error = classify_provider_error(
-                exc, stage="request", model_name=model_name,
-            )
-            error_type = last_provider_error.get("code", "unknown") if last_provider_error else "unknown"
-            record_ai_error("generate", error_type=error_type)
-            continue
+        )
+        pending[task] = model_name
 
-        text = extract_sdk_text(response)
-        if text:
-            record_ai_request("generate", time.perf_counter() - t0)
-            return text
-        got_empty_payload = True
+    try:
+        async with ai_scheduler.slot(resolved_key, prompt=prompt):
+            try:
+                while pending or next_index < len(models):
+                    if not pending:
+                        _launch()
+                    timeout = None
+                    if hedging and next_index < len(models):
+                        timeout = hedge_delay_sec(models[next_index - 1])
+                    done, _ = await asyncio.wait(
+                        set(pending), timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    if not done:
+                        hedged = True
+                        record_ai_hedge("launched")
+                        _launch()
+                        continue
+
+                    for task in done:
+                        model_name = pending.pop(task)
+                        text, error = task.result()
+                        if text:
+                            if hedged and model_name != models[0]:
+                                record_ai_hedge("won")
+                            record_ai_request("generate", time.perf_counter() - t0)
+                            if key is not None:
+                                await store_cached_response(key, text)
+                            return text
+                        if error is not None:
+                            last_provider_error = error
+                        else:
+                            got_empty_payload = True
+            finally:
+                if pending:
+                    await _cancel_tasks(set(pending))
+    except SchedulerRejected as exc:
+        raise _scheduler_error(exc) from exc
 
     if last_provider_error is not None:
         raise GeminiError(
@@ -397,3 +630,108 @@ async def generate_content_text(
         502, "ai_upstream_error", "AI provider request failed",
         {"error": "No AI model attempts were successful."},
     )
+
+
+# ---------------------------------------------------------------------------
+# Streaming generation
+# ---------------------------------------------------------------------------
+
+
+async def _open_model_stream(
+    client: Any, *, model: str, contents: str, config: Any
+) -> AsyncIterator[Any]:
+    aio = getattr(client, "aio", None)
+    aio_models = getattr(aio, "models", None) if aio is not None else None
+    if aio_models is not None:
+        stream = aio_models.generate_content_stream(model=model, contents=contents, config=config)
+        if inspect.isawaitable(stream):
+            stream = await stream
+        return stream
+    sync_stream = await run_in_threadpool(
+        client.models.generate_content_stream,
+        model=model,
+        contents=contents,
+        config=config,
+    )
+    return iterate_in_threadpool(iter(sync_stream))
+
+
+def _chunk_text(chunk: Any) -> str | None:
+    # Stream chunks keep their surrounding whitespace (extract_sdk_text strips it).
+    try:
+        raw = getattr(chunk, "text", None)
+    except Exception:
+        raw = None
+    if isinstance(raw, str):
+        return raw
+    return extract_sdk_text(chunk)
+
+
+async def stream_content_text(
+    *,
+    prompt: str,
+    system_instruction: str | None = None,
+    response_mime_type: str | None = None,
+    api_key: str | None = None,
+) -> AsyncIterator[str]:
+    """Yield text chunks from the provider's streaming API as they arrive.
+
+    Falls back along the model chain only until the first chunk was produced;
+    later failures raise GeminiError mid-stream.
+    """
+    resolved_key = api_key or get_api_key()
+    if not resolved_key:
+        raise GeminiError(503, "ai_unavailable", "AI provider not configured")
+
+    last_provider_error: dict[str, Any] | None = None
+    t0 = time.perf_counter()
+    try:
+        async with ai_scheduler.slot(resolved_key, prompt=prompt):
+            for model_name in resolve_model_chain():
+                emitted = False
+                try:
+                    client, resolved_model, config = _create_client_tuple(
+                        model_name=model_name,
+                        api_key=resolved_key,
+                        system_instruction=system_instruction,
+                        response_mime_type=response_mime_type,
+                    )
+                    stream = await _open_model_stream(
+                        client, model=resolved_model, contents=prompt, config=config
+                    )
+                    async for chunk in stream:
+                        text = _chunk_text(chunk)
+                        if text:
+                            emitted = True
+                            yield text
+                except GeminiError:
+                    raise
+                except Exception as exc:
+                    last_provider_error = classify_provider_error(
+                        exc, stage="request", model_name=model_name,
+                    )
+                    code = last_provider_error.get("code", "unknown")
+                    record_ai_error("stream", error_type=code)
+                    if code == "ai_quota_exceeded":
+                        ai_scheduler.backoff(
+                            resolved_key, last_provider_error["details"].get("retryAfterSec")
+                        )
+                    if emitted:
+                        break
+                    continue
+
+                if emitted:
+                    record_ai_request("stream", time.perf_counter() - t0)
+                    return
+    except SchedulerRejected as exc:
+        raise _scheduler_error(exc) from exc
+
+    if last_provider_error is not None:
+        raise GeminiError(
+            last_provider_error.get("status_code", 502),
+            last_provider_error.get("code", "ai_upstream_error"),
+            last_provider_error.get("message", "AI provider request failed"),
+            last_provider_error.get("details"),
+        )
+    record_ai_error("stream", error_type="empty_payload")
+    raise GeminiError(502, "ai_invalid_response", "AI provider returned empty payload")
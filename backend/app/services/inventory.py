@@ -1,14 +1,38 @@
+"""User inventory over a static catalog.
+
+Catalog items the user never touched have no row: their quantity is the catalog
+default, so reads never write. A row is created the first time such an item is
+consumed. Consumption is a single ``UPDATE ... SET qty = qty - :n WHERE qty >=
+:n RETURNING qty`` and shares one transaction with the item's vitals effect.
+
+With INVENTORY_CACHE_ENABLED the merged quantities of a user are cached in
+Redis. The cache needs REDIS_URL: a per-process copy could not be invalidated in
+other workers, so without Redis it stays off (with a warning). Any transaction
+that writes the inventory bumps the user's cache generation once it commits or
+rolls back. Entries carry the generation read before their SELECT and are only
+served while it is current, so a fill racing a write never outlives it.
+"""
+
 from __future__ import annotations
 
+import json
+import logging
 from datetime import datetime, timezone
-from typing import TypedDict
+from typing import Any, TypedDict
 
 from fastapi import HTTPException
+from sqlalchemy import event as sa_event
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session as OrmSession
 from sqlmodel import Session, select
 
+from app.core.config import settings
 from app.models import User, UserInventory
 from app.services.progression import apply_vitals, get_or_create_user_stats
 
+logger = logging.getLogger("app")
+
 
 class InventoryDef(TypedDict):
     name: str
@@ -38,19 +62,34 @@ INVENTORY_CATALOG: dict[str, InventoryDef] = {
     },
 }
 
+# Response shape of each catalog item minus its quantity, built once.
+_CATALOG_ITEMS: dict[str, dict[str, Any]] = {
+    item_id: {
+        "id": item_id,
+        "name": meta["name"],
+        "desc": meta["desc"],
+        "consumable": bool(meta["consumable"]),
+    }
+    for item_id, meta in INVENTORY_CATALOG.items()
+}
+_DEFAULT_QTY: dict[str, int] = {
+    item_id: int(meta["default_qty"]) for item_id, meta in INVENTORY_CATALOG.items()
+}
+
+_REDIS_PREFIX = "inventory:"
+_GENERATION_PREFIX = "inventory:gen:"
+_INVALIDATE_KEY = "inventory_cache_invalidate"
+
+_redis: Any | None = None
+_redis_ready = False
+
 
 def _utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
 
-def _row_to_dict(row: UserInventory, meta: InventoryDef) -> dict:
-    return {
-        "id": row.item_id,
-        "name": meta["name"],
-        "desc": meta["desc"],
-        "qty": int(row.qty),
-        "consumable": bool(meta["consumable"]),
-    }
+def _item_dict(item_id: str, qty: int) -> dict:
+    return {**_CATALOG_ITEMS[item_id], "qty": int(qty)}
 
 
 def _vitals_dict(user_stats) -> dict:
@@ -64,60 +103,160 @@ def _vitals_dict(user_stats) -> dict:
     }
 
 
-def ensure_user_inventory(session: Session, user: User) -> list[UserInventory]:
-    rows = session.exec(select(UserInventory).where(UserInventory.user_id == user.id)).all()
-    by_id = {r.item_id: r for r in rows}
-    changed = False
+def _redis_client() -> Any | None:
+    global _redis, _redis_ready
+    if not _redis_ready:
+        _redis_ready = True
+        if settings.redis_url:
+            try:
+                import redis
 
-    for item_id, meta in INVENTORY_CATALOG.items():
-        if item_id in by_id:
-            continue
-        row = UserInventory(
-            user_id=user.id,
-            item_id=item_id,
-            qty=int(meta["default_qty"]),
-            updated_at=_utcnow(),
-        )
-        session.add(row)
-        rows.append(row)
-        by_id[item_id] = row
-        changed = True
+                _redis = redis.Redis.from_url(settings.redis_url, decode_responses=True)
+            except Exception:
+                _redis = None
+        if _redis is None and settings.inventory_cache_enabled:
+            logger.warning("inventory_cache_disabled", extra={"reason": "redis_unavailable"})
+    return _redis
+
+
+def cache_enabled() -> bool:
+    if not settings.inventory_cache_enabled:
+        return False
+    return _redis_client() is not None
+
+
+def _cache_ttl() -> int:
+    return max(1, int(settings.inventory_cache_ttl_sec))
 
-    if changed:
-        session.commit()
-        rows = session.exec(select(UserInventory).where(UserInventory.user_id == user.id)).all()
 
-    return rows
+def _cache_get(user_id: str) -> tuple[str | None, dict[str, int] | None]:
+    """The user's cache generation and their cached quantities, if still current.
 
+    A None generation (Redis unreachable) must not be used to fill the cache.
+    """
+    client = _redis_client()
+    if client is None:
+        return None, None
+    try:
+        generation, raw = client.mget([_GENERATION_PREFIX + user_id, _REDIS_PREFIX + user_id])
+    except Exception:
+        return None, None
+    generation = generation or "0"
+    entry = json.loads(raw) if raw else None
+    if not entry or entry.get("gen") != generation:
+        return generation, None
+    return generation, entry["qty"]
 
-def list_inventory(session: Session, user: User, *, ensure_defaults: bool = True) -> list[dict]:
-    rows = (
-        ensure_user_inventory(session, user)
-        if ensure_defaults
-        else session.exec(select(UserInventory).where(UserInventory.user_id == user.id)).all()
+
+def _cache_set(user_id: str, generation: str, quantities: dict[str, int]) -> None:
+    client = _redis_client()
+    if client is None:
+        return
+    raw = json.dumps({"gen": generation, "qty": quantities}, separators=(",", ":"))
+    try:
+        client.set(_REDIS_PREFIX + user_id, raw, ex=_cache_ttl())
+    except Exception:
+        pass
+
+
+def _bump_generation(user_id: str) -> None:
+    client = _redis_client()
+    if client is None:
+        return
+    key = _GENERATION_PREFIX + user_id
+    try:
+        client.incr(key)
+        # Outlives every entry filled under an older generation, so it never restarts
+        # at a value such an entry carries.
+        client.expire(key, 2 * _cache_ttl())
+        client.delete(_REDIS_PREFIX + user_id)
+    except Exception:
+        pass
+
+
+def invalidate_inventory_cache(session: Session, user_id: str) -> None:
+    """Invalidate the user's cached inventory when the current transaction ends."""
+    if cache_enabled():
+        session.info.setdefault(_INVALIDATE_KEY, set()).add(user_id)
+
+
+@sa_event.listens_for(OrmSession, "after_commit")
+@sa_event.listens_for(OrmSession, "after_rollback")
+def _apply_invalidations(session: OrmSession) -> None:
+    # Also on rollback: a read inside the failed transaction may have cached its writes.
+    for user_id in session.info.pop(_INVALIDATE_KEY, None) or ():
+        _bump_generation(user_id)
+
+
+def inventory_quantities(session: Session, user_id: str) -> dict[str, int]:
+    """Quantity of every catalog item, defaults included, without writing."""
+    generation = None
+    if cache_enabled():
+        # Read before the SELECT: a write committed after it bumps the generation.
+        generation, cached = _cache_get(user_id)
+        if cached is not None:
+            return {**_DEFAULT_QTY, **cached}
+    quantities = dict(_DEFAULT_QTY)
+    rows = session.exec(
+        select(UserInventory.item_id, UserInventory.qty).where(UserInventory.user_id == user_id)
+    ).all()
+    for item_id, qty in rows:
+        if item_id in quantities:
+            quantities[item_id] = int(qty)
+    if generation is not None:
+        _cache_set(user_id, generation, quantities)
+    return quantities
+
+
+def list_inventory(session: Session, user: User) -> list[dict]:
+    quantities = inventory_quantities(session, user.id)
+    return [_item_dict(item_id, quantities[item_id]) for item_id in INVENTORY_CATALOG]
+
+
+def _consume(session: Session, user_id: str, item_id: str, qty: int) -> int | None:
+    """Take ``qty`` units; the remaining quantity, or None when the user has fewer."""
+    now = _utcnow()
+    remaining = session.execute(
+        update(UserInventory)
+        .where(
+            UserInventory.user_id == user_id,
+            UserInventory.item_id == item_id,
+            UserInventory.qty >= qty,
+        )
+        .values(qty=UserInventory.qty - qty, updated_at=now)
+        .returning(UserInventory.qty)
+    ).scalar_one_or_none()
+    if remaining is not None:
+        return int(remaining)
+
+    has_row = session.exec(
+        select(UserInventory.id).where(
+            UserInventory.user_id == user_id, UserInventory.item_id == item_id
+        )
+    ).first()
+    default_qty = _DEFAULT_QTY[item_id]
+    if has_row is not None or default_qty < qty:
+        return None
+
+    # First use of an item still at its catalog default: create the row already consumed.
+    session.add(
+        UserInventory(user_id=user_id, item_id=item_id, qty=default_qty - qty, updated_at=now)
     )
-    by_id = {r.item_id: r for r in rows}
-    out: list[dict] = []
-
-    for item_id, meta in INVENTORY_CATALOG.items():
-        row = by_id.get(item_id)
-        if not row:
-            out.append(
-                {
-                    "id": item_id,
-                    "name": meta["name"],
-                    "desc": meta["desc"],
-                    "qty": int(meta["default_qty"]),
-                    "consumable": bool(meta["consumable"]),
-                }
-            )
-            continue
-        out.append(_row_to_dict(row, meta))
-
-    return out
-
-
-def use_inventory_item(session: Session, user: User, item_id: str, qty: int = 1) -> dict:
+    try:
+        session.flush()
+    except IntegrityError as exc:
+        raise HTTPException(status_code=409, detail="inventory changed, retry") from exc
+    return default_qty - qty
+
+
+def use_inventory_item(
+    session: Session,
+    user: User,
+    item_id: str,
+    qty: int = 1,
+    *,
+    autocommit: bool = True,
+) -> dict:
     if qty < 1 or qty > 99:
         raise HTTPException(status_code=422, detail="qty must be between 1 and 99")
 
@@ -125,36 +264,35 @@ def use_inventory_item(session: Session, user: User, item_id: str, qty: int = 1)
     if not meta:
         raise HTTPException(status_code=404, detail="unknown item")
 
-    rows = ensure_user_inventory(session, user)
-    by_id = {r.item_id: r for r in rows}
-    row = by_id.get(item_id)
-    if not row:
-        raise HTTPException(status_code=404, detail="item not found for user")
-
     consumed_qty = 0
-    stats = get_or_create_user_stats(session, user)
     if meta["consumable"]:
-        if int(row.qty) < qty:
+        remaining = _consume(session, user.id, item_id, int(qty))
+        if remaining is None:
             raise HTTPException(status_code=400, detail="insufficient quantity")
-        row.qty = int(row.qty) - int(qty)
-        row.updated_at = _utcnow()
-        session.add(row)
-        session.commit()
-        session.refresh(row)
+        invalidate_inventory_cache(session, user.id)
         consumed_qty = qty
+        item = _item_dict(item_id, remaining)
+    else:
+        item = _item_dict(item_id, inventory_quantities(session, user.id)[item_id])
 
-        # Item effects (persistent):
-        # - coffee: +20 HP and -20 fatigue per consumed unit
-        if item_id == "coffee" and consumed_qty > 0:
-            stats = apply_vitals(
-                session,
-                user,
-                hp_delta=20 * consumed_qty,
-                fatigue_delta=-20 * consumed_qty,
-            )
+    # Item effects (persistent):
+    # - coffee: +20 HP and -20 fatigue per consumed unit
+    if item_id == "coffee" and consumed_qty > 0:
+        stats = apply_vitals(
+            session,
+            user,
+            hp_delta=20 * consumed_qty,
+            fatigue_delta=-20 * consumed_qty,
+            autocommit=False,
+        )
+    else:
+        stats = get_or_create_user_stats(session, user, autocommit=False)
 
-    return {
-        "item": _row_to_dict(row, meta),
+    result = {
+        "item": item,
         "consumedQty": consumed_qty,
         "vitals": _vitals_dict(stats),
     }
+    if autocommit:
+        session.commit()
+    return result
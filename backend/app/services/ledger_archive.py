@@ -0,0 +1,332 @@
+"""Tiered archival for the append-only XP ledger.
+
+Closed months (older than ``keep_months``) are rolled up into
+``xp_ledger_daily_totals`` (one row per user/day/event_type) and recorded in
+``xp_ledger_archives``. When an export directory is configured, the raw rows of
+the month are also written to a gzip-compressed JSON Lines file, read back to
+check its row count, and then pruned from ``xp_ledger_events`` in small
+batches; a prune cut short by a crash is resumed on the next run.
+:func:`iter_archived_events` reads a file back so replay/audit stays possible
+after pruning. The ``(source_type, source_ref)`` of every pruned row is
+kept in ``xp_ledger_source_keys`` so already granted rewards stay idempotent.
+
+Without an export directory raw rows are kept and only the rollup is built.
+Runs monthly via APScheduler (see main.py lifespan) or scripts/archive_xp_ledger.py;
+an advisory lock keeps concurrent workers from archiving the same months.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+from collections.abc import Iterator
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+from uuid import uuid4
+
+from sqlalchemy import delete, func, insert
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.db import try_advisory_lock
+from app.models import XpLedgerArchive, XpLedgerDailyTotal, XpLedgerEvent, XpLedgerSourceKey
+from app.services.utils import add_months, month_start
+
+logger = logging.getLogger("app")
+
+ARCHIVE_DELETE_BATCH_SIZE = 1000
+_EXPORT_YIELD_PER = 1000
+# Arbitrary constant: one archiver at a time across workers.
+_ARCHIVE_LOCK_KEY = 4_812_028
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def month_key(start: datetime) -> str:
+    return start.strftime("%Y-%m")
+
+
+def _month_of_key(key: str) -> datetime:
+    return datetime.strptime(key, "%Y-%m").replace(tzinfo=timezone.utc)
+
+
+def closed_month_starts(
+    session: Session,
+    *,
+    keep_months: int,
+    now: datetime | None = None,
+) -> list[datetime]:
+    """Return month starts older than the retention window that are not archived yet."""
+    cutoff = add_months(month_start(now or utcnow()), -max(1, int(keep_months)))
+    oldest = session.exec(
+        select(func.min(XpLedgerEvent.created_at)).where(XpLedgerEvent.created_at < cutoff)
+    ).one()
+    if oldest is None:
+        return []
+
+    archived = set(session.exec(select(XpLedgerArchive.month_key)).all())
+    months: list[datetime] = []
+    cursor = month_start(oldest)
+    while cursor < cutoff:
+        if month_key(cursor) not in archived:
+            months.append(cursor)
+        cursor = add_months(cursor, 1)
+    return months
+
+
+def rollup_month(session: Session, start: datetime) -> tuple[int, int, int]:
+    """Rebuild the daily totals of one month. Returns (events, xp, gold)."""
+    end = add_months(start, 1)
+    day = func.date(XpLedgerEvent.created_at)
+    rows = session.exec(
+        select(
+            XpLedgerEvent.user_id,
+            day,
+            XpLedgerEvent.event_type,
+            func.count(),
+            func.coalesce(func.sum(XpLedgerEvent.xp_delta), 0),
+            func.coalesce(func.sum(XpLedgerEvent.gold_delta), 0),
+        )
+        .where(XpLedgerEvent.created_at >= start, XpLedgerEvent.created_at < end)
+        .group_by(XpLedgerEvent.user_id, day, XpLedgerEvent.event_type)
+    ).all()
+
+    session.exec(
+        delete(XpLedgerDailyTotal).where(
+            XpLedgerDailyTotal.day_key >= start.strftime("%Y-%m-%d"),
+            XpLedgerDailyTotal.day_key < end.strftime("%Y-%m-%d"),
+        )
+    )
+    now = utcnow()
+    totals = [
+        {
+            "id": str(uuid4()),
+            "user_id": user_id,
+            "day_key": str(day_value)[:10],
+            "event_type": event_type,
+            "event_count": int(count),
+            "xp_total": int(xp_total),
+            "gold_total": int(gold_total),
+            "created_at": now,
+        }
+        for user_id, day_value, event_type, count, xp_total, gold_total in rows
+    ]
+    for offset in range(0, len(totals), ARCHIVE_DELETE_BATCH_SIZE):
+        session.execute(
+            insert(XpLedgerDailyTotal), totals[offset : offset + ARCHIVE_DELETE_BATCH_SIZE]
+        )
+
+    return (
+        sum(t["event_count"] for t in totals),
+        sum(t["xp_total"] for t in totals),
+        sum(t["gold_total"] for t in totals),
+    )
+
+
+def _event_record(row: XpLedgerEvent) -> dict[str, Any]:
+    return {
+        "id": row.id,
+        "user_id": row.user_id,
+        "event_type": row.event_type,
+        "source_type": row.source_type,
+        "source_ref": row.source_ref,
+        "xp_delta": int(row.xp_delta),
+        "gold_delta": int(row.gold_delta),
+        "ruleset_version": int(row.ruleset_version),
+        "payload_json": row.payload_json or {},
+        "created_at": _as_utc(row.created_at).isoformat(),
+    }
+
+
+def export_month(session: Session, start: datetime, export_dir: str) -> tuple[Path, str, int]:
+    """Write the raw rows of one month to ``xp_ledger_YYYY-MM.jsonl.gz``.
+
+    Returns (path, sha256 of the compressed file, exported rows).
+    """
+    end = add_months(start, 1)
+    directory = Path(export_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"xp_ledger_{month_key(start)}.jsonl.gz"
+    # Per-process temp file: a concurrent writer never truncates ours.
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+
+    exported = 0
+    rows = session.exec(
+        select(XpLedgerEvent)
+        .where(XpLedgerEvent.created_at >= start, XpLedgerEvent.created_at < end)
+        .order_by(XpLedgerEvent.created_at.asc(), XpLedgerEvent.id.asc())
+        .execution_options(yield_per=_EXPORT_YIELD_PER)
+    )
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as fh:
+        for row in rows:
+            fh.write(json.dumps(_event_record(row), ensure_ascii=False, separators=(",", ":")))
+            fh.write("\n")
+            exported += 1
+    os.replace(tmp_path, path)
+
+    digest = hashlib.sha256()
+    with path.open("rb") as fh:
+        for block in iter(lambda: fh.read(1 << 16), b""):
+            digest.update(block)
+    return path, digest.hexdigest(), exported
+
+
+def iter_archived_events(path: str | Path) -> Iterator[dict[str, Any]]:
+    """Yield ledger events from an exported month file, oldest first."""
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        for line in fh:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            record["created_at"] = datetime.fromisoformat(record["created_at"])
+            yield record
+
+
+def count_archived_events(path: str | Path) -> int:
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        return sum(1 for line in fh if line.strip())
+
+
+def prune_month(session: Session, start: datetime) -> int:
+    """Delete the raw rows of one month in small committed batches.
+
+    Each batch records its idempotency keys in ``xp_ledger_source_keys`` in the
+    same transaction as the delete.
+    """
+    end = add_months(start, 1)
+    deleted = 0
+    while True:
+        rows = session.exec(
+            select(
+                XpLedgerEvent.id,
+                XpLedgerEvent.user_id,
+                XpLedgerEvent.source_type,
+                XpLedgerEvent.source_ref,
+            )
+            .where(XpLedgerEvent.created_at >= start, XpLedgerEvent.created_at < end)
+            .limit(ARCHIVE_DELETE_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        ids = [row[0] for row in rows]
+        keys = {(user_id, source_type, source_ref) for _, user_id, source_type, source_ref in rows}
+        session.execute(
+            insert(XpLedgerSourceKey),
+            [
+                {"user_id": user_id, "source_type": source_type, "source_ref": source_ref}
+                for user_id, source_type, source_ref in keys
+            ],
+        )
+        session.exec(delete(XpLedgerEvent).where(XpLedgerEvent.id.in_(ids)))
+        session.commit()
+        deleted += len(ids)
+    return deleted
+
+
+def archive_closed_ledger_months(
+    session: Session,
+    *,
+    keep_months: int | None = None,
+    export_dir: str | None = None,
+    now: datetime | None = None,
+) -> list[str]:
+    """Roll up (and optionally export + prune) every closed, unarchived month.
+
+    Returns the archived month keys; empty when another process holds the lock.
+    """
+    with try_advisory_lock(session, _ARCHIVE_LOCK_KEY) as locked:
+        if not locked:
+            logger.info("xp_ledger_archive_skipped_locked")
+            return []
+        return _archive_months(session, keep_months=keep_months, export_dir=export_dir, now=now)
+
+
+def _prune_exported(session: Session, manifest: XpLedgerArchive) -> bool:
+    """Prune an exported month once its file is verified; False when it is not."""
+    key = manifest.month_key
+    # Never prune rows the file on disk does not hold.
+    try:
+        stored = count_archived_events(manifest.file_path)
+    except OSError:
+        logger.error("xp_ledger_archive_file_unreadable", extra={"month": key}, exc_info=True)
+        return False
+    if stored != manifest.row_count:
+        logger.error(
+            "xp_ledger_archive_file_mismatch",
+            extra={"month": key, "stored": stored, "rolled_up": manifest.row_count},
+        )
+        return False
+    prune_month(session, _month_of_key(key))
+    manifest.raw_deleted = True
+    session.add(manifest)
+    session.commit()
+    return True
+
+
+def _archive_months(
+    session: Session,
+    *,
+    keep_months: int | None,
+    export_dir: str | None,
+    now: datetime | None,
+) -> list[str]:
+    keep = int(keep_months if keep_months is not None else settings.ledger_archive_keep_months)
+    target_dir = (export_dir if export_dir is not None else settings.ledger_archive_dir).strip()
+
+    # A crash mid-prune leaves an exported month with part of its raw rows; such a
+    # month is no longer listed by closed_month_starts, so finish it first.
+    interrupted = session.exec(
+        select(XpLedgerArchive).where(
+            XpLedgerArchive.file_path.is_not(None),
+            XpLedgerArchive.raw_deleted.is_(False),
+        )
+    ).all()
+    for manifest in interrupted:
+        if _prune_exported(session, manifest):
+            logger.info("xp_ledger_month_prune_resumed", extra={"month": manifest.month_key})
+
+    archived: list[str] = []
+    for start in closed_month_starts(session, keep_months=keep, now=now):
+        key = month_key(start)
+        event_count, xp_total, gold_total = rollup_month(session, start)
+        manifest = XpLedgerArchive(
+            month_key=key,
+            row_count=event_count,
+            xp_total=xp_total,
+            gold_total=gold_total,
+        )
+        if target_dir:
+            path, sha256, exported = export_month(session, start, target_dir)
+            if exported != event_count:
+                session.rollback()
+                logger.error(
+                    "xp_ledger_archive_mismatch",
+                    extra={"month": key, "exported": exported, "rolled_up": event_count},
+                )
+                continue
+            manifest.file_path = str(path)
+            manifest.file_sha256 = sha256
+        session.add(manifest)
+        session.commit()
+
+        if target_dir and not _prune_exported(session, manifest):
+            continue
+
+        archived.append(key)
+        logger.info(
+            "xp_ledger_month_archived",
+            extra={"month": key, "rows": event_count, "exported": bool(target_dir)},
+        )
+    return archived
@@ -6,6 +6,7 @@ import unicodedata
 from dataclasses import dataclass, replace
 from datetime import datetime, timezone
 from difflib import SequenceMatcher
+from functools import lru_cache
 from typing import Any, Literal
 
 from pydantic import BaseModel, Field, ValidationError
@@ -21,7 +22,7 @@ from app.services.gemini_client import (
 )
 
 Cycle = Literal["daily", "weekly"]
-GenerationSource = Literal["gemini", "fallback", "mixed"]
+GenerationSource = Literal["gemini", "fallback", "mixed", "pool"]
 
 
 _RANKS = ["F", "E", "D", "C", "B", "A", "S"]
@@ -91,12 +92,17 @@ class MissionGenerationOutput:
     weekly: list[MissionSpec]
 
 
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9\s]")
+_SPACES_RE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
 def _normalize_text(value: str) -> str:
     text = unicodedata.normalize("NFKD", str(value or ""))
     text = "".join(ch for ch in text if not unicodedata.combining(ch))
     text = text.lower()
-    text = re.sub(r"[^a-z0-9\s]", " ", text)
-    text = re.sub(r"\s+", " ", text).strip()
+    text = _NON_ALNUM_RE.sub(" ", text)
+    text = _SPACES_RE.sub(" ", text).strip()
     return text
 
 
@@ -113,6 +119,7 @@ def _display_subject(value: str) -> str:
     return " ".join(words)
 
 
+@lru_cache(maxsize=4096)
 def _subject_bucket(subject: str) -> str:
     normalized = _normalize_text(subject)
     for bucket, aliases in _ALIAS_BUCKETS.items():
@@ -301,6 +308,7 @@ async def _try_generate_with_gemini(
             system_instruction="Voce atua como Sistema. Entregue JSON limpo, sem markdown, sem comentarios, sem texto extra.",
             response_mime_type="application/json",
             api_key=api_key,
+            cache_scope="missions",
         )
     except GeminiError:
         return None
@@ -426,13 +434,41 @@ def _score_subject_similarity(old_subject: str, new_subject: str) -> float:
     return SequenceMatcher(a=old_norm, b=new_norm).ratio()
 
 
-def _candidate_order(old_subject: str, new_specs: list[MissionSpec]) -> list[int]:
-    ranked = [
-        (idx, _score_subject_similarity(old_subject, spec.subject))
-        for idx, spec in enumerate(new_specs)
-    ]
-    ranked.sort(key=lambda item: item[1], reverse=True)
-    return [idx for idx, _score in ranked]
+def _similarity_matrix(
+    old_subjects: list[str], new_subjects: list[str]
+) -> dict[str, list[float]]:
+    """Scores of each distinct old subject against every new subject.
+
+    Same values as _score_subject_similarity, but each subject is normalized and
+    bucketed once and SequenceMatcher reuses its analysis of the new subject
+    across all old subjects.
+    """
+    new_norms = [_normalize_text(subject) for subject in new_subjects]
+    new_buckets = [_subject_bucket(norm) for norm in new_norms]
+    old_norms = {subject: _normalize_text(subject) for subject in dict.fromkeys(old_subjects)}
+    scores = {subject: [0.0] * len(new_subjects) for subject in old_norms}
+
+    matcher = SequenceMatcher(autojunk=True)
+    for col, (new_norm, new_bucket) in enumerate(zip(new_norms, new_buckets, strict=True)):
+        if not new_norm:
+            continue
+        matcher.set_seq2(new_norm)
+        for subject, old_norm in old_norms.items():
+            if not old_norm:
+                continue
+            if old_norm == new_norm:
+                score = 1.0
+            elif _subject_bucket(old_norm) == new_bucket:
+                score = 0.82
+            else:
+                matcher.set_seq1(old_norm)
+                score = matcher.ratio()
+            scores[subject][col] = score
+    return scores
+
+
+def _order_by_score(scores: list[float]) -> list[int]:
+    return sorted(range(len(scores)), key=lambda idx: scores[idx], reverse=True)
 
 
 def _fill_progress_with_capacity(
@@ -487,10 +523,14 @@ def _migrate_progress(
     claimed_bucket = [False for _ in new_specs]
 
     ordered_rows = sorted(existing_rows, key=lambda row: bool(row.claimed), reverse=True)
+    similarity = _similarity_matrix(
+        [row.subject for row in ordered_rows], [spec.subject for spec in new_specs]
+    )
+    orders: dict[str, list[int]] = {}
     for row in ordered_rows:
-        candidates = _candidate_order(row.subject, new_specs)
-        if not candidates:
-            continue
+        candidates = orders.get(row.subject)
+        if candidates is None:
+            candidates = orders[row.subject] = _order_by_score(similarity[row.subject])
 
         migrated_amount = max(0, int(row.progress_minutes))
         best_idx = candidates[0]
@@ -516,12 +556,77 @@ def _migrate_progress(
     return migrated
 
 
+def _generate_from_pool(
+    *,
+    goals: dict[str, int],
+    cycle: Literal["daily", "weekly", "both"],
+    user_id: str,
+    day_key: str,
+    week_key: str,
+    exclude_titles: set[str],
+) -> MissionGenerationOutput | None:
+    from app.services.mission_pool import select_pool_missions
+
+    daily: list[MissionSpec] | None = None
+    weekly: list[MissionSpec] | None = None
+    if cycle in {"daily", "both"}:
+        daily = select_pool_missions(
+            goals=goals,
+            cycle="daily",
+            user_id=user_id,
+            period_key=day_key,
+            exclude_titles=exclude_titles,
+        )
+        if daily is None:
+            return None
+    if cycle in {"weekly", "both"}:
+        weekly = select_pool_missions(
+            goals=goals,
+            cycle="weekly",
+            user_id=user_id,
+            period_key=week_key,
+            exclude_titles=exclude_titles,
+        )
+        if weekly is None:
+            return None
+
+    return MissionGenerationOutput(
+        source="pool",
+        warnings=[],
+        daily=daily if daily is not None else build_fallback_missions(goals=goals, cycle="daily"),
+        weekly=(
+            weekly if weekly is not None else build_fallback_missions(goals=goals, cycle="weekly")
+        ),
+    )
+
+
 async def generate_official_mission_specs(
     *,
     goals: dict[str, int],
     cycle: Literal["daily", "weekly", "both"],
     user_settings: UserSettings | None = None,
+    user_id: str | None = None,
+    day_key: str = "",
+    week_key: str = "",
+    exclude_titles: set[str] | None = None,
 ) -> MissionGenerationOutput:
+    """Build mission specs for a regeneration.
+
+    With ``user_id`` the precomputed mission pool is tried first (see
+    mission_pool); Gemini is only called when the pool lacks coverage.
+    """
+    if user_id is not None:
+        pooled = _generate_from_pool(
+            goals=goals,
+            cycle=cycle,
+            user_id=user_id,
+            day_key=day_key,
+            week_key=week_key,
+            exclude_titles=exclude_titles or set(),
+        )
+        if pooled is not None:
+            return pooled
+
     fallback_daily = build_fallback_missions(goals=goals, cycle="daily", count=5)
     fallback_weekly = build_fallback_missions(goals=goals, cycle="weekly", count=5)
 
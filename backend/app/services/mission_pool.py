@@ -0,0 +1,221 @@
+"""Precomputed mission pool served locally.
+
+``scripts/generate_mission_pool.py`` writes ``missions_pool.json`` as
+``{subject: [{title, description, objective, target_minutes, difficulty, tags,
+subject, rank}, ...]}``. The pool is loaded once into an index keyed by
+(subject bucket, rank) so a regeneration picks its missions with a few dict
+lookups instead of a Gemini call.
+
+Selection is deterministic per user/period: the candidate is chosen by a hash
+of (user, period, cycle, subject), skipping titles the user currently has so a
+regeneration rotates to different missions. Targets and rewards are recomputed
+from the user's goals. When a requested subject has no pooled mission the
+caller falls back to live generation.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from app.core.config import settings
+from app.services.mission_generator import (
+    _RANKS,
+    Cycle,
+    MissionSpec,
+    _display_subject,
+    _goal_subjects,
+    _normalize_difficulty,
+    _normalize_rank,
+    _normalize_text,
+    _reward_for,
+    _sanitize_tags,
+    _subject_bucket,
+)
+
+logger = logging.getLogger("app")
+
+
+@dataclass(frozen=True, slots=True)
+class PoolMission:
+    subject: str
+    rank: str
+    difficulty: str
+    title: str
+    description: str
+    objective: str
+    target_minutes: int
+    tags: tuple[str, ...]
+
+
+class MissionPool:
+    """In-memory index of pooled missions by (subject bucket, rank)."""
+
+    def __init__(self, missions: list[PoolMission]) -> None:
+        self._index: dict[tuple[str, str], list[PoolMission]] = {}
+        for mission in missions:
+            key = (_subject_bucket(mission.subject), mission.rank)
+            self._index.setdefault(key, []).append(mission)
+        for bucket in self._index.values():
+            bucket.sort(key=lambda m: (m.difficulty, m.title))
+        self._size = len(missions)
+
+    def __len__(self) -> int:
+        return self._size
+
+    @classmethod
+    def from_payload(cls, payload: Any) -> MissionPool:
+        missions: list[PoolMission] = []
+        groups = payload.items() if isinstance(payload, dict) else [("", payload)]
+        for group_subject, items in groups:
+            if not isinstance(items, list):
+                continue
+            for item in items:
+                mission = _parse_mission(item, default_subject=str(group_subject))
+                if mission is not None:
+                    missions.append(mission)
+        return cls(missions)
+
+    def candidates(self, subject: str, rank: str) -> list[PoolMission]:
+        """Missions for the subject bucket at ``rank``, else at the nearest rank."""
+        bucket = _subject_bucket(subject)
+        wanted = _RANKS.index(rank) if rank in _RANKS else 0
+        for distance in range(len(_RANKS)):
+            for idx in (wanted - distance, wanted + distance):
+                if 0 <= idx < len(_RANKS):
+                    found = self._index.get((bucket, _RANKS[idx]))
+                    if found:
+                        return found
+        return []
+
+
+def _parse_mission(item: Any, *, default_subject: str) -> PoolMission | None:
+    if not isinstance(item, dict):
+        return None
+    title = str(item.get("title") or "").strip()[:120]
+    description = str(item.get("description") or "").strip()[:280]
+    if not title or not description:
+        return None
+    subject = _display_subject(str(item.get("subject") or default_subject))
+    rank = _normalize_rank(str(item.get("rank") or ""))
+    tags = item.get("tags") if isinstance(item.get("tags"), list) else []
+    try:
+        target = int(item.get("target_minutes") or item.get("targetMinutes") or 0)
+    except (TypeError, ValueError):
+        target = 0
+    return PoolMission(
+        subject=subject,
+        rank=rank,
+        difficulty=_normalize_difficulty(str(item.get("difficulty") or ""), rank=rank),
+        title=title,
+        description=description,
+        objective=str(item.get("objective") or "").strip()[:180],
+        target_minutes=max(0, target),
+        tags=tuple(_sanitize_tags([str(tag) for tag in tags])),
+    )
+
+
+_pool: MissionPool | None = None
+_pool_lock = threading.Lock()
+
+
+def load_mission_pool(path: str | Path) -> MissionPool:
+    file = Path(path)
+    if not file.is_file():
+        return MissionPool([])
+    try:
+        payload = json.loads(file.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        logger.exception("mission_pool_load_failed", extra={"path": str(file)})
+        return MissionPool([])
+    return MissionPool.from_payload(payload)
+
+
+def get_mission_pool() -> MissionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                path = settings.mission_pool_path.strip()
+                _pool = load_mission_pool(path) if path else MissionPool([])
+                logger.info("mission_pool_loaded", extra={"missions": len(_pool)})
+    return _pool
+
+
+def set_mission_pool(pool: MissionPool | None) -> None:
+    """Replace (or with None, reload on next use) the process-wide pool."""
+    global _pool
+    with _pool_lock:
+        _pool = pool
+
+
+def _pick(candidates: list[PoolMission], *, seed: str, exclude_titles: set[str]) -> PoolMission:
+    offset = int.from_bytes(hashlib.sha256(seed.encode("utf-8")).digest()[:8], "big")
+    for step in range(len(candidates)):
+        mission = candidates[(offset + step) % len(candidates)]
+        if _normalize_text(mission.title) not in exclude_titles:
+            return mission
+    return candidates[offset % len(candidates)]
+
+
+def select_pool_missions(
+    *,
+    goals: dict[str, int],
+    cycle: Cycle,
+    user_id: str,
+    period_key: str,
+    count: int = 5,
+    exclude_titles: set[str] | None = None,
+    pool: MissionPool | None = None,
+) -> list[MissionSpec] | None:
+    """Pick ``count`` personalized missions, or None when the pool lacks coverage."""
+    pool = pool if pool is not None else get_mission_pool()
+    if not len(pool):
+        return None
+    excluded = {_normalize_text(title) for title in (exclude_titles or set())}
+
+    rows: list[MissionSpec] = []
+    for idx, subject in enumerate(_goal_subjects(goals, count=count)):
+        if cycle == "daily":
+            rank = _RANKS[min(idx, len(_RANKS) - 1)]
+        else:
+            rank = _RANKS[min(idx + 1, len(_RANKS) - 1)]
+        candidates = pool.candidates(subject, rank)
+        if not candidates:
+            return None
+        mission = _pick(
+            candidates,
+            seed=f"{user_id}:{period_key}:{cycle}:{_normalize_text(subject)}",
+            exclude_titles=excluded,
+        )
+
+        goal_value = int(goals.get(subject, goals.get(subject.upper(), 0)) or 0)
+        if cycle == "daily":
+            target = max(10, min(180, goal_value or mission.target_minutes or 25))
+        else:
+            target = max(60, min(1200, (goal_value or 25) * 7))
+        reward_xp, reward_gold = _reward_for(
+            rank=mission.rank, difficulty=mission.difficulty, cycle=cycle
+        )
+        tags = list(mission.tags) or [_normalize_text(subject).replace(" ", "-"), cycle]
+        rows.append(
+            MissionSpec(
+                subject=subject,
+                title=mission.title,
+                description=mission.description,
+                target_minutes=target,
+                rank=mission.rank,
+                difficulty=mission.difficulty,
+                objective=mission.objective or f"Concluir {target} minutos em {subject}.",
+                tags=tags[:6],
+                reward_xp=reward_xp,
+                reward_gold=reward_gold,
+                source="pool",
+            )
+        )
+    return rows
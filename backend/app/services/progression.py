@@ -7,7 +7,7 @@ from uuid import uuid4
 
 from sqlmodel import Session, select
 
-from app.models import User, UserSettings, UserStats, XpLedgerEvent
+from app.models import User, UserSettings, UserStats, XpLedgerEvent, XpLedgerSourceKey
 
 
 RANK_RULES: tuple[tuple[int, int, str], ...] = (
@@ -23,6 +23,15 @@ RANK_RULES: tuple[tuple[int, int, str], ...] = (
 DEFAULT_REWARD_MULTIPLIER_BPS = 10_000
 
 
+class DuplicateLedgerSource(Exception):
+    """The ``(source_type, source_ref)`` was already granted; its ledger row is archived."""
+
+    def __init__(self, source_type: str, source_ref: str):
+        super().__init__(f"{source_type}:{source_ref}")
+        self.source_type = source_type
+        self.source_ref = source_ref
+
+
 @dataclass(frozen=True)
 class SessionVitalsDelta:
     hp_delta: int = 0
@@ -232,11 +241,15 @@ def apply_xp_gold(
     session.add(stats)
 
     if persist_ledger and (xp_delta_i != 0 or gold_delta_i != 0):
+        ledger_source = (source_type.strip() or "generic", _new_source_ref(source_ref))
+        if source_ref and session.get(XpLedgerSourceKey, (user.id, *ledger_source)):
+            # The original row was archived and pruned, so uq_xp_ledger_source cannot fire.
+            raise DuplicateLedgerSource(*ledger_source)
         ledger_row = XpLedgerEvent(
             user_id=user.id,
             event_type=(event_type or "progress.adjustment"),
-            source_type=(source_type.strip() or "generic"),
-            source_ref=_new_source_ref(source_ref),
+            source_type=ledger_source[0],
+            source_ref=ledger_source[1],
             xp_delta=xp_delta_i,
             gold_delta=gold_delta_i,
             ruleset_version=max(1, int(ruleset_version)),
@@ -1,13 +1,25 @@
 from __future__ import annotations
 
 import json
-from datetime import timedelta
+import logging
+from collections.abc import Iterator
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
 
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, select
 
-from app.models import DailyQuest, StudySession, User, WeeklyQuest
-from app.services.mission_generator import build_fallback_missions
-from app.services.utils import week_key
+from app.core.config import settings
+from app.db import try_advisory_lock
+from app.models import DailyQuest, StudyPlan, StudySession, User, WeeklyQuest
+from app.services.mission_generator import MissionSpec, build_fallback_missions
+from app.services.utils import date_key, now_local, parse_goals, week_key
+
+logger = logging.getLogger("app")
+
+# Arbitrary constant: one pregeneration run at a time across workers.
+_PREGEN_LOCK_KEY = 4_812_037
 
 
 def _spec_for_subject(*, subject: str, cycle: str, minutes_hint: int = 15):
@@ -372,3 +384,161 @@ def recompute_weekly_quests_for_week(
         session.commit()
     else:
         session.flush()
+
+
+# ------------------------------------------------------------------
+#  Background pre-generation
+# ------------------------------------------------------------------
+
+
+def _active_user_ids(session: Session, *, since: datetime) -> list[str]:
+    studied = session.exec(
+        select(StudySession.user_id).where(StudySession.started_at >= since).distinct()
+    ).all()
+    joined = session.exec(select(User.id).where(User.created_at >= since)).all()
+    return sorted(set(studied) | set(joined))
+
+
+def _iter_batches(items: list[str], size: int) -> Iterator[list[str]]:
+    for offset in range(0, len(items), size):
+        yield items[offset : offset + size]
+
+
+def _quest_values(
+    spec: MissionSpec, *, user_id: str, min_target: int, now: datetime
+) -> dict[str, object]:
+    return {
+        "id": str(uuid4()),
+        "user_id": user_id,
+        "subject": spec.subject,
+        "title": spec.title,
+        "description": spec.description,
+        "rank": spec.rank,
+        "difficulty": spec.difficulty,
+        "objective": spec.objective,
+        "tags_json": json.dumps(spec.tags),
+        "reward_xp": spec.reward_xp,
+        "reward_gold": spec.reward_gold,
+        "source": spec.source,
+        "target_minutes": max(min_target, int(spec.target_minutes)),
+        "progress_minutes": 0,
+        "claimed": False,
+        "generated_at": now,
+        "created_at": now,
+    }
+
+
+def _pregenerate_batch(
+    session: Session,
+    *,
+    user_ids: list[str],
+    dk: str,
+    wk: str,
+) -> tuple[int, int]:
+    plans = session.exec(
+        select(StudyPlan.user_id, StudyPlan.goals_json).where(StudyPlan.user_id.in_(user_ids))
+    ).all()
+    goals_by_user = {user_id: parse_goals(goals_json) for user_id, goals_json in plans}
+    has_daily = set(
+        session.exec(
+            select(DailyQuest.user_id)
+            .where(DailyQuest.user_id.in_(user_ids), DailyQuest.date_key == dk)
+            .distinct()
+        ).all()
+    )
+    has_weekly = set(
+        session.exec(
+            select(WeeklyQuest.user_id)
+            .where(WeeklyQuest.user_id.in_(user_ids), WeeklyQuest.week_key == wk)
+            .distinct()
+        ).all()
+    )
+
+    now = datetime.now(timezone.utc)
+    daily_rows: list[dict[str, object]] = []
+    weekly_rows: list[dict[str, object]] = []
+    for user_id in user_ids:
+        goals = goals_by_user.get(user_id) or parse_goals("{}")
+        if user_id not in has_daily:
+            for spec in build_fallback_missions(goals=goals, cycle="daily", count=5):
+                # Only daily quests track updated_at (incremental backups).
+                daily_rows.append(
+                    {
+                        **_quest_values(spec, user_id=user_id, min_target=5, now=now),
+                        "date_key": dk,
+                        "updated_at": now,
+                    }
+                )
+        if user_id not in has_weekly:
+            for spec in build_fallback_missions(goals=goals, cycle="weekly", count=5):
+                weekly_rows.append(
+                    {**_quest_values(spec, user_id=user_id, min_target=30, now=now), "week_key": wk}
+                )
+
+    if daily_rows:
+        session.execute(insert(DailyQuest), daily_rows)
+    if weekly_rows:
+        session.execute(insert(WeeklyQuest), weekly_rows)
+    session.commit()
+    return len(daily_rows), len(weekly_rows)
+
+
+def pregenerate_quests(
+    session: Session,
+    *,
+    now: datetime | None = None,
+    active_days: int | None = None,
+    batch_size: int | None = None,
+) -> dict[str, int]:
+    """Create tomorrow's daily and next week's weekly quests for active users.
+
+    Same specs as ensure_daily_quests/ensure_weekly_quests, inserted in bulk per
+    batch of users, so the first request after the rollover finds them ready.
+    Users who already have quests for the target period are skipped; a batch
+    that races a request creating them is retried once after re-checking.
+    Returns an empty dict when another worker holds the pregeneration lock.
+    """
+    with try_advisory_lock(session, _PREGEN_LOCK_KEY) as locked:
+        if not locked:
+            logger.info("quest_pregen_skipped_locked")
+            return {}
+        return _pregenerate(session, now=now, active_days=active_days, batch_size=batch_size)
+
+
+def _pregenerate(
+    session: Session,
+    *,
+    now: datetime | None,
+    active_days: int | None,
+    batch_size: int | None,
+) -> dict[str, int]:
+    local = now or now_local()
+    days = int(active_days if active_days is not None else settings.quest_pregen_active_days)
+    size = max(1, int(batch_size if batch_size is not None else settings.quest_pregen_batch_size))
+    dk = date_key(local + timedelta(days=1))
+    wk = week_key(local + timedelta(days=7))
+
+    since = (local - timedelta(days=max(1, days))).astimezone(timezone.utc)
+    user_ids = _active_user_ids(session, since=since)
+    daily_total = 0
+    weekly_total = 0
+    for batch in _iter_batches(user_ids, size):
+        for attempt in range(2):
+            try:
+                daily, weekly = _pregenerate_batch(session, user_ids=batch, dk=dk, wk=wk)
+            except IntegrityError:
+                session.rollback()
+                if attempt:
+                    logger.warning("quest_pregen_batch_conflict", extra={"users": len(batch)})
+                continue
+            daily_total += daily
+            weekly_total += weekly
+            break
+
+    result = {
+        "users": len(user_ids),
+        "daily_quests": daily_total,
+        "weekly_quests": weekly_total,
+    }
+    logger.info("quest_pregen_complete", extra={"date": dk, "week": wk, **result})
+    return result
@@ -0,0 +1,216 @@
+"""Report aggregates backed by materialized views.
+
+On Postgres, migration 20261018_0027 creates ``mv_user_daily_stats`` and
+``mv_user_monthly_stats``. ``refresh_report_views`` (scheduled every
+REPORTS_MATVIEW_REFRESH_SEC, see main.py lifespan) refreshes them with
+``REFRESH MATERIALIZED VIEW CONCURRENTLY`` so readers are never blocked, and
+records the snapshot time in ``report_view_refreshes``.
+
+Every session write path (hard deletes included) calls ``mark_sessions_changed``,
+which stamps ``users.sessions_changed_at``. A view is only read when its
+snapshot is younger than REPORTS_MATVIEW_MAX_STALENESS_SEC and the user's
+sessions did not change after it; snapshots are dated at the oldest transaction
+still running when they are taken, so a write committed during a refresh also
+bypasses the views. Otherwise (and on SQLite, or without the migration) the
+same aggregate is computed with a live ``GROUP BY`` over the user's sessions.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, text, update
+from sqlalchemy.exc import DBAPIError
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.metrics import record_report_query, record_report_view_refresh
+from app.models import ReportViewRefresh, StudySession, User
+
+logger = logging.getLogger("app")
+
+DAILY_VIEW = "mv_user_daily_stats"
+MONTHLY_VIEW = "mv_user_monthly_stats"
+REPORT_VIEWS = (DAILY_VIEW, MONTHLY_VIEW)
+# Arbitrary constant: one refresher at a time across workers.
+_REFRESH_LOCK_KEY = 4_812_027
+
+# (period key, minutes, sessions, xp, gold)
+StatsRow = tuple[str, int, int, int, int]
+
+
+def _is_postgres(session: Session) -> bool:
+    return session.get_bind().dialect.name == "postgresql"
+
+
+def _aware(value: datetime) -> datetime:
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def mark_sessions_changed(session: Session, user_id: str) -> None:
+    """Call on every write to the user's sessions, in the same transaction."""
+    changed_at = func.now() if _is_postgres(session) else datetime.now(timezone.utc)
+    session.exec(update(User).where(User.id == user_id).values(sessions_changed_at=changed_at))
+
+
+def refresh_report_views(session: Session, *, force: bool = False) -> list[str]:
+    """Refresh the report views concurrently; returns the refreshed view names.
+
+    Views refreshed less than half an interval ago are skipped (another worker
+    just did it) unless ``force`` is set. No-op outside Postgres.
+    """
+    if not settings.reports_matview_enabled or not _is_postgres(session):
+        return []
+    locked = session.execute(
+        text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": _REFRESH_LOCK_KEY}
+    ).scalar()
+    if not locked:
+        session.rollback()
+        return []
+
+    # Date the snapshot at the oldest transaction still running: a session write it
+    # misses is stamped with its own transaction start (see mark_sessions_changed),
+    # never earlier than that.
+    snapshot_at = _aware(
+        session.execute(
+            text(
+                "SELECT LEAST(now(), MIN(xact_start)) FROM pg_stat_activity "
+                "WHERE datname = current_database() AND pid <> pg_backend_pid()"
+            )
+        ).scalar_one()
+    )
+    min_age = timedelta(seconds=max(1, int(settings.reports_matview_refresh_sec)) / 2)
+    last = {
+        row.name: _aware(row.refreshed_at)
+        for row in session.exec(select(ReportViewRefresh)).all()
+    }
+    refreshed: list[str] = []
+    try:
+        for view in REPORT_VIEWS:
+            if not force and view in last and snapshot_at - last[view] < min_age:
+                continue
+            started = time.perf_counter()
+            session.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}"))
+            elapsed = time.perf_counter() - started
+            session.merge(
+                ReportViewRefresh(
+                    name=view, refreshed_at=snapshot_at, duration_ms=int(elapsed * 1000)
+                )
+            )
+            record_report_view_refresh(view, elapsed)
+            refreshed.append(view)
+        session.commit()
+    except DBAPIError:
+        session.rollback()
+        logger.warning("report_view_refresh_failed", exc_info=True)
+        return []
+    if refreshed:
+        logger.info("report_views_refreshed", extra={"views": refreshed})
+    return refreshed
+
+
+def _view_usable(session: Session, *, user_id: str, view: str) -> bool:
+    if not settings.reports_matview_enabled or not _is_postgres(session):
+        return False
+    refreshed_at = session.exec(
+        select(ReportViewRefresh.refreshed_at).where(ReportViewRefresh.name == view)
+    ).first()
+    if refreshed_at is None:
+        return False
+    refreshed_at = _aware(refreshed_at)
+    max_age = timedelta(seconds=max(0, int(settings.reports_matview_max_staleness_sec)))
+    if datetime.now(timezone.utc) - refreshed_at > max_age:
+        return False
+    changed_at = session.exec(
+        select(User.sessions_changed_at).where(User.id == user_id)
+    ).first()
+    return changed_at is None or _aware(changed_at) < refreshed_at
+
+
+def _rows(result) -> list[StatsRow]:
+    return [
+        (str(key), int(minutes or 0), int(sessions or 0), int(xp or 0), int(gold or 0))
+        for key, minutes, sessions, xp, gold in result
+    ]
+
+
+def monthly_stats(session: Session, *, user_id: str, months: int) -> list[StatsRow]:
+    """The user's latest ``months`` months with sessions, newest first."""
+    if _view_usable(session, user_id=user_id, view=MONTHLY_VIEW):
+        record_report_query("monthly", "view")
+        return _rows(
+            session.execute(
+                text(
+                    f"SELECT month_key, minutes, sessions, xp, gold FROM {MONTHLY_VIEW} "
+                    "WHERE user_id = :uid ORDER BY month_key DESC LIMIT :lim"
+                ),
+                {"uid": user_id, "lim": months},
+            ).all()
+        )
+
+    record_report_query("monthly", "live")
+    month_key = func.substr(StudySession.date_key, 1, 7)
+    return _rows(
+        session.exec(
+            select(
+                month_key,
+                func.coalesce(func.sum(StudySession.minutes), 0),
+                func.count(),
+                func.coalesce(func.sum(StudySession.xp_earned), 0),
+                func.coalesce(func.sum(StudySession.gold_earned), 0),
+            )
+            .where(StudySession.user_id == user_id, StudySession.deleted_at.is_(None))
+            .group_by(month_key)
+            .order_by(month_key.desc())
+            .limit(months)
+        ).all()
+    )
+
+
+def daily_stats(
+    session: Session,
+    *,
+    user_id: str,
+    start_key: str | None = None,
+    end_key: str | None = None,
+    use_view: bool = True,
+) -> list[StatsRow]:
+    """Per-day totals of the user's sessions between two date keys (inclusive, open if None).
+
+    ``use_view=False`` always queries live, for callers that persist the result.
+    """
+    if use_view and _view_usable(session, user_id=user_id, view=DAILY_VIEW):
+        record_report_query("daily", "view")
+        clauses = ["user_id = :uid"]
+        params: dict[str, str] = {"uid": user_id}
+        if start_key is not None:
+            clauses.append("date_key >= :start")
+            params["start"] = start_key
+        if end_key is not None:
+            clauses.append("date_key <= :end")
+            params["end"] = end_key
+        return _rows(
+            session.execute(
+                text(
+                    f"SELECT date_key, minutes, sessions, xp, gold FROM {DAILY_VIEW} "
+                    f"WHERE {' AND '.join(clauses)}"
+                ),
+                params,
+            ).all()
+        )
+
+    record_report_query("daily", "live")
+    stmt = select(
+        StudySession.date_key,
+        func.coalesce(func.sum(StudySession.minutes), 0),
+        func.count(),
+        func.coalesce(func.sum(StudySession.xp_earned), 0),
+        func.coalesce(func.sum(StudySession.gold_earned), 0),
+    ).where(StudySession.user_id == user_id, StudySession.deleted_at.is_(None))
+    if start_key is not None:
+        stmt = stmt.where(StudySession.date_key >= start_key)
+    if end_key is not None:
+        stmt = stmt.where(StudySession.date_key <= end_key)
+    return _rows(session.exec(stmt.group_by(StudySession.date_key)).all())
@@ -5,38 +5,260 @@ This module provides purge functions for tables that grow without bound:
 - system_window_messages: 180-day retention, 500 per user cap
 - refresh_tokens: via tokens.cleanup_expired_refresh_tokens
 
+On Postgres both log tables are range-partitioned by month (migration
+20261018_0023): fully expired partitions are detached and dropped, and the
+partitions for the next months are created ahead of time. Rows that remain
+past the cutoff (the partially expired month, the default partition, or any
+non-partitioned/SQLite table) are deleted in small committed batches with a
+short sleep between them so the purge never holds long locks.
+
 These can be invoked via APScheduler (see main.py lifespan) or as a standalone script.
+``run_all_retention`` takes an advisory lock so only one worker runs it at a time.
 """
 
 from __future__ import annotations
 
 import logging
+import re
+import time
 from datetime import datetime, timedelta, timezone
+from typing import Any
 
-from sqlalchemy import delete, and_, select, func
+from sqlalchemy import delete, func, select, text
 from sqlmodel import Session
 
+from app.core.config import settings
+from app.core.metrics import record_retention_batch, record_retention_partition_dropped
+from app.db import try_advisory_lock
 from app.models import AuditEvent, SystemWindowMessage
+from app.services.utils import add_months, month_start
 
 logger = logging.getLogger("app")
 
+# Arbitrary constant: one retention run at a time across workers.
+_RETENTION_LOCK_KEY = 4_812_030
+
 
 def utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
 
+# ------------------------------------------------------------------
+#  Monthly partitions (Postgres only)
+# ------------------------------------------------------------------
+
+
+def partition_name(table: str, start: datetime) -> str:
+    return f"{table}_p{start:%Y%m}"
+
+
+def _is_postgres(session: Session) -> bool:
+    return session.get_bind().dialect.name == "postgresql"
+
+
+def is_partitioned(session: Session, table: str) -> bool:
+    if not _is_postgres(session):
+        return False
+    row = session.execute(
+        text(
+            "SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid "
+            "WHERE c.relname = :table AND c.relnamespace = to_regnamespace(current_schema())"
+        ),
+        {"table": table},
+    ).first()
+    return row is not None
+
+
+def list_partitions(session: Session, table: str) -> list[tuple[str, datetime]]:
+    """Return (name, month start) of the monthly partitions of ``table``, oldest first.
+
+    The default partition and partitions not following the naming scheme are skipped.
+    """
+    names = session.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits i "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "JOIN pg_class child ON child.oid = i.inhrelid "
+            "WHERE parent.relname = :table "
+            "AND parent.relnamespace = to_regnamespace(current_schema())"
+        ),
+        {"table": table},
+    ).scalars().all()
+    pattern = re.compile(rf"^{re.escape(table)}_p(\d{{4}})(\d{{2}})$")
+    partitions: list[tuple[str, datetime]] = []
+    for name in names:
+        match = pattern.match(name)
+        if match:
+            start = datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)
+            partitions.append((name, start))
+    return sorted(partitions, key=lambda item: item[1])
+
+
+def ensure_future_partitions(
+    session: Session,
+    table: str,
+    *,
+    months_ahead: int | None = None,
+    now: datetime | None = None,
+) -> list[str]:
+    """Create the partitions for the current month and the next ``months_ahead`` ones."""
+    ahead = int(
+        months_ahead if months_ahead is not None else settings.retention_partition_months_ahead
+    )
+    existing = {name for name, _ in list_partitions(session, table)}
+    current = month_start(now or utcnow())
+    created: list[str] = []
+    for offset in range(max(0, ahead) + 1):
+        start = add_months(current, offset)
+        name = partition_name(table, start)
+        if name in existing:
+            continue
+        try:
+            session.execute(
+                text(
+                    f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}" '
+                    f"FOR VALUES FROM ('{start.isoformat()}') "
+                    f"TO ('{add_months(start, 1).isoformat()}')"
+                )
+            )
+            session.commit()
+            created.append(name)
+        except Exception:
+            # Usually rows for that month already sit in the default partition.
+            session.rollback()
+            logger.exception("retention_partition_create_failed", extra={"partition": name})
+    return created
+
+
+def drop_expired_partitions(session: Session, table: str, *, cutoff: datetime) -> list[str]:
+    """Detach and drop every monthly partition that ends on or before ``cutoff``.
+
+    A partition that fails (e.g. a lock timeout) is logged and skipped; its rows
+    are still removed by the batched delete.
+    """
+    dropped: list[str] = []
+    for name, start in list_partitions(session, table):
+        if add_months(start, 1) > cutoff:
+            break
+        try:
+            session.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"'))
+            session.execute(text(f'DROP TABLE "{name}"'))
+            session.commit()
+        except Exception:
+            session.rollback()
+            logger.exception("retention_partition_drop_failed", extra={"partition": name})
+            continue
+        dropped.append(name)
+        record_retention_partition_dropped(table)
+        logger.info("retention_partition_dropped", extra={"table": table, "partition": name})
+    return dropped
+
+
+# ------------------------------------------------------------------
+#  Batched deletes
+# ------------------------------------------------------------------
+
+
+def batched_delete_before(
+    session: Session,
+    model: Any,
+    *,
+    cutoff: datetime,
+    batch_size: int | None = None,
+    sleep_ms: int | None = None,
+) -> int:
+    """Delete rows of ``model`` created before ``cutoff`` in committed batches.
+
+    Each batch selects at most ``batch_size`` ids and deletes them in its own
+    transaction, then sleeps ``sleep_ms`` so concurrent writers are not starved.
+    """
+    size = max(
+        1, int(batch_size if batch_size is not None else settings.retention_delete_batch_size)
+    )
+    pause = max(0, int(sleep_ms if sleep_ms is not None else settings.retention_delete_sleep_ms))
+    table = model.__tablename__
+    deleted = 0
+    batches = 0
+    while True:
+        ids = session.execute(
+            select(model.id).where(model.created_at < cutoff).limit(size)
+        ).scalars().all()
+        if not ids:
+            break
+        result = session.execute(delete(model).where(model.id.in_(ids)))
+        session.commit()
+        count = int(result.rowcount or 0)
+        deleted += count
+        batches += 1
+        record_retention_batch(table, count)
+        logger.debug(
+            "retention_batch",
+            extra={"table": table, "batch": batches, "deleted": count, "total": deleted},
+        )
+        if len(ids) < size:
+            break
+        if pause:
+            time.sleep(pause / 1000)
+    return deleted
+
+
+def _purge_before(session: Session, model: Any, *, cutoff: datetime) -> int:
+    table = model.__tablename__
+    if is_partitioned(session, table):
+        ensure_future_partitions(session, table)
+        drop_expired_partitions(session, table, cutoff=cutoff)
+    return batched_delete_before(session, model, cutoff=cutoff)
+
+
 def purge_audit_events(session: Session, *, retention_days: int = 90) -> int:
-    """Delete audit events older than retention_days."""
+    """Delete audit events older than retention_days.
+
+    Returns rows removed by batched deletes; dropped partitions are only counted
+    in ``retention_partitions_dropped_total``.
+    """
     cutoff = utcnow() - timedelta(days=retention_days)
-    stmt = delete(AuditEvent).where(AuditEvent.created_at < cutoff)
-    result = session.execute(stmt)
-    session.commit()
-    count = result.rowcount
+    count = _purge_before(session, AuditEvent, cutoff=cutoff)
     if count:
         logger.info("retention_purge", extra={"table": "audit_events", "deleted": count})
     return count
 
 
+def trim_system_messages(
+    session: Session,
+    *,
+    max_per_user: int,
+    user_id: str | None = None,
+) -> int:
+    """Delete everything past the newest ``max_per_user`` messages of each user.
+
+    One set-based DELETE ranking rows with ROW_NUMBER() per user (served by
+    ``ix_system_window_messages_user_created``). Does not commit.
+    """
+    ranked = select(
+        SystemWindowMessage.id,
+        func.row_number()
+        .over(
+            partition_by=SystemWindowMessage.user_id,
+            order_by=(SystemWindowMessage.created_at.desc(), SystemWindowMessage.id.desc()),
+        )
+        .label("rn"),
+    )
+    if user_id is not None:
+        ranked = ranked.where(SystemWindowMessage.user_id == user_id)
+    ranked = ranked.subquery()
+    result = session.execute(
+        delete(SystemWindowMessage)
+        .where(
+            SystemWindowMessage.id.in_(
+                select(ranked.c.id).where(ranked.c.rn > max(0, int(max_per_user)))
+            )
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return int(result.rowcount or 0)
+
+
 def purge_system_messages(
     session: Session,
     *,
@@ -46,31 +268,10 @@ def purge_system_messages(
     """Delete system_window_messages older than retention_days + enforce per-user cap."""
     # 1) Age-based purge
     cutoff = utcnow() - timedelta(days=retention_days)
-    stmt = delete(SystemWindowMessage).where(SystemWindowMessage.created_at < cutoff)
-    result = session.execute(stmt)
-    age_deleted = result.rowcount
+    age_deleted = _purge_before(session, SystemWindowMessage, cutoff=cutoff)
 
     # 2) Per-user cap: keep only the newest `max_per_user` per user
-    cap_deleted = 0
-    over_limit = session.execute(
-        select(SystemWindowMessage.user_id, func.count())
-        .group_by(SystemWindowMessage.user_id)
-        .having(func.count() > max_per_user)
-    ).all()
-
-    for user_id, count in over_limit:
-        excess = count - max_per_user
-        oldest_ids = session.execute(
-            select(SystemWindowMessage.id)
-            .where(SystemWindowMessage.user_id == user_id)
-            .order_by(SystemWindowMessage.created_at.asc())
-            .limit(excess)
-        ).scalars().all()
-        if oldest_ids:
-            session.execute(
-                delete(SystemWindowMessage).where(SystemWindowMessage.id.in_(oldest_ids))
-            )
-            cap_deleted += len(oldest_ids)
+    cap_deleted = trim_system_messages(session, max_per_user=max_per_user)
 
     session.commit()
     total = age_deleted + cap_deleted
@@ -87,13 +288,17 @@ def purge_system_messages(
 
 
 def run_all_retention(session: Session) -> dict[str, int]:
-    """Run all retention jobs. Returns counts per table."""
+    """Run all retention jobs. Returns counts per table (empty when another worker runs them)."""
     from app.services.tokens import cleanup_expired_refresh_tokens
 
-    results = {
-        "audit_events": purge_audit_events(session),
-        "system_window_messages": purge_system_messages(session),
-        "refresh_tokens": cleanup_expired_refresh_tokens(session),
-    }
+    with try_advisory_lock(session, _RETENTION_LOCK_KEY) as locked:
+        if not locked:
+            logger.info("retention_skipped_locked")
+            return {}
+        results = {
+            "audit_events": purge_audit_events(session),
+            "system_window_messages": purge_system_messages(session),
+            "refresh_tokens": cleanup_expired_refresh_tokens(session),
+        }
     logger.info("retention_complete", extra={"results": results})
     return results
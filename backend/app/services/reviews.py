@@ -1,13 +1,17 @@
 from __future__ import annotations
 
 from datetime import datetime, timedelta, timezone
+from typing import Any
 
 from sqlmodel import Session, select
 
 from app.models import DrillReview, User
+from app.services.achievements import record_review
 
 
-def get_or_create_review(session: Session, user: User, drill_id: str) -> DrillReview:
+def get_or_create_review(
+    session: Session, user: User, drill_id: str, *, background_tasks: Any = None
+) -> DrillReview:
     r = session.exec(
         select(DrillReview).where(DrillReview.user_id == user.id, DrillReview.drill_id == drill_id)
     ).first()
@@ -15,6 +19,8 @@ def get_or_create_review(session: Session, user: User, drill_id: str) -> DrillRe
         return r
     r = DrillReview(user_id=user.id, drill_id=drill_id, next_review_at=datetime.now(timezone.utc))
     session.add(r)
+    session.flush()
+    record_review(session, user.id, background_tasks=background_tasks)
     session.commit()
     session.refresh(r)
     return r
@@ -28,9 +34,10 @@ def apply_review(
     *,
     elapsed_ms: int | None = None,
     difficulty: str | None = None,
+    background_tasks: Any = None,
 ) -> DrillReview:
     now = datetime.now(timezone.utc)
-    r = get_or_create_review(session, user, drill_id)
+    r = get_or_create_review(session, user, drill_id, background_tasks=background_tasks)
 
     good = result == "good"
 
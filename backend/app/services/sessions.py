@@ -16,8 +16,10 @@ from sqlmodel import Session
 
 from app.core.config import settings
 from app.models import StudySession, User, UserSettings
+from app.services.achievements import mark_counters_stale, record_session
 from app.services.progression import apply_xp_gold, compute_session_rewards
 from app.services.quests import apply_session_to_quests, ensure_quests_for_today
+from app.services.report_views import mark_sessions_changed
 from app.services.webhooks import enqueue_event
 
 logger = logging.getLogger("app")
@@ -58,6 +60,10 @@ def create_study_session(
     )
     db.add(study_session)
     db.flush()
+    mark_sessions_changed(db, user.id)
+    record_session(
+        db, user.id, date_key=date_key, minutes=minutes, background_tasks=background_tasks
+    )
 
     # 3. Apply XP/gold
     stats, level_ups = apply_xp_gold(
@@ -115,6 +121,8 @@ def delete_study_session(
     """Soft-delete a session and reverse its XP/gold rewards."""
     study_session.deleted_at = datetime.now(timezone.utc)
     db.add(study_session)
+    mark_counters_stale(db, user.id)
+    mark_sessions_changed(db, user.id)
 
     # Reverse rewards
     xp_earned = int(study_session.xp_earned or 0)
@@ -0,0 +1,179 @@
+"""Single-flight coalescing of identical concurrent requests.
+
+Concurrent calls of :func:`coalesce` with the same key share one execution of
+the producer: the first caller (leader) runs it and the others (followers)
+receive its result, or the same HTTPException. Within a worker this uses an
+in-flight future per key. With REDIS_URL configured a ``SET NX PX`` lock extends
+this across workers: the leader publishes its outcome under a result key tagged
+with its lock token, and followers on other workers poll for it.
+
+Results must be JSON-serializable. A follower that does not see a result
+within ``wait_sec`` (leader crashed, Redis hiccup) runs the producer itself.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+from uuid import uuid4
+
+from fastapi import HTTPException
+
+from app.core.metrics import record_single_flight
+from app.core.rate_limit import get_redis_client
+
+_LOCK_PREFIX = "sf:lock:"
+_RESULT_PREFIX = "sf:result:"
+_POLL_SEC = 0.05
+
+_inflight: dict[str, asyncio.Future[Any]] = {}
+
+
+def _encode_outcome(token: str, *, result: Any = None, error: HTTPException | None = None) -> str:
+    if error is not None:
+        outcome = {
+            "token": token,
+            "error": {"status_code": error.status_code, "detail": error.detail},
+            "headers": dict(error.headers or {}),
+        }
+    else:
+        outcome = {"token": token, "result": result}
+    return json.dumps(outcome, ensure_ascii=False, separators=(",", ":"))
+
+
+def _decode_outcome(raw: str) -> tuple[str, Any]:
+    outcome = json.loads(raw)
+    error = outcome.get("error")
+    if error is not None:
+        raise HTTPException(
+            status_code=int(error["status_code"]),
+            detail=error.get("detail"),
+            headers=outcome.get("headers") or None,
+        )
+    return str(outcome.get("token") or ""), outcome.get("result")
+
+
+async def _run_redis_leader(
+    redis_client: Any,
+    key: str,
+    token: str,
+    producer: Callable[[], Awaitable[Any]],
+    *,
+    result_ttl_sec: int,
+) -> Any:
+    lock_key = _LOCK_PREFIX + key
+    payload: str | None = None
+    try:
+        result = await producer()
+        payload = _encode_outcome(token, result=result)
+        return result
+    except HTTPException as exc:
+        payload = _encode_outcome(token, error=exc)
+        raise
+    finally:
+        # Unexpected exceptions publish nothing; followers time out and run it themselves.
+        try:
+            if payload is not None:
+                await redis_client.set(
+                    _RESULT_PREFIX + key, payload, ex=max(1, result_ttl_sec)
+                )
+            if await redis_client.get(lock_key) == token:
+                await redis_client.delete(lock_key)
+        except Exception:
+            pass
+
+
+async def _await_redis_leader(redis_client: Any, key: str, token: str, *, wait_sec: float) -> Any:
+    """Poll for the leader's outcome. Raises TimeoutError if none shows up in time."""
+    lock_key = _LOCK_PREFIX + key
+    result_key = _RESULT_PREFIX + key
+    deadline = time.monotonic() + wait_sec
+    while time.monotonic() < deadline:
+        raw = await redis_client.get(result_key)
+        if raw:
+            result_token, result = _decode_outcome(raw)
+            if result_token == token:
+                return result
+        if await redis_client.get(lock_key) is None and not raw:
+            break
+        await asyncio.sleep(_POLL_SEC)
+    raise TimeoutError(key)
+
+
+async def _coalesce_redis(
+    key: str,
+    producer: Callable[[], Awaitable[Any]],
+    *,
+    scope: str,
+    lock_ttl_sec: int,
+    wait_sec: float,
+) -> Any:
+    redis_client = get_redis_client()
+    if redis_client is None:
+        record_single_flight(scope, "leader")
+        return await producer()
+
+    token = uuid4().hex
+    try:
+        acquired = await redis_client.set(
+            _LOCK_PREFIX + key, token, nx=True, px=max(1, lock_ttl_sec) * 1000
+        )
+        leader_token = None if acquired else await redis_client.get(_LOCK_PREFIX + key)
+    except Exception:
+        record_single_flight(scope, "leader")
+        return await producer()
+
+    if acquired or not leader_token:
+        record_single_flight(scope, "leader")
+        return await _run_redis_leader(
+            redis_client, key, token, producer, result_ttl_sec=lock_ttl_sec
+        )
+
+    record_single_flight(scope, "follower")
+    try:
+        return await _await_redis_leader(redis_client, key, leader_token, wait_sec=wait_sec)
+    except HTTPException:
+        raise
+    except Exception:
+        record_single_flight(scope, "timeout")
+        return await producer()
+
+
+async def coalesce(
+    key: str,
+    producer: Callable[[], Awaitable[Any]],
+    *,
+    scope: str,
+    lock_ttl_sec: int = 60,
+    wait_sec: float = 30.0,
+) -> Any:
+    """Run ``producer`` once for all concurrent callers with the same ``key``."""
+    loop = asyncio.get_running_loop()
+    existing = _inflight.get(key)
+    if existing is not None and existing.get_loop() is loop:
+        record_single_flight(scope, "follower")
+        return await asyncio.shield(existing)
+
+    future: asyncio.Future[Any] = loop.create_future()
+    _inflight[key] = future
+    try:
+        result = await _coalesce_redis(
+            key, producer, scope=scope, lock_ttl_sec=lock_ttl_sec, wait_sec=wait_sec
+        )
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as exc:
+        future.set_exception(exc)
+        # Followers re-raise it; avoid "exception was never retrieved" when there are none.
+        future.exception()
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        if _inflight.get(key) is future:
+            del _inflight[key]
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import json
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
 
 from app.core.config import settings
@@ -17,6 +17,19 @@ def date_key(d: datetime | None = None) -> str:
     return d.strftime("%Y-%m-%d")
 
 
+def month_start(value: datetime) -> datetime:
+    """First instant of ``value``'s month in UTC (naive values are taken as UTC)."""
+    value = value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+    value = value.astimezone(timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(start: datetime, months: int) -> datetime:
+    """First day (UTC) of the month ``months`` after ``start``'s month."""
+    index = start.year * 12 + (start.month - 1) + int(months)
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
 def week_key(d: datetime | None = None) -> str:
     """Return the week-start date key (Monday) in the user's local tz."""
     d = d or now_local()
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import argparse
+
+from app.core.config import settings
+from app.db import get_session
+from app.services.ledger_archive import archive_closed_ledger_months
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Roll up closed XP ledger months and optionally export/prune raw rows."
+    )
+    parser.add_argument("--keep-months", type=int, default=int(settings.ledger_archive_keep_months))
+    parser.add_argument(
+        "--export-dir",
+        default=settings.ledger_archive_dir,
+        help="Directory for gzip JSONL exports. Raw rows are only pruned when set.",
+    )
+    args = parser.parse_args()
+
+    with get_session() as session:
+        months = archive_closed_ledger_months(
+            session,
+            keep_months=max(1, int(args.keep_months)),
+            export_dir=str(args.export_dir or ""),
+        )
+
+    print(f"archived_months={len(months)} months={','.join(months) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Time the achievement counter rebuild on an account with a long history.
+
+Seeds one user with ``--sessions`` study sessions spread over ``--days`` days
+into a scratch database (a temporary SQLite file unless ``--database-url`` is
+given) and compares the aggregate queries used by the rebuild with loading
+every ``(date_key, minutes)`` row into Python, as the rebuild used to:
+
+  cd backend
+  PYTHONPATH=. python scripts/benchmark_achievement_metrics.py --sessions 50000
+
+Exits non-zero when both paths disagree or the aggregate path is slower than
+``--max-ms`` per rebuild.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import insert
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.models import DrillReview, StudySession, User, UserAchievementCounters
+from app.services.achievements import _rebuild_counters
+from app.services.activity import Activity
+
+
+def _legacy_metrics(db: Session, user_id: str) -> tuple[int, int, int, str | None, int]:
+    rows = db.exec(
+        select(StudySession.date_key, StudySession.minutes).where(
+            StudySession.user_id == user_id,
+            StudySession.deleted_at.is_(None),
+        )
+    ).all()
+    totals: dict[str, int] = {}
+    for dk, minutes in rows:
+        totals[str(dk)] = totals.get(str(dk), 0) + int(minutes or 0)
+    streak, end = Activity(minutes_by_day=totals).latest_run()
+    reviews = len(db.exec(select(DrillReview.id).where(DrillReview.user_id == user_id)).all())
+    return len(rows), sum(totals.values()), streak, end, reviews
+
+
+def _aggregate_metrics(db: Session, user_id: str) -> tuple[int, int, int, str | None, int]:
+    counters = UserAchievementCounters(user_id=user_id)
+    _rebuild_counters(db, counters)
+    db.expunge(counters)
+    return (
+        counters.total_sessions,
+        counters.total_minutes,
+        counters.streak_days,
+        counters.streak_end,
+        counters.review_count,
+    )
+
+
+def _seed(db: Session, *, sessions: int, days: int, seed: int) -> str:
+    rng = random.Random(seed)
+    user = User(email="benchmark-achievements@example.com", password_hash="x")
+    db.add(user)
+    db.commit()
+    today = date.today()
+    rows = [
+        {
+            "user_id": user.id,
+            "subject": "SQL",
+            "minutes": rng.randint(5, 90),
+            "date_key": (today - timedelta(days=rng.randrange(days))).isoformat(),
+        }
+        for _ in range(sessions)
+    ]
+    for start in range(0, len(rows), 5000):
+        db.execute(insert(StudySession), rows[start : start + 5000])
+    db.commit()
+    return user.id
+
+
+def _time(fn, db: Session, user_id: str, iterations: int) -> tuple[list[float], tuple]:
+    timings = []
+    result: tuple = ()
+    for _ in range(iterations):
+        started = time.perf_counter()
+        result = fn(db, user_id)
+        timings.append((time.perf_counter() - started) * 1000)
+        db.rollback()
+    return timings, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the achievement counter rebuild against row-by-row loading."
+    )
+    parser.add_argument("--sessions", type=int, default=50_000)
+    parser.add_argument("--days", type=int, default=730, help="History span in days.")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--database-url", default=None, help="Scratch database (tables created).")
+    parser.add_argument("--max-ms", type=float, default=None, help="Fail above this median.")
+    args = parser.parse_args()
+
+    tmp_path = None
+    url = args.database_url
+    if url is None:
+        fd, tmp_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        url = f"sqlite:///{tmp_path}"
+
+    engine = create_engine(url)
+    try:
+        SQLModel.metadata.create_all(engine)
+        with Session(engine) as db:
+            user_id = _seed(
+                db, sessions=max(1, args.sessions), days=max(1, args.days), seed=args.seed
+            )
+            iterations = max(1, args.iterations)
+            legacy_ms, legacy = _time(_legacy_metrics, db, user_id, iterations)
+            aggregate_ms, aggregate = _time(_aggregate_metrics, db, user_id, iterations)
+    finally:
+        engine.dispose()
+        if tmp_path is not None:
+            os.unlink(tmp_path)
+
+    legacy_median = statistics.median(legacy_ms)
+    aggregate_median = statistics.median(aggregate_ms)
+    print(f"sessions={args.sessions} days={args.days} iterations={iterations}")
+    print(f"row-by-row  median {legacy_median:8.2f} ms  max {max(legacy_ms):8.2f} ms")
+    print(f"aggregate   median {aggregate_median:8.2f} ms  max {max(aggregate_ms):8.2f} ms")
+    print(f"speedup     {legacy_median / max(aggregate_median, 1e-9):.1f}x")
+
+    if legacy != aggregate:
+        print(f"MISMATCH: row-by-row={legacy} aggregate={aggregate}")
+        raise SystemExit(1)
+    if args.max_ms is not None and aggregate_median > args.max_ms:
+        print(f"REGRESSION: aggregate median above {args.max_ms} ms")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
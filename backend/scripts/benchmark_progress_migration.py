@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from types import SimpleNamespace
+
+from app.services.mission_generator import (
+    _SUBJECT_FALLBACK_POOL,
+    _migrate_progress,
+    _normalize_text,
+    _subject_bucket,
+    build_fallback_missions,
+)
+
+_AD_HOC_WORDS = [
+    "Estatística", "Álgebra", "Redação", "Lógica", "Spark", "Kafka", "Airflow",
+    "Docker", "Kubernetes", "Modelagem", "Análise", "Visualização", "Inglês",
+]
+
+
+def _ad_hoc_subject(rng: random.Random) -> str:
+    words = rng.sample(_AD_HOC_WORDS, k=rng.randint(1, 3))
+    return f"{' '.join(words)} {rng.randint(1, 99)}"
+
+
+def _existing_rows(rng: random.Random, count: int, ad_hoc_ratio: float) -> list[SimpleNamespace]:
+    rows = []
+    for _ in range(count):
+        if rng.random() < ad_hoc_ratio:
+            subject = _ad_hoc_subject(rng)
+        else:
+            subject = rng.choice(_SUBJECT_FALLBACK_POOL)
+        rows.append(
+            SimpleNamespace(
+                subject=subject,
+                progress_minutes=rng.randint(0, 90),
+                claimed=rng.random() < 0.2,
+            )
+        )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Time _migrate_progress over synthetic quest sets (cold and warm caches)."
+    )
+    parser.add_argument("--rows", type=int, default=200, help="Existing quests per migration.")
+    parser.add_argument("--specs", type=int, default=5, help="New missions per migration.")
+    parser.add_argument("--ad-hoc-ratio", type=float, default=0.6)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    goals = {subject: rng.randint(10, 60) for subject in _SUBJECT_FALLBACK_POOL}
+    specs = build_fallback_missions(goals=goals, cycle="daily", count=max(1, args.specs))
+    workloads = [
+        _existing_rows(rng, max(0, args.rows), args.ad_hoc_ratio)
+        for _ in range(max(1, args.iterations))
+    ]
+
+    for label in ("cold", "warm"):
+        if label == "cold":
+            _normalize_text.cache_clear()
+            _subject_bucket.cache_clear()
+        started = time.perf_counter()
+        for rows in workloads:
+            _migrate_progress(existing_rows=rows, new_specs=specs)
+        elapsed = time.perf_counter() - started
+        per_call_ms = elapsed * 1000 / len(workloads)
+        print(
+            f"{label}: iterations={len(workloads)} rows={args.rows} specs={len(specs)} "
+            f"total_s={elapsed:.3f} per_migration_ms={per_call_ms:.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
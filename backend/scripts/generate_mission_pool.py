@@ -29,7 +29,7 @@ SUBJECTS = [
 
 RANKS = ["F", "E", "D", "C", "B", "A", "S"]
 
-OUTPUT_FILE = "missions_pool.json"
+OUTPUT_FILE = settings.mission_pool_path.strip() or "missions_pool.json"
 
 async def generate_batch_with_retry(prompt, subject, rank, model_name, max_retries=5) -> List[Dict[str, Any]]:
     base_delay = 20  # Start with 20s delay if hit
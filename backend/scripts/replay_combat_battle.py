@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import argparse
+import json
+
+from app.db import get_session
+from app.services.combat import replay_battle
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Re-run a combat battle from its RNG seed and turn log and check the outcomes."
+    )
+    parser.add_argument("battle_ids", nargs="+", help="combat_battles.id values to replay")
+    args = parser.parse_args()
+
+    inconsistent = 0
+    with get_session() as session:
+        for battle_id in args.battle_ids:
+            report = replay_battle(session, battle_id=battle_id)
+            inconsistent += 0 if report["consistent"] else 1
+            print(json.dumps(report, ensure_ascii=False))
+
+    raise SystemExit(1 if inconsistent else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""Monte-Carlo balance simulator for combat tuning.
+
+Plays many battles at once per (module, boss rank, answer accuracy) with NumPy
+arrays, following the rules of app.services.combat: a shuffled deck without
+immediate repeats, player damage as a rolled percentage of the boss max HP, a
+boss hit back while it is alive, and damage-based XP/gold. Every balance
+constant defaults to its live value and can be overridden, so a change can be
+evaluated before deploy:
+
+  cd backend
+  PYTHONPATH=. python scripts/simulate_combat_balance.py --battles 1000000 \\
+      --accuracy 0.5 0.7 0.9 --ranks F D S --boss-damage S=14-18
+
+Requires numpy (listed in requirements-dev.txt; not a runtime dependency).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from dataclasses import dataclass, field, replace
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - dev-only dependency
+    raise SystemExit("numpy is required: pip install -r requirements-dev.txt") from None
+
+from app.services import combat
+from app.services.combat_content import COMBAT_MODULES, CombatModule, get_combat_module
+
+_ONGOING, _VICTORY, _DEFEAT, _FLED = 0, 1, 2, 3
+
+
+@dataclass(frozen=True)
+class Balance:
+    player_max_hp: int = combat.PLAYER_MAX_HP
+    world_boss_hp: int = combat.WORLD_BOSS_HP
+    base_percent_min: float = combat.PLAYER_BASE_PERCENT_MIN
+    base_percent_span: float = combat.PLAYER_BASE_PERCENT_SPAN
+    roll_min: float = combat.PLAYER_ROLL_MIN
+    roll_max: float = combat.PLAYER_ROLL_MAX
+    effective_percent_min: float = combat.PLAYER_EFFECTIVE_PERCENT_MIN
+    effective_percent_max: float = combat.PLAYER_EFFECTIVE_PERCENT_MAX
+    boss_damage: dict[str, tuple[int, int]] = field(
+        default_factory=lambda: dict(combat.BOSS_DAMAGE_BY_RANK)
+    )
+    xp_divisor: int = combat.REWARD_XP_DAMAGE_DIVISOR
+    gold_divisor: int = combat.REWARD_GOLD_DAMAGE_DIVISOR
+    defeat_divisor: int = combat.DEFEAT_REWARD_DIVISOR
+
+
+def _new_decks(
+    rng: np.random.Generator, battles: int, size: int, last: np.ndarray | None
+) -> np.ndarray:
+    decks = rng.permuted(np.tile(np.arange(size, dtype=np.int16), (battles, 1)), axis=1)
+    if last is not None and size > 1:
+        # Same rule as _build_deck: a new deck never starts with the last question.
+        repeat = decks[:, 0] == last
+        decks[repeat, 0], decks[repeat, 1] = decks[repeat, 1], decks[repeat, 0]
+    return decks
+
+
+def simulate(
+    module: CombatModule,
+    *,
+    rank: str,
+    accuracy: float,
+    battles: int,
+    balance: Balance,
+    rng: np.random.Generator,
+    max_turns: int = 500,
+    flee_below_hp: int = 0,
+) -> dict[str, float | int | str | None]:
+    """Simulate ``battles`` battles; a turn is one answered question."""
+    size = len(module.questions)
+    if size == 0:
+        raise ValueError(f"module {module.id} has no questions")
+    low, high = module.damage_bounds
+    damages = np.array([q.damage for q in module.questions], dtype=np.float64)
+    normalized = np.clip((damages - low) / max(1, high - low), 0.0, 1.0)
+    base_percent = balance.base_percent_min + normalized * balance.base_percent_span
+    boss_min, boss_max = balance.boss_damage.get(rank, balance.boss_damage["D"])
+
+    player_hp = np.full(battles, balance.player_max_hp, dtype=np.int64)
+    enemy_hp = np.full(battles, balance.world_boss_hp, dtype=np.int64)
+    turns = np.zeros(battles, dtype=np.int32)
+    outcome = np.full(battles, _ONGOING, dtype=np.int8)
+    decks = _new_decks(rng, battles, size, None)
+
+    # Every ongoing battle answers one question per turn, so all decks advance in step.
+    for turn in range(max_turns):
+        if flee_below_hp > 0:
+            outcome[(outcome == _ONGOING) & (player_hp < flee_below_hp)] = _FLED
+        idx = np.flatnonzero(outcome == _ONGOING)
+        if idx.size == 0:
+            break
+        slot = turn % size
+        if turn and slot == 0:
+            decks = _new_decks(rng, battles, size, decks[:, size - 1])
+        questions = decks[idx, slot]
+
+        correct = rng.random(idx.size) < accuracy
+        roll = rng.uniform(balance.roll_min, balance.roll_max, idx.size)
+        effective = np.clip(
+            base_percent[questions] * roll,
+            balance.effective_percent_min,
+            balance.effective_percent_max,
+        )
+        hit = np.maximum(1, np.rint(balance.world_boss_hp * effective)).astype(np.int64)
+        enemy_left = np.maximum(0, enemy_hp[idx] - np.where(correct, hit, 0))
+        enemy_hp[idx] = enemy_left
+        won = enemy_left <= 0
+
+        boss_hit = rng.integers(boss_min, boss_max + 1, idx.size)
+        boss_hit[won] = 0
+        player_left = np.maximum(0, player_hp[idx] - boss_hit)
+        player_hp[idx] = player_left
+        turns[idx] += 1
+
+        outcome[idx[won]] = _VICTORY
+        outcome[idx[~won & (player_left <= 0)]] = _DEFEAT
+
+    dealt = balance.world_boss_hp - enemy_hp
+    defeated = outcome == _DEFEAT
+    xp = dealt // balance.xp_divisor
+    gold = dealt // balance.gold_divisor
+    xp[defeated] //= balance.defeat_divisor
+    gold[defeated] //= balance.defeat_divisor
+    # Battles still running at max_turns are counted as fled (flee pays like victory).
+    outcome[outcome == _ONGOING] = _FLED
+
+    victories = turns[outcome == _VICTORY]
+    kill_turns = (
+        [float(v) for v in np.percentile(victories, [10, 50, 90])]
+        if victories.size
+        else [None, None, None]
+    )
+    total_turns = max(1, int(turns.sum()))
+    return {
+        "module": module.id,
+        "rank": rank,
+        "accuracy": accuracy,
+        "battles": battles,
+        "winRate": float((outcome == _VICTORY).mean()),
+        "defeatRate": float(defeated.mean()),
+        "fleeRate": float((outcome == _FLED).mean()),
+        "turnsToKillP10": kill_turns[0],
+        "turnsToKillP50": kill_turns[1],
+        "turnsToKillP90": kill_turns[2],
+        "turnsMean": float(turns.mean()),
+        "xpMean": float(xp.mean()),
+        "goldMean": float(gold.mean()),
+        "xpPerTurn": float(xp.sum() / total_turns),
+    }
+
+
+def _boss_damage_override(raw: str) -> tuple[str, tuple[int, int]]:
+    try:
+        rank, bounds = raw.split("=", 1)
+        low, high = (int(part) for part in bounds.split("-", 1))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected RANK=MIN-MAX, got {raw!r}") from None
+    if low < 0 or high < low:
+        raise argparse.ArgumentTypeError(f"invalid damage range in {raw!r}")
+    return rank.strip().upper(), (low, high)
+
+
+def _print_table(rows: list[dict[str, float | int | str | None]]) -> None:
+    header = (
+        f"{'module':<12} {'rank':<4} {'acc':>5} {'win':>7} {'defeat':>7} {'flee':>7} "
+        f"{'kill p10/p50/p90':>18} {'turns':>6} {'xp':>10} {'gold':>9} {'xp/turn':>9}"
+    )
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        kill = "/".join(
+            "-" if row[key] is None else f"{row[key]:.0f}"
+            for key in ("turnsToKillP10", "turnsToKillP50", "turnsToKillP90")
+        )
+        print(
+            f"{row['module']:<12} {row['rank']:<4} {row['accuracy']:>5.2f} "
+            f"{row['winRate']:>7.2%} {row['defeatRate']:>7.2%} {row['fleeRate']:>7.2%} "
+            f"{kill:>18} {row['turnsMean']:>6.1f} {row['xpMean']:>10.0f} "
+            f"{row['goldMean']:>9.0f} {row['xpPerTurn']:>9.0f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Simulate combat battles to evaluate balance constants before deploy."
+    )
+    parser.add_argument("--modules", nargs="*", help="Module ids (default: all modules).")
+    parser.add_argument(
+        "--ranks", nargs="*", help="Boss ranks to simulate (default: each module's own rank)."
+    )
+    parser.add_argument("--accuracy", type=float, nargs="+", default=[0.5, 0.7, 0.9])
+    parser.add_argument("--battles", type=int, default=1_000_000)
+    parser.add_argument("--max-turns", type=int, default=500)
+    parser.add_argument(
+        "--flee-below-hp",
+        type=int,
+        default=0,
+        help="Player flees once HP drops below this value (0 = never flee).",
+    )
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", action="store_true", help="Print one JSON object per row.")
+
+    tuning = parser.add_argument_group("balance overrides")
+    tuning.add_argument("--player-max-hp", type=int)
+    tuning.add_argument("--world-boss-hp", type=int)
+    tuning.add_argument("--base-percent-min", type=float)
+    tuning.add_argument("--base-percent-span", type=float)
+    tuning.add_argument("--roll-min", type=float)
+    tuning.add_argument("--roll-max", type=float)
+    tuning.add_argument("--effective-percent-min", type=float)
+    tuning.add_argument("--effective-percent-max", type=float)
+    tuning.add_argument(
+        "--boss-damage",
+        type=_boss_damage_override,
+        action="append",
+        default=[],
+        metavar="RANK=MIN-MAX",
+    )
+    tuning.add_argument("--xp-divisor", type=int)
+    tuning.add_argument("--gold-divisor", type=int)
+    tuning.add_argument("--defeat-divisor", type=int)
+    args = parser.parse_args()
+
+    overrides = {
+        name: getattr(args, name)
+        for name in (
+            "player_max_hp",
+            "world_boss_hp",
+            "base_percent_min",
+            "base_percent_span",
+            "roll_min",
+            "roll_max",
+            "effective_percent_min",
+            "effective_percent_max",
+            "xp_divisor",
+            "gold_divisor",
+            "defeat_divisor",
+        )
+        if getattr(args, name) is not None
+    }
+    balance = replace(Balance(), **overrides)
+    balance.boss_damage.update(dict(args.boss_damage))
+
+    modules = [get_combat_module(m) for m in args.modules] if args.modules else COMBAT_MODULES
+    rng = np.random.default_rng(args.seed)
+    rows = []
+    started = time.perf_counter()
+    for module in modules:
+        for rank in args.ranks or [module.boss.rank.upper()]:
+            for accuracy in args.accuracy:
+                rows.append(
+                    simulate(
+                        module,
+                        rank=rank.upper(),
+                        accuracy=min(1.0, max(0.0, accuracy)),
+                        battles=max(1, args.battles),
+                        balance=balance,
+                        rng=rng,
+                        max_turns=max(1, args.max_turns),
+                        flee_below_hp=max(0, args.flee_below_hp),
+                    )
+                )
+    elapsed = time.perf_counter() - started
+
+    if args.json:
+        for row in rows:
+            print(json.dumps(row))
+    else:
+        _print_table(rows)
+        print(f"\n{len(rows)} scenarios x {args.battles} battles in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,8 @@ os.environ.setdefault("AUTO_CREATE_DB", "true")
 os.environ.setdefault("CORS_ORIGINS", "http://127.0.0.1:3000")
 os.environ.setdefault("RATE_LIMIT_AUTH_MAX", "1000")
 os.environ.setdefault("ADMIN_EMAILS", "admin@example.com")
+# Tests read audit rows right after requests; write them inline.
+os.environ.setdefault("AUDIT_WRITE_MODE", "sync")
 
 TEST_DB = pathlib.Path(__file__).parent / "test.db"
 os.environ.setdefault("DATABASE_URL", f"sqlite:///{TEST_DB}")
@@ -25,6 +27,56 @@ from fastapi.testclient import TestClient  # noqa: E402
 from app.main import app  # noqa: E402
 
 
+@pytest.fixture(autouse=True)
+def _reset_ai_scheduler():
+    # Provider backoffs are per API key and process-wide; stubs reuse the same fake keys.
+    from app.services.ai_scheduler import ai_scheduler
+
+    ai_scheduler.reset()
+    yield
+    ai_scheduler.reset()
+
+
+class FakeRedis:
+    """Dict-backed stand-in for the few redis-py calls the caches make (TTLs ignored)."""
+
+    def __init__(self) -> None:
+        self.data: dict[str, str] = {}
+
+    def get(self, key: str) -> str | None:
+        return self.data.get(key)
+
+    def set(self, key: str, value: str, ex: int | None = None) -> bool:
+        self.data[key] = value
+        return True
+
+    def delete(self, *keys: str) -> int:
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def mget(self, keys: list[str]) -> list[str | None]:
+        return [self.data.get(key) for key in keys]
+
+    def incr(self, key: str) -> int:
+        value = int(self.data.get(key, 0)) + 1
+        self.data[key] = str(value)
+        return value
+
+    def expire(self, key: str, seconds: int) -> bool:
+        return key in self.data
+
+
+@pytest.fixture()
+def fake_redis(monkeypatch) -> FakeRedis:
+    """Point the Redis-backed caches at an in-memory fake for one test."""
+    from app.services import combat_state, inventory
+
+    fake = FakeRedis()
+    for module in (combat_state, inventory):
+        monkeypatch.setattr(module, "_redis", fake)
+        monkeypatch.setattr(module, "_redis_ready", True)
+    return fake
+
+
 @pytest.fixture()
 def client() -> TestClient:
     with TestClient(app) as c:
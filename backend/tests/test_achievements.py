@@ -27,3 +27,49 @@ def test_achievements_endpoint_no_longer_raises_500(client, csrf_headers):
     assert after.status_code == 200
     unlocked = {a["key"]: bool(a["unlocked"]) for a in after.json()}
     assert unlocked.get("first_session") is True
+
+
+def _counters(email: str):
+    from sqlmodel import select
+
+    from app.db import get_session
+    from app.models import User, UserAchievementCounters
+
+    with get_session() as db:
+        user = db.exec(select(User).where(User.email == email)).one()
+        row = db.get(UserAchievementCounters, user.id)
+        return (row.total_sessions, row.total_minutes, row.streak_days, row.stale)
+
+
+def test_achievement_counters_follow_writes(client, csrf_headers):
+    from datetime import datetime, timezone
+
+    email = "achievement-counters@example.com"
+    _signup(client, csrf_headers, email=email)
+    today = datetime.now(timezone.utc).date().isoformat()
+
+    for minutes in (60, 45):
+        r = client.post(
+            "/api/v1/sessions",
+            json={"subject": "SQL", "minutes": minutes, "mode": "pomodoro", "date": today},
+            headers=csrf_headers(),
+        )
+        assert r.status_code == 201
+    assert _counters(email) == (2, 105, 1, False)
+
+    # Unlocked on the write path; listing does not need to rebuild.
+    unlocked = {a["key"]: a["unlocked"] for a in client.get("/api/v1/achievements").json()}
+    assert unlocked["first_session"] is True
+    assert unlocked["hundred_minutes"] is True
+    assert unlocked["streak_3"] is False
+
+    sessions = client.get("/api/v1/sessions").json()["sessions"]
+    forty_five = next(s["id"] for s in sessions if s["minutes"] == 45)
+    r = client.delete(f"/api/v1/sessions/{forty_five}", headers=csrf_headers())
+    assert r.status_code == 204
+    assert _counters(email)[3] is True
+
+    # Stale counters are rebuilt on next use; unlocks are never revoked.
+    unlocked = {a["key"]: a["unlocked"] for a in client.get("/api/v1/achievements").json()}
+    assert unlocked["hundred_minutes"] is True
+    assert _counters(email) == (1, 60, 1, False)
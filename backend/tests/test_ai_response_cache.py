@@ -0,0 +1,77 @@
+from app.core.metrics import AI_CACHE_HITS_TOTAL
+from app.services import ai_rate_limiter as rl_module
+from app.services import gemini_client as gc_module
+from app.services.ai_response_cache import cache_key, response_cache
+
+
+class _CountingModels:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_content(self, *, model, contents, config=None):
+        self.calls += 1
+        return type("Resp", (), {"text": f'{{"resposta": "call {self.calls}"}}'})()
+
+
+class _CountingClient:
+    def __init__(self):
+        self.models = _CountingModels()
+
+
+def _stub_provider(monkeypatch) -> _CountingModels:
+    stub = _CountingClient()
+    monkeypatch.setattr(
+        gc_module, "_create_client_tuple",
+        lambda **_: (stub, "gemini-2.0-flash", {}),
+    )
+    monkeypatch.setattr(gc_module, "get_api_key", lambda **kwargs: "fake-key")
+    return stub.models
+
+
+def test_cache_key_normalizes_prompt_whitespace():
+    a = cache_key(models=["m"], prompt="Explique  SQL\n joins ")
+    b = cache_key(models=["m"], prompt="Explique SQL joins")
+    assert a == b
+    assert a != cache_key(models=["m"], prompt="Explique SQL joins", system_instruction="x")
+    assert a != cache_key(models=["m2"], prompt="Explique SQL joins")
+
+
+def test_ai_text_serves_identical_prompts_from_cache(client, csrf_headers, monkeypatch):
+    response_cache.clear()
+    models = _stub_provider(monkeypatch)
+    r = client.post(
+        "/api/v1/auth/signup",
+        json={"email": "ai-cache@example.com", "password": "secret123"},
+        headers=csrf_headers(),
+    )
+    assert r.status_code == 200
+
+    hits_before = AI_CACHE_HITS_TOTAL.labels(scope="ai_text")._value.get()
+    first = client.post(
+        "/api/v1/ai/text", json={"prompt": "Resumo de SQL"}, headers=csrf_headers()
+    )
+    second = client.post(
+        "/api/v1/ai/text", json={"prompt": "  Resumo   de SQL "}, headers=csrf_headers()
+    )
+    assert first.status_code == 200
+    assert second.status_code == 200
+    assert first.json()["text"] == second.json()["text"]
+    assert models.calls == 1
+    assert AI_CACHE_HITS_TOTAL.labels(scope="ai_text")._value.get() == hits_before + 1
+    response_cache.clear()
+
+
+def test_hunter_chat_is_not_cached_by_default(client, csrf_headers, monkeypatch):
+    rl_module._guest_daily_hits.clear()
+    models = _stub_provider(monkeypatch)
+
+    for _ in range(2):
+        r = client.post(
+            "/api/v1/ai/hunter",
+            json={"mensagem": "Hunter: estudei SQL"},
+            headers=csrf_headers(),
+        )
+        assert r.status_code == 200
+    assert models.calls == 2
+
+    rl_module._guest_daily_hits.clear()
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services import ai_scheduler as scheduler_module
+from app.services import gemini_client as gc_module
+from app.services.ai_scheduler import AIRequestScheduler, SchedulerRejected
+
+
+def test_scheduler_queues_bursts_over_concurrency(monkeypatch):
+    monkeypatch.setattr(settings, "ai_scheduler_user_concurrency", 1)
+    monkeypatch.setattr(settings, "ai_scheduler_max_wait_ms", 2000)
+    scheduler = AIRequestScheduler()
+    order: list[str] = []
+
+    async def _call(name: str) -> None:
+        async with scheduler.slot("byo-key", prompt="oi"):
+            order.append(f"start:{name}")
+            await asyncio.sleep(0.05)
+            order.append(f"end:{name}")
+
+    async def _run() -> int:
+        first = asyncio.ensure_future(_call("a"))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(_call("b"))
+        await asyncio.sleep(0.01)
+        depth = scheduler.queue_depth("byo-key")
+        await asyncio.gather(first, second)
+        return depth
+
+    assert asyncio.run(_run()) == 1
+    assert order == ["start:a", "end:a", "start:b", "end:b"]
+
+
+def test_scheduler_rejects_when_request_budget_exceeds_deadline(monkeypatch):
+    monkeypatch.setattr(settings, "ai_scheduler_user_rpm", 2)
+    monkeypatch.setattr(settings, "ai_scheduler_max_wait_ms", 100)
+    scheduler = AIRequestScheduler()
+
+    async def _run() -> None:
+        for _ in range(2):
+            async with scheduler.slot("byo-key"):
+                pass
+        async with scheduler.slot("byo-key"):
+            pass
+
+    with pytest.raises(SchedulerRejected) as exc:
+        asyncio.run(_run())
+    assert exc.value.reason == "deadline"
+    assert exc.value.key_kind == "user"
+    assert exc.value.retry_after_sec >= 59
+
+
+def test_scheduler_drops_idle_keys(monkeypatch):
+    # A zero-length window makes every finished key idle right away.
+    monkeypatch.setattr(scheduler_module, "_WINDOW_SEC", 0.0)
+    scheduler = AIRequestScheduler()
+
+    async def _run() -> None:
+        for key in ("byo-a", "byo-b", "byo-c"):
+            async with scheduler.slot(key):
+                pass
+
+    asyncio.run(_run())
+    assert scheduler.tracked_keys() == 1
+
+
+def test_provider_quota_error_pauses_the_key(monkeypatch):
+    calls: list[str] = []
+
+    class _QuotaModels:
+        def generate_content(self, *, model, contents, config=None):
+            calls.append(model)
+            raise RuntimeError("429 RESOURCE_EXHAUSTED: quota exceeded, retry after 30 seconds")
+
+    class _QuotaClient:
+        models = _QuotaModels()
+
+    monkeypatch.setattr(
+        gc_module, "_create_client_tuple", lambda **_: (_QuotaClient(), "gemini-test", {})
+    )
+    monkeypatch.setattr(settings, "gemini_model_chain", "gemini-test")
+
+    async def _generate() -> None:
+        await gc_module.generate_content_text(prompt="ping", api_key="quota-key")
+
+    with pytest.raises(gc_module.GeminiError) as first:
+        asyncio.run(_generate())
+    assert first.value.details["retryAfterSec"] == 30
+    assert calls == ["gemini-test"]
+
+    with pytest.raises(gc_module.GeminiError) as second:
+        asyncio.run(_generate())
+    assert second.value.code == "ai_quota_exceeded"
+    assert second.value.details["reason"] == "backoff"
+    assert second.value.details["retryAfterSec"] >= 29
+    assert calls == ["gemini-test"]
@@ -0,0 +1,113 @@
+import json
+
+from app.api.v1.ai import _JsonStringFieldStream
+from app.core.config import settings
+from app.services import ai_rate_limiter as rl_module
+from app.services import gemini_client as gc_module
+
+
+class _Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class _StreamModels:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def generate_content_stream(self, *, model, contents, config=None):
+        return iter(_Chunk(c) for c in self.chunks)
+
+
+class _StreamClient:
+    def __init__(self, chunks):
+        self.models = _StreamModels(chunks)
+
+
+def _stub_stream(monkeypatch, chunks):
+    monkeypatch.setattr(
+        gc_module, "_create_client_tuple",
+        lambda **_: (_StreamClient(chunks), "gemini-2.0-flash", {}),
+    )
+    monkeypatch.setattr(gc_module, "get_api_key", lambda **kwargs: "fake-key")
+
+
+def _events(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_json_field_stream_decodes_across_chunk_boundaries():
+    field = _JsonStringFieldStream("resposta_texto")
+    pieces = [
+        '{"resposta_',
+        'texto": "[STA',
+        'TUS] linha\\',
+        'n ok \\u00e',
+        '9 \\"x\\"", "xp_ganho": 5}',
+    ]
+    assert "".join(field.feed(p) for p in pieces) == '[STATUS] linha\n ok é "x"'
+
+
+def test_ai_text_stream_forwards_chunks(client, csrf_headers, monkeypatch):
+    _stub_stream(monkeypatch, ["Ola ", "Hunter", "!"])
+    r = client.post(
+        "/api/v1/auth/signup",
+        json={"email": "ai-stream@example.com", "password": "secret123"},
+        headers=csrf_headers(),
+    )
+    assert r.status_code == 200
+
+    r = client.post("/api/v1/ai/text/stream", json={"prompt": "oi"}, headers=csrf_headers())
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/event-stream")
+    events = _events(r.text)
+    assert [name for name, _ in events] == ["delta", "delta", "delta", "done"]
+    assert events[-1][1]["text"] == "Ola Hunter!"
+
+
+def test_hunter_stream_emits_reply_deltas_and_final_result(client, csrf_headers, monkeypatch):
+    rl_module._guest_daily_hits.clear()
+    _stub_stream(
+        monkeypatch,
+        [
+            '{"resposta_texto": "[STATUS] ',
+            'Evolucao detectada.", "xp_ganho": 15, ',
+            '"missao_concluida": true, "status_mensagem": "Continue."}',
+        ],
+    )
+
+    r = client.post(
+        "/api/v1/ai/hunter/stream",
+        json={"mensagem": "Hunter: terminei SQL"},
+        headers=csrf_headers(),
+    )
+    assert r.status_code == 200
+    events = _events(r.text)
+    deltas = "".join(data["text"] for name, data in events if name == "delta")
+    assert deltas == "[STATUS] Evolucao detectada."
+    name, result = events[-1]
+    assert name == "result"
+    assert result["xp_ganho"] == 15
+    assert result["missao_concluida"] is True
+    rl_module._guest_daily_hits.clear()
+
+
+def test_hunter_stream_returns_503_when_provider_is_not_configured(client, csrf_headers):
+    rl_module._guest_daily_hits.clear()
+    prev_key = settings.gemini_api_key
+    try:
+        settings.gemini_api_key = ""
+        r = client.post(
+            "/api/v1/chat/stream",
+            json={"mensagem": "Hunter: status"},
+            headers=csrf_headers(),
+        )
+        assert r.status_code == 503
+        assert r.json()["code"] == "ai_unavailable"
+    finally:
+        settings.gemini_api_key = prev_key
+        rl_module._guest_daily_hits.clear()
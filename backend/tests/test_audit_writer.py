@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from sqlmodel import select
+
+from app.core.audit import AuditWriter
+from app.db import get_session
+from app.models import AuditEvent
+
+
+def _row(event: str, idx: int) -> dict:
+    return {
+        "id": str(uuid4()),
+        "user_id": None,
+        "event": event,
+        "metadata_json": {"request_id": "req-audit-writer", "idx": idx},
+        "ip": "127.0.0.1",
+        "user_agent": "pytest",
+        "created_at": datetime.now(timezone.utc),
+    }
+
+
+def _stored_indexes(event: str) -> list[int]:
+    with get_session() as db:
+        rows = db.exec(
+            select(AuditEvent).where(AuditEvent.event == event).order_by(AuditEvent.created_at)
+        ).all()
+    return [int(row.metadata_json["idx"]) for row in rows]
+
+
+def test_audit_writer_flushes_batches_in_order(client):
+    writer = AuditWriter(max_queue=100, batch_size=2, flush_interval_s=0.05, autostart=False)
+    for idx in range(5):
+        writer.submit(_row("audit.writer.batch", idx))
+
+    assert _stored_indexes("audit.writer.batch") == []
+    assert writer.flush() == 5
+    assert _stored_indexes("audit.writer.batch") == [0, 1, 2, 3, 4]
+
+
+def test_audit_writer_spills_overflow_and_replays_it(client, tmp_path):
+    spill = tmp_path / "audit-spill.jsonl"
+    writer = AuditWriter(
+        max_queue=1,
+        batch_size=10,
+        flush_interval_s=0.05,
+        spill_path=str(spill),
+        autostart=False,
+    )
+    for idx in range(3):
+        writer.submit(_row("audit.writer.spill", idx))
+
+    assert len(spill.read_text(encoding="utf-8").splitlines()) == 2
+    assert writer.flush() == 3
+    assert not spill.exists()
+    assert sorted(_stored_indexes("audit.writer.spill")) == [0, 1, 2]
+
+
+def test_audit_writer_background_thread_drains_queue(client):
+    writer = AuditWriter(max_queue=100, batch_size=10, flush_interval_s=0.05)
+    writer.submit(_row("audit.writer.thread", 0))
+    writer.stop()
+    assert _stored_indexes("audit.writer.thread") == [0]
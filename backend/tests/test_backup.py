@@ -1,3 +1,6 @@
+from app.core.rate_limit import limiter
+
+
 def _signup(client, csrf_headers, email="backup@example.com"):
     r = client.post(
         "/api/v1/auth/signup",
@@ -72,3 +75,277 @@ def test_backup_import_rejects_too_many_sessions(client, csrf_headers):
     }
     imported = client.post("/api/v1/backup/import", json=payload, headers=csrf_headers())
     assert imported.status_code == 422
+
+
+def _reset_import_rate_limit() -> None:
+    limiter.reset()
+
+
+def _roundtrip_payload(prefix: str, global_drill_id: str) -> dict:
+    return {
+        "version": 1,
+        "goals": {"SQL": 45},
+        "sessions": [
+            {
+                "id": f"{prefix}-s-{idx}",
+                "subject": "SQL",
+                "minutes": 20,
+                "mode": "pomodoro",
+                "notes": None,
+                "date": "2026-02-13",
+                "startedAt": "2026-02-13T10:00:00Z",
+                "createdAt": "2026-02-13T10:00:00Z",
+            }
+            for idx in range(3)
+        ],
+        "dailyQuests": [],
+        "drillReviews": [
+            {
+                "id": f"{prefix}-r-1",
+                "drillId": global_drill_id,
+                "nextReviewAt": "2026-02-14T10:00:00Z",
+                "intervalDays": 1,
+                "ease": 2.5,
+                "reps": 1,
+                "lastResult": "good",
+                "updatedAt": "2026-02-13T10:00:00Z",
+            }
+        ],
+        "customDrills": [
+            {
+                "id": global_drill_id,
+                "subject": "SQL",
+                "question": "Custom question?",
+                "answer": "Custom answer.",
+                "tags": ["custom"],
+            }
+        ],
+    }
+
+
+def test_backup_import_remaps_colliding_custom_drills(client, csrf_headers):
+    _signup(client, csrf_headers, email="backup-bulk@example.com")
+    _reset_import_rate_limit()
+    global_drill_id = client.get("/api/v1/drills?limit=1").json()["drills"][0]["id"]
+
+    imported = client.post(
+        "/api/v1/backup/import",
+        json=_roundtrip_payload("bulk", global_drill_id),
+        headers=csrf_headers(),
+    )
+    assert imported.status_code == 204
+
+    exported = client.get("/api/v1/backup/export").json()
+    assert {s["id"] for s in exported["sessions"]} == {"bulk-s-0", "bulk-s-1", "bulk-s-2"}
+    remapped_id = exported["customDrills"][0]["id"]
+    assert remapped_id != global_drill_id
+    assert remapped_id.endswith(global_drill_id)
+    assert exported["drillReviews"][0]["drillId"] == remapped_id
+
+
+def test_backup_import_job_reports_progress(client, csrf_headers):
+    _signup(client, csrf_headers, email="backup-job@example.com")
+    _reset_import_rate_limit()
+    global_drill_id = client.get("/api/v1/drills?limit=1").json()["drills"][0]["id"]
+
+    created = client.post(
+        "/api/v1/backup/import/jobs",
+        json=_roundtrip_payload("job", global_drill_id),
+        headers=csrf_headers(),
+    )
+    assert created.status_code == 202
+    job_id = created.json()["id"]
+
+    status = client.get(f"/api/v1/backup/import/jobs/{job_id}")
+    assert status.status_code == 200
+    body = status.json()
+    assert body["status"] == "done"
+    assert body["processed"] == body["total"] == 5
+
+    exported = client.get("/api/v1/backup/export").json()
+    assert len(exported["sessions"]) == 3
+
+    assert client.get("/api/v1/backup/import/jobs/unknown").status_code == 404
+
+
+def test_failed_replace_job_keeps_previous_data(client, csrf_headers, monkeypatch):
+    import app.services.backup as backup_service
+
+    _signup(client, csrf_headers, email="backup-job-fail@example.com")
+    _reset_import_rate_limit()
+    created = client.post(
+        "/api/v1/sessions",
+        json={"subject": "SQL", "minutes": 30, "mode": "pomodoro"},
+        headers=csrf_headers(),
+    )
+    assert created.status_code == 201
+    global_drill_id = client.get("/api/v1/drills?limit=1").json()["drills"][0]["id"]
+
+    def _broken_reviews(*_args, **_kwargs):
+        raise RuntimeError("disk full")
+        yield  # pragma: no cover
+
+    monkeypatch.setattr(backup_service, "_review_rows", _broken_reviews)
+    job = client.post(
+        "/api/v1/backup/import/jobs",
+        json=_roundtrip_payload("fail", global_drill_id),
+        headers=csrf_headers(),
+    ).json()
+
+    body = client.get(f"/api/v1/backup/import/jobs/{job['id']}").json()
+    assert body["status"] == "failed"
+    assert body["error"] == "RuntimeError"
+    sessions = client.get("/api/v1/backup/export").json()["sessions"]
+    assert [s["subject"] for s in sessions] == ["SQL"]
+    assert all(not s["id"].startswith("fail-") for s in sessions)
+
+
+def test_stalled_import_job_is_reported_failed(client, csrf_headers):
+    from datetime import datetime, timedelta, timezone
+
+    from sqlmodel import select
+
+    from app.db import get_session
+    from app.models import BackupImportJob, User
+
+    _signup(client, csrf_headers, email="backup-job-stalled@example.com")
+    # A job whose worker crashed mid-import: still running, no update for an hour.
+    stalled_at = datetime.now(timezone.utc) - timedelta(hours=1)
+    with get_session() as db:
+        user_id = db.exec(
+            select(User.id).where(User.email == "backup-job-stalled@example.com")
+        ).one()
+        job = BackupImportJob(
+            user_id=user_id, status="running", phase="sessions", updated_at=stalled_at
+        )
+        db.add(job)
+        db.commit()
+        job_id = job.id
+
+    body = client.get(f"/api/v1/backup/import/jobs/{job_id}").json()
+    assert body["status"] == "failed"
+    assert body["error"] == "stalled"
+
+
+def test_incremental_export_and_merge_import(client, csrf_headers):
+    _signup(client, csrf_headers, email="backup-incremental@example.com")
+    _reset_import_rate_limit()
+
+    first = client.post(
+        "/api/v1/sessions",
+        json={"subject": "SQL", "minutes": 30, "mode": "pomodoro"},
+        headers=csrf_headers(),
+    )
+    assert first.status_code == 201
+    full = client.get("/api/v1/backup/export").json()
+    assert full["since"] is None
+    assert full["xpLedger"] == []
+    first_id = full["sessions"][0]["id"]
+
+    second = client.post(
+        "/api/v1/sessions",
+        json={"subject": "Excel", "minutes": 20, "mode": "pomodoro"},
+        headers=csrf_headers(),
+    )
+    assert second.status_code == 201
+    assert client.delete(f"/api/v1/sessions/{first_id}", headers=csrf_headers()).status_code == 204
+
+    delta = client.get("/api/v1/backup/export", params={"since": full["exportedAt"]}).json()
+    assert delta["since"] is not None
+    assert [s["subject"] for s in delta["sessions"]] == ["Excel"]
+    assert delta["deletedSessionIds"] == [first_id]
+    assert delta["xpLedger"]
+
+    # Restore the full snapshot, then replay the delta on top of it.
+    sections = ("version", "goals", "sessions", "dailyQuests", "drillReviews", "customDrills")
+    full_payload = {k: full[k] for k in sections}
+    restored = client.post("/api/v1/backup/import", json=full_payload, headers=csrf_headers())
+    assert restored.status_code == 204
+    assert [s["id"] for s in client.get("/api/v1/sessions").json()["sessions"]] == [first_id]
+
+    delta_payload = {k: v for k, v in delta.items() if k not in ("exportedAt", "since", "user")}
+    merged = client.post(
+        "/api/v1/backup/import",
+        params={"mode": "merge"},
+        json=delta_payload,
+        headers=csrf_headers(),
+    )
+    assert merged.status_code == 204
+    remaining = client.get("/api/v1/sessions").json()["sessions"]
+    assert [s["subject"] for s in remaining] == ["Excel"]
+
+
+def test_incremental_export_keeps_rows_committed_after_the_previous_export(
+    client, csrf_headers
+):
+    from datetime import datetime, timedelta
+
+    from sqlmodel import select
+
+    from app.db import get_session
+    from app.models import StudySession, User
+
+    _signup(client, csrf_headers, email="backup-watermark@example.com")
+    full = client.get("/api/v1/backup/export").json()
+    exported_at = datetime.fromisoformat(full["exportedAt"])
+
+    # Stamped just before that export's reads, but committed only after them.
+    with get_session() as db:
+        user_id = db.exec(
+            select(User.id).where(User.email == "backup-watermark@example.com")
+        ).one()
+        stamped = exported_at - timedelta(seconds=30)
+        db.add(
+            StudySession(
+                user_id=user_id,
+                subject="Late",
+                minutes=10,
+                date_key=stamped.date().isoformat(),
+                created_at=stamped,
+                updated_at=stamped,
+            )
+        )
+        db.commit()
+
+    delta = client.get("/api/v1/backup/export", params={"since": full["exportedAt"]}).json()
+    assert [s["subject"] for s in delta["sessions"]] == ["Late"]
+
+
+def test_merge_import_ignores_ledger_and_keeps_created_at(client, csrf_headers):
+    from sqlmodel import select
+
+    from app.db import get_session
+    from app.models import Drill, XpLedgerEvent
+
+    _signup(client, csrf_headers, email="backup-ledger@example.com")
+    _reset_import_rate_limit()
+    drill = {"id": "ledger-drill", "subject": "SQL", "question": "Q?", "answer": "A", "tags": []}
+    payload = {"version": 1, "goals": {}, "customDrills": [drill]}
+    first = client.post(
+        "/api/v1/backup/import", params={"mode": "merge"}, json=payload, headers=csrf_headers()
+    )
+    assert first.status_code == 204
+    with get_session() as db:
+        created_at = db.get(Drill, "ledger-drill").created_at
+
+    forged = {
+        "id": "forged-event",
+        "eventType": "session.create",
+        "sourceType": "session",
+        "sourceRef": "forged",
+        "xpDelta": 1_000_000,
+        "goldDelta": 1_000_000,
+        "createdAt": "2026-02-13T10:00:00Z",
+    }
+    payload["customDrills"] = [{**drill, "answer": "B"}]
+    payload["xpLedger"] = [forged]
+    merged = client.post(
+        "/api/v1/backup/import", params={"mode": "merge"}, json=payload, headers=csrf_headers()
+    )
+    assert merged.status_code == 204
+
+    with get_session() as db:
+        stored = db.get(Drill, "ledger-drill")
+        assert stored.answer == "B"
+        assert stored.created_at == created_at
+        assert db.exec(select(XpLedgerEvent).where(XpLedgerEvent.id == "forged-event")).first() is None
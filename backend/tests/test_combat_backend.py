@@ -246,3 +246,176 @@ def test_combat_answer_requires_idempotency_key(client, csrf_headers):
     )
     assert answer.status_code == 422
     assert answer.json()["code"] == "idempotency_key_required"
+
+
+def test_combat_turn_answers_and_draws_with_write_behind_cache(
+    client, csrf_headers, monkeypatch, fake_redis
+):
+    from app.core.config import settings
+    from app.models import CombatBattle
+    from app.services import combat_state
+
+    monkeypatch.setattr(settings, "combat_state_cache_enabled", True)
+    monkeypatch.setattr(settings, "combat_state_flush_every", 2)
+    _signup(client, csrf_headers, email="combat-turn@example.com")
+
+    start = client.post(
+        "/api/v1/combat/start",
+        json={"moduleId": "basic", "reset": True},
+        headers=_headers(csrf_headers, "combat-turn-start"),
+    )
+    battle_id = start.json()["battleState"]["battleId"]
+    q = client.post(
+        "/api/v1/combat/question",
+        json={"battleId": battle_id},
+        headers=_headers(csrf_headers, "combat-turn-question"),
+    )
+    assert q.status_code == 200
+    question = q.json()["question"]
+
+    # The draw is cached: the row still holds the initial idle state.
+    with get_session() as session:
+        row = session.get(CombatBattle, battle_id)
+        assert row.turn_state == "PLAYER_IDLE"
+
+    turn = client.post(
+        "/api/v1/combat/turn",
+        json={
+            "battleId": battle_id,
+            "questionId": question["id"],
+            "optionIndex": _question_answer(question["text"]),
+        },
+        headers=_headers(csrf_headers, "combat-turn-1"),
+    )
+    assert turn.status_code == 200
+    body = turn.json()
+    assert body["result"] == "correct"
+    assert body["battleState"]["turn"] == "PLAYER_QUIZ"
+    assert body["nextQuestion"]["id"] != question["id"]
+    assert "correctAnswer" not in body["nextQuestion"]
+
+    replay = client.post(
+        "/api/v1/combat/turn",
+        json={
+            "battleId": battle_id,
+            "questionId": question["id"],
+            "optionIndex": _question_answer(question["text"]),
+        },
+        headers=_headers(csrf_headers, "combat-turn-1"),
+    )
+    assert replay.json() == body
+
+    # The second cached save (draw, then turn) reached flush_every: the row caught up.
+    with get_session() as session:
+        row = session.get(CombatBattle, battle_id)
+        assert row.turn_state == "PLAYER_QUIZ"
+        assert row.current_question_id == body["nextQuestion"]["id"]
+        assert row.enemy_hp == body["battleState"]["enemyHp"]
+
+    flee = client.post(
+        "/api/v1/combat/flee",
+        json={"battleId": battle_id},
+        headers=_headers(csrf_headers, "combat-turn-flee"),
+    )
+    assert flee.status_code == 200
+    with get_session() as session:
+        row = session.get(CombatBattle, battle_id)
+        assert row.status == "victory"
+    assert combat_state._get(battle_id) is None
+
+
+def test_combat_turn_log_is_written_at_battle_end_and_replays(
+    client, csrf_headers, monkeypatch, fake_redis
+):
+    from app.core.config import settings
+    from app.models import CombatBattle, CombatTurn
+    from app.services.combat import replay_battle
+
+    monkeypatch.setattr(settings, "combat_state_cache_enabled", True)
+    monkeypatch.setattr(settings, "combat_state_flush_every", 3)
+    user_id = _signup(client, csrf_headers, email="combat-log@example.com")
+
+    start = client.post(
+        "/api/v1/combat/start",
+        json={"moduleId": "basic", "reset": True},
+        headers=_headers(csrf_headers, "combat-log-start"),
+    )
+    battle_id = start.json()["battleState"]["battleId"]
+    question = client.post(
+        "/api/v1/combat/question",
+        json={"battleId": battle_id},
+        headers=_headers(csrf_headers, "combat-log-question"),
+    ).json()["question"]
+    for idx in range(4):
+        correct = _question_answer(question["text"])
+        turn = client.post(
+            "/api/v1/combat/turn",
+            json={
+                "battleId": battle_id,
+                "questionId": question["id"],
+                # Alternate right and wrong answers so both damage paths are logged.
+                "optionIndex": correct if idx % 2 == 0 else (correct + 1) % 4,
+            },
+            headers=_headers(csrf_headers, f"combat-log-turn-{idx}"),
+        )
+        assert turn.status_code == 200
+        question = turn.json()["nextQuestion"]
+
+    with get_session() as session:
+        assert session.exec(select(CombatTurn).where(CombatTurn.battle_id == battle_id)).all() == []
+
+    flee = client.post(
+        "/api/v1/combat/flee",
+        json={"battleId": battle_id},
+        headers=_headers(csrf_headers, "combat-log-flee"),
+    )
+    assert flee.status_code == 200
+    final_state = flee.json()["battleState"]
+
+    with get_session() as session:
+        battle = session.get(CombatBattle, battle_id)
+        assert battle.user_id == user_id
+        assert battle.rng_seed is not None
+        assert battle.turn_log_json == []
+        turns = session.exec(
+            select(CombatTurn).where(CombatTurn.battle_id == battle_id).order_by(CombatTurn.seq)
+        ).all()
+        # start, draw, 4 x (answer + draw), flee
+        assert [t.kind for t in turns] == ["start", "draw"] + ["answer", "draw"] * 4 + ["flee"]
+        assert [t.seq for t in turns] == list(range(len(turns)))
+        assert turns[-1].enemy_hp == final_state["enemyHp"]
+
+        report = replay_battle(session, battle_id=battle_id)
+        assert report["replayable"] is True
+        assert report["consistent"] is True
+        assert report["enemyHp"] == final_state["enemyHp"]
+        assert report["playerHp"] == final_state["playerHp"]
+
+        tampered = next(t for t in turns if t.kind == "answer" and t.player_damage > 0)
+        tampered.player_damage += 1
+        session.add(tampered)
+        session.commit()
+        report = replay_battle(session, battle_id=battle_id)
+        assert report["consistent"] is False
+        assert report["divergedAt"] == tampered.seq
+
+        # Content edited after the battle: the log can no longer be checked.
+        battle = session.get(CombatBattle, battle_id)
+        assert battle.content_hash
+        battle.content_hash = "0" * 16
+        session.add(battle)
+        session.commit()
+        report = replay_battle(session, battle_id=battle_id)
+        assert report["replayable"] is False
+        assert report["reason"] == "content_changed"
+
+
+def test_combat_state_cache_stays_off_without_redis(monkeypatch):
+    from app.core.config import settings
+    from app.services import combat_state
+
+    monkeypatch.setattr(settings, "combat_state_cache_enabled", True)
+    monkeypatch.setattr(settings, "redis_url", "")
+    monkeypatch.setattr(combat_state, "_redis", None)
+    monkeypatch.setattr(combat_state, "_redis_ready", False)
+    assert combat_state.cache_enabled() is False
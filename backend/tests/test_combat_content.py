@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from app.services.combat_content import (
+    COMBAT_MODULES,
+    get_combat_module,
+    load_combat_modules,
+)
+
+
+def test_bundled_modules_are_compiled_with_index_and_bounds():
+    assert {m.id for m in COMBAT_MODULES} >= {"basic", "vba", "powerquery"}
+    module = get_combat_module("vba")
+    assert module.damage_bounds == (90, 110)
+    assert module.question_ids == ("q_vba_1", "q_vba_2", "q_vba_3")
+    question = module.question("q_vba_3")
+    assert question is not None and question.correct_answer == 1
+    assert question.payload == {
+        "id": "q_vba_3",
+        "text": "Qual comando sai de um loop For?",
+        "options": ["Stop", "Exit For", "Break", "End"],
+    }
+    assert module.question("missing") is None
+    assert get_combat_module("unknown").id == COMBAT_MODULES[0].id
+
+
+def _write_pack(path, modules, version=1):
+    path.write_text(json.dumps({"version": version, "modules": modules}), encoding="utf-8")
+
+
+def _module(module_id, question_ids=("a",)):
+    return {
+        "id": module_id,
+        "title": module_id.title(),
+        "boss": {"name": "Boss", "hp": 10, "rank": "F"},
+        "questions": [
+            {"id": qid, "text": "?", "options": ["x", "y"], "correctAnswer": 1, "damage": 5}
+            for qid in question_ids
+        ],
+    }
+
+
+def test_content_packs_load_in_order_and_reject_conflicts(tmp_path):
+    _write_pack(tmp_path / "a_core.json", [_module("one")])
+    _write_pack(tmp_path / "b_extra.json", [_module("two", ("a", "b"))])
+    assert [m.id for m in load_combat_modules(tmp_path)] == ["one", "two"]
+
+    _write_pack(tmp_path / "c_dup.json", [_module("one")])
+    with pytest.raises(ValueError, match="duplicate combat module"):
+        load_combat_modules(tmp_path)
+
+    (tmp_path / "c_dup.json").unlink()
+    _write_pack(tmp_path / "d_future.json", [_module("three")], version=2)
+    with pytest.raises(ValueError, match="unsupported combat content version"):
+        load_combat_modules(tmp_path)
@@ -0,0 +1,42 @@
+import time
+
+from app.services.gemini_client import GeminiClientPool
+
+
+class _Client:
+    def __init__(self, api_key):
+        self.api_key = api_key
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_pool_reuses_clients_per_key_and_evicts_lru():
+    built = []
+
+    def factory(api_key):
+        built.append(api_key)
+        return _Client(api_key)
+
+    pool = GeminiClientPool(max_size=2, idle_ttl_sec=60, factory=factory)
+    a = pool.get("key-a")
+    assert pool.get("key-a") is a
+    b = pool.get("key-b")
+    pool.get("key-a")
+    pool.get("key-c")  # evicts key-b, the least recently used
+
+    assert built == ["key-a", "key-b", "key-c"]
+    # An evicted client may still serve an in-flight request: never closed by the pool.
+    assert not b.closed
+    assert len(pool) == 2
+    assert pool.get("key-b") is not b
+
+
+def test_pool_rebuilds_idle_clients():
+    pool = GeminiClientPool(max_size=4, idle_ttl_sec=0.01, factory=_Client)
+    first = pool.get("key")
+    time.sleep(0.02)
+    second = pool.get("key")
+    assert second is not first
+    assert not first.closed
@@ -0,0 +1,70 @@
+import asyncio
+import time
+
+from app.core.config import settings
+from app.services import gemini_client as gc_module
+
+
+class _AsyncModels:
+    def __init__(self, delays):
+        self.delays = delays
+        self.started = []
+        self.cancelled = []
+
+    async def generate_content(self, *, model, contents, config=None):
+        self.started.append(model)
+        try:
+            await asyncio.sleep(self.delays[model])
+        except asyncio.CancelledError:
+            self.cancelled.append(model)
+            raise
+        return type("Resp", (), {"text": f"answer from {model}"})()
+
+
+class _AsyncClient:
+    def __init__(self, delays):
+        self.aio = type("Aio", (), {})()
+        self.aio.models = _AsyncModels(delays)
+
+
+def _setup(monkeypatch, delays, *, hedge: bool) -> _AsyncModels:
+    stub = _AsyncClient(delays)
+    monkeypatch.setattr(
+        gc_module, "_create_client_tuple",
+        lambda *, model_name, **_: (stub, model_name, {}),
+    )
+    monkeypatch.setattr(settings, "gemini_model_chain", ",".join(delays))
+    monkeypatch.setattr(settings, "ai_hedge_enabled", hedge)
+    monkeypatch.setattr(settings, "ai_hedge_default_delay_ms", 50)
+    monkeypatch.setattr(settings, "ai_hedge_min_delay_ms", 0)
+    return stub.aio.models
+
+
+def test_hedged_request_takes_first_answer_and_cancels_the_loser(monkeypatch):
+    models = _setup(monkeypatch, {"hedge-slow": 2.0, "hedge-fast": 0.01}, hedge=True)
+
+    started = time.perf_counter()
+    text = asyncio.run(gc_module.generate_content_text(prompt="oi", api_key="fake-key"))
+
+    assert text == "answer from hedge-fast"
+    assert time.perf_counter() - started < 1.0
+    assert models.started == ["hedge-slow", "hedge-fast"]
+    assert models.cancelled == ["hedge-slow"]
+
+
+def test_without_hedging_models_run_sequentially(monkeypatch):
+    models = _setup(monkeypatch, {"seq-first": 0.1, "seq-second": 0.01}, hedge=False)
+
+    text = asyncio.run(gc_module.generate_content_text(prompt="oi", api_key="fake-key"))
+
+    assert text == "answer from seq-first"
+    assert models.started == ["seq-first"]
+
+
+def test_hedge_delay_uses_latency_percentile(monkeypatch):
+    monkeypatch.setattr(settings, "ai_hedge_min_samples", 5)
+    monkeypatch.setattr(settings, "ai_hedge_percentile", 0.9)
+    monkeypatch.setattr(settings, "ai_hedge_min_delay_ms", 0)
+    for latency in (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 5.0):
+        gc_module.record_model_latency("percentile-model", latency)
+    assert gc_module.hedge_delay_sec("percentile-model") == 0.9
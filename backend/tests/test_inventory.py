@@ -76,3 +76,93 @@ def test_inventory_persists_and_consumes(client, csrf_headers):
         headers=csrf_headers(),
     )
     assert r.status_code == 404
+
+
+def test_inventory_defaults_are_lazy_and_consumption_is_atomic(
+    client, csrf_headers, monkeypatch, fake_redis
+):
+    from sqlmodel import select
+
+    from app.core.config import settings
+    from app.db import get_session
+    from app.models import UserInventory
+    from app.services import inventory as inventory_service
+
+    monkeypatch.setattr(settings, "inventory_cache_enabled", True)
+    assert inventory_service.cache_enabled()
+    user_id = _signup(client, csrf_headers, email="inventory-lazy@example.com")["user"]["id"]
+
+    listed = client.get("/api/v1/inventory")
+    assert listed.status_code == 200
+    assert _find_item(listed.json(), "coffee")["qty"] == 5
+    assert f"inventory:{user_id}" in fake_redis.data
+    client.get("/api/v1/me/state")
+    with get_session() as session:
+        rows = session.exec(select(UserInventory).where(UserInventory.user_id == user_id)).all()
+        assert rows == []
+
+    r = client.post(
+        "/api/v1/inventory/use",
+        json={"itemId": "coffee", "qty": 3},
+        headers=csrf_headers(),
+    )
+    assert r.status_code == 200
+    assert r.json()["item"]["qty"] == 2
+
+    # The cached read from before the purchase was dropped on commit.
+    assert _find_item(client.get("/api/v1/inventory").json(), "coffee")["qty"] == 2
+
+    r = client.post(
+        "/api/v1/inventory/use",
+        json={"itemId": "coffee", "qty": 3},
+        headers=csrf_headers(),
+    )
+    assert r.status_code == 400
+    r = client.post(
+        "/api/v1/inventory/use",
+        json={"itemId": "coffee", "qty": 2},
+        headers=csrf_headers(),
+    )
+    assert r.status_code == 200
+    assert r.json()["item"]["qty"] == 0
+
+    with get_session() as session:
+        rows = session.exec(select(UserInventory).where(UserInventory.user_id == user_id)).all()
+        assert [(row.item_id, row.qty) for row in rows] == [("coffee", 0)]
+    assert _find_item(client.get("/api/v1/me/state").json()["inventory"], "coffee")["qty"] == 0
+
+
+def test_inventory_cache_fill_racing_a_write_is_never_served(
+    client, csrf_headers, monkeypatch, fake_redis
+):
+    from app.core.config import settings
+    from app.services import inventory as inventory_service
+
+    monkeypatch.setattr(settings, "inventory_cache_enabled", True)
+    user_id = _signup(client, csrf_headers, email="inventory-race@example.com")["user"]["id"]
+
+    # A reader takes the generation and selects the old quantities...
+    generation, cached = inventory_service._cache_get(user_id)
+    assert cached is None
+    # ...a purchase commits and invalidates...
+    r = client.post(
+        "/api/v1/inventory/use",
+        json={"itemId": "coffee", "qty": 1},
+        headers=csrf_headers(),
+    )
+    assert r.status_code == 200
+    # ...and only then does the reader fill the cache.
+    inventory_service._cache_set(user_id, generation, {"coffee": 5})
+
+    assert _find_item(client.get("/api/v1/inventory").json(), "coffee")["qty"] == 4
+
+
+def test_inventory_cache_stays_off_without_redis(monkeypatch):
+    from app.core.config import settings
+    from app.services import inventory as inventory_service
+
+    monkeypatch.setattr(settings, "inventory_cache_enabled", True)
+    monkeypatch.setattr(settings, "redis_url", "")
+    monkeypatch.setattr(inventory_service, "_redis", None)
+    monkeypatch.setattr(inventory_service, "_redis_ready", False)
+    assert inventory_service.cache_enabled() is False
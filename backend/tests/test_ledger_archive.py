@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import pytest
+from sqlmodel import select
+
+from app.db import get_session
+from app.models import User, XpLedgerArchive, XpLedgerDailyTotal, XpLedgerEvent, XpLedgerSourceKey
+from app.services.ledger_archive import archive_closed_ledger_months, iter_archived_events
+from app.services.progression import DuplicateLedgerSource, apply_xp_gold
+
+
+def _signup(client, csrf_headers, email: str) -> str:
+    r = client.post(
+        "/api/v1/auth/signup",
+        json={"email": email, "password": "secret123"},
+        headers=csrf_headers(),
+    )
+    assert r.status_code == 200
+    with get_session() as session:
+        return session.exec(select(User.id).where(User.email == email)).one()
+
+
+def test_archive_rolls_up_exports_and_prunes_closed_months(client, csrf_headers, tmp_path):
+    user_id = _signup(client, csrf_headers, "ledger-archive@example.com")
+    old_day = datetime(2020, 3, 14, 12, 0, tzinfo=timezone.utc)
+    recent_day = datetime(2026, 10, 2, 12, 0, tzinfo=timezone.utc)
+
+    with get_session() as session:
+        for idx in range(3):
+            session.add(
+                XpLedgerEvent(
+                    user_id=user_id,
+                    event_type="session.created",
+                    source_type="archive_test",
+                    source_ref=f"old-{idx}",
+                    xp_delta=10,
+                    gold_delta=2,
+                    payload_json={"idx": idx},
+                    created_at=old_day,
+                )
+            )
+        session.add(
+            XpLedgerEvent(
+                user_id=user_id,
+                event_type="session.created",
+                source_type="archive_test",
+                source_ref="recent",
+                xp_delta=5,
+                created_at=recent_day,
+            )
+        )
+        session.commit()
+
+        archived = archive_closed_ledger_months(
+            session,
+            keep_months=3,
+            export_dir=str(tmp_path),
+            now=datetime(2026, 10, 18, tzinfo=timezone.utc),
+        )
+        assert "2020-03" in archived
+
+        totals = session.exec(
+            select(XpLedgerDailyTotal).where(XpLedgerDailyTotal.user_id == user_id)
+        ).all()
+        assert [(t.day_key, t.event_count, t.xp_total, t.gold_total) for t in totals] == [
+            ("2020-03-14", 3, 30, 6)
+        ]
+
+        remaining = session.exec(
+            select(XpLedgerEvent.source_ref).where(
+                XpLedgerEvent.user_id == user_id,
+                XpLedgerEvent.source_type == "archive_test",
+            )
+        ).all()
+        assert remaining == ["recent"]
+
+        manifest = session.exec(
+            select(XpLedgerArchive).where(XpLedgerArchive.month_key == "2020-03")
+        ).one()
+        assert manifest.raw_deleted is True
+        assert manifest.file_path
+        archive_path = manifest.file_path
+
+        keys = session.exec(
+            select(XpLedgerSourceKey.source_ref).where(XpLedgerSourceKey.user_id == user_id)
+        ).all()
+        assert sorted(keys) == ["old-0", "old-1", "old-2"]
+        # A pruned source cannot be rewarded twice.
+        with pytest.raises(DuplicateLedgerSource):
+            apply_xp_gold(
+                session,
+                session.get(User, user_id),
+                xp_delta=10,
+                autocommit=False,
+                persist_ledger=True,
+                source_type="archive_test",
+                source_ref="old-0",
+            )
+        session.rollback()
+        assert not list(tmp_path.glob("*.tmp"))
+
+    replayed = [e for e in iter_archived_events(archive_path) if e["user_id"] == user_id]
+    assert sorted(e["source_ref"] for e in replayed) == ["old-0", "old-1", "old-2"]
+    assert replayed[0]["created_at"] == old_day
+
+
+def test_archive_resumes_an_interrupted_prune(client, csrf_headers, tmp_path, monkeypatch):
+    import app.services.ledger_archive as ledger_archive
+
+    user_id = _signup(client, csrf_headers, "ledger-resume@example.com")
+    old_day = datetime(2019, 5, 7, 12, 0, tzinfo=timezone.utc)
+    with get_session() as session:
+        for idx in range(2):
+            session.add(
+                XpLedgerEvent(
+                    user_id=user_id,
+                    event_type="session.created",
+                    source_type="resume_test",
+                    source_ref=f"old-{idx}",
+                    xp_delta=10,
+                    created_at=old_day,
+                )
+            )
+        session.commit()
+
+    def _crash(_session, _start):
+        raise RuntimeError("worker killed")
+
+    now = datetime(2026, 10, 18, tzinfo=timezone.utc)
+    with get_session() as session:
+        monkeypatch.setattr(ledger_archive, "prune_month", _crash)
+        with pytest.raises(RuntimeError):
+            archive_closed_ledger_months(session, export_dir=str(tmp_path), now=now)
+        monkeypatch.undo()
+
+    with get_session() as session:
+        # The exported month is no longer "closed and unarchived", but is finished anyway.
+        archive_closed_ledger_months(session, export_dir=str(tmp_path), now=now)
+        manifest = session.exec(
+            select(XpLedgerArchive).where(XpLedgerArchive.month_key == "2019-05")
+        ).one()
+        assert manifest.raw_deleted is True
+        remaining = session.exec(
+            select(XpLedgerEvent.id).where(XpLedgerEvent.source_type == "resume_test")
+        ).all()
+        assert remaining == []
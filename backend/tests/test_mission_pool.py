@@ -0,0 +1,88 @@
+from app.core.config import settings
+from app.services.mission_pool import MissionPool, select_pool_missions, set_mission_pool
+
+_SUBJECTS = ["SQL", "Python", "Excel", "Data Modeling", "Cloud", "ETL", "Spark", "General"]
+
+
+def _pool_payload(per_rank: int = 2) -> dict:
+    payload: dict[str, list[dict]] = {}
+    for subject in _SUBJECTS:
+        payload[subject] = [
+            {
+                "subject": subject,
+                "rank": rank,
+                "title": f"Operacao {subject} {rank}{n}",
+                "description": f"Treino de {subject} nivel {rank}.",
+                "objective": f"Concluir o treino de {subject}.",
+                "target_minutes": 30,
+                "difficulty": "medium",
+                "tags": [subject.lower()],
+            }
+            for rank in ("F", "E", "D", "C", "B", "A", "S")
+            for n in range(per_rank)
+        ]
+    return payload
+
+
+def test_pool_selection_is_deterministic_and_rotates_on_exclusion():
+    pool = MissionPool.from_payload(_pool_payload())
+    goals = {"SQL": 40, "Python": 30}
+    kwargs = dict(goals=goals, cycle="daily", user_id="u1", period_key="2026-10-18", pool=pool)
+
+    first = select_pool_missions(**kwargs)
+    again = select_pool_missions(**kwargs)
+    assert first is not None and again is not None
+    assert [m.title for m in first] == [m.title for m in again]
+    assert len(first) == 5
+    assert len({m.subject for m in first}) == 5
+    assert first[0].subject == "SQL"
+    assert first[0].target_minutes == 40
+    assert all(m.source == "pool" for m in first)
+
+    rotated = select_pool_missions(**kwargs, exclude_titles={m.title for m in first})
+    assert rotated is not None
+    assert {m.title for m in rotated}.isdisjoint({m.title for m in first})
+
+
+def test_pool_without_coverage_returns_none():
+    pool = MissionPool.from_payload(_pool_payload())
+    missing = select_pool_missions(
+        goals={"Astronomia": 30},
+        cycle="daily",
+        user_id="u1",
+        period_key="2026-10-18",
+        pool=pool,
+    )
+    assert missing is None
+    assert select_pool_missions(
+        goals={}, cycle="weekly", user_id="u1", period_key="2026-W42", pool=MissionPool([])
+    ) is None
+
+
+def test_regenerate_serves_missions_from_pool(client, csrf_headers):
+    r = client.post(
+        "/api/v1/auth/signup",
+        json={"email": "mission-pool@example.com", "password": "secret123"},
+        headers=csrf_headers(),
+    )
+    assert r.status_code == 200
+
+    prev_key = settings.gemini_api_key
+    set_mission_pool(MissionPool.from_payload(_pool_payload()))
+    try:
+        settings.gemini_api_key = ""
+        r = client.post(
+            "/api/v1/missions/regenerate",
+            json={"cycle": "both", "reason": "pool"},
+            headers=csrf_headers(),
+        )
+    finally:
+        settings.gemini_api_key = prev_key
+        set_mission_pool(None)
+
+    assert r.status_code == 200
+    body = r.json()
+    assert body["source"] == "pool"
+    assert len(body["dailyQuests"]) == 5
+    assert len(body["weeklyQuests"]) == 5
+    assert all(q["title"].startswith("Operacao ") for q in body["dailyQuests"])
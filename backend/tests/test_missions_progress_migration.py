@@ -62,3 +62,18 @@ def test_missions_regenerate_preserves_progress_and_claim_status(client, csrf_he
 
     assert post_total_progress >= pre_total_progress
     assert post_claimed >= pre_claimed
+
+
+def test_similarity_matrix_matches_pairwise_scores():
+    from app.services.mission_generator import (
+        _score_subject_similarity,
+        _similarity_matrix,
+    )
+
+    old = ["SQL", "sql avançado", "Python", "Estatística 3", "", "Docker Kafka", "SQL"]
+    new = ["SQL", "Python", "Spark", "Estatistica", "Excel"]
+    matrix = _similarity_matrix(old, new)
+
+    assert set(matrix) == set(old)
+    for subject in old:
+        assert matrix[subject] == [_score_subject_similarity(subject, target) for target in new]
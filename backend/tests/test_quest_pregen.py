@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+from sqlmodel import select
+
+from app.db import get_session
+from app.models import DailyQuest, User, WeeklyQuest
+from app.services.quests import pregenerate_quests
+from app.services.utils import date_key, now_local, week_key
+
+
+def _signup(client, csrf_headers, email: str) -> str:
+    r = client.post(
+        "/api/v1/auth/signup",
+        json={"email": email, "password": "secret123"},
+        headers=csrf_headers(),
+    )
+    assert r.status_code == 200
+    with get_session() as session:
+        return session.exec(select(User.id).where(User.email == email)).one()
+
+
+def test_pregenerate_quests_builds_next_periods_once(client, csrf_headers):
+    user_ids = [_signup(client, csrf_headers, f"pregen-{idx}@example.com") for idx in range(3)]
+    now = now_local()
+    dk = date_key(now + timedelta(days=1))
+    wk = week_key(now + timedelta(days=7))
+
+    with get_session() as session:
+        result = pregenerate_quests(session, now=now, batch_size=2)
+    assert result["users"] >= 3
+    assert result["daily_quests"] >= 15
+
+    with get_session() as session:
+        for user_id in user_ids:
+            daily = session.exec(
+                select(DailyQuest).where(DailyQuest.user_id == user_id, DailyQuest.date_key == dk)
+            ).all()
+            weekly = session.exec(
+                select(WeeklyQuest).where(
+                    WeeklyQuest.user_id == user_id, WeeklyQuest.week_key == wk
+                )
+            ).all()
+            assert len(daily) == 5
+            assert len(weekly) == 5
+            assert all(q.id and q.progress_minutes == 0 for q in daily)
+
+        again = pregenerate_quests(session, now=now, batch_size=2)
+    assert again["daily_quests"] == 0
+    assert again["weekly_quests"] == 0
@@ -0,0 +1,192 @@
+def _signup(client, csrf_headers, email):
+    r = client.post(
+        "/api/v1/auth/signup",
+        json={"email": email, "password": "secret123"},
+        headers=csrf_headers(),
+    )
+    assert r.status_code == 200
+
+
+def test_monthly_report_groups_sessions_by_month(client, csrf_headers):
+    _signup(client, csrf_headers, "monthly-report@example.com")
+    dated = (("2026-08-03", 30), ("2026-08-20", 15), ("2026-09-01", 40), ("2026-10-02", 25))
+    for _, minutes in dated:
+        r = client.post(
+            "/api/v1/sessions",
+            json={"subject": "SQL", "minutes": minutes, "mode": "pomodoro"},
+            headers=csrf_headers(),
+        )
+        assert r.status_code == 201
+
+    # Creates are stamped with today; move them into their months.
+    sessions = client.get("/api/v1/sessions").json()["sessions"]
+    ids_by_minutes = {s["minutes"]: s["id"] for s in sessions}
+    for date_key, minutes in dated:
+        r = client.patch(
+            f"/api/v1/sessions/{ids_by_minutes[minutes]}",
+            json={"date": date_key},
+            headers=csrf_headers(),
+        )
+        assert r.status_code == 204
+
+    deleted = client.delete(f"/api/v1/sessions/{ids_by_minutes[40]}", headers=csrf_headers())
+    assert deleted.status_code == 204
+
+    r = client.get("/api/v1/reports/monthly", params={"months": 2})
+    assert r.status_code == 200
+    rows = r.json()["months"]
+    # Newest first, soft-deleted sessions excluded, limited to the requested months.
+    assert [(row["month"], row["minutes"], row["sessions"]) for row in rows] == [
+        ("2026-10", 25, 1),
+        ("2026-08", 45, 2),
+    ]
+    assert rows[1]["xp"] > 0
+
+
+def test_refresh_report_views_is_noop_outside_postgres():
+    from app.db import get_session
+    from app.services.report_views import refresh_report_views
+
+    with get_session() as db:
+        assert refresh_report_views(db, force=True) == []
+
+
+def test_report_view_is_bypassed_after_sessions_are_hard_deleted(
+    client, csrf_headers, monkeypatch
+):
+    from datetime import datetime, timezone
+
+    from sqlmodel import select
+
+    from app.db import get_session
+    from app.models import ReportViewRefresh, User
+    from app.services import report_views
+
+    _signup(client, csrf_headers, "view-freshness@example.com")
+    r = client.post(
+        "/api/v1/sessions",
+        json={"subject": "SQL", "minutes": 20, "mode": "pomodoro"},
+        headers=csrf_headers(),
+    )
+    assert r.status_code == 201
+
+    def view_usable(user_id):
+        # Pretend to be on Postgres while checking the view.
+        with monkeypatch.context() as m, get_session() as db:
+            m.setattr(report_views, "_is_postgres", lambda session: True)
+            return report_views._view_usable(db, user_id=user_id, view=report_views.DAILY_VIEW)
+
+    # A view refreshed after that write.
+    with get_session() as db:
+        user_id = db.exec(select(User.id).where(User.email == "view-freshness@example.com")).one()
+        db.merge(
+            ReportViewRefresh(
+                name=report_views.DAILY_VIEW, refreshed_at=datetime.now(timezone.utc)
+            )
+        )
+        db.commit()
+    try:
+        assert view_usable(user_id)
+
+        # A hard delete leaves no row with a newer updated_at behind.
+        r = client.post("/api/v1/me/reset", json={"scopes": ["sessions"]}, headers=csrf_headers())
+        assert r.status_code == 200
+        assert not view_usable(user_id)
+    finally:
+        with get_session() as db:
+            row = db.get(ReportViewRefresh, report_views.DAILY_VIEW)
+            if row is not None:
+                db.delete(row)
+                db.commit()
+
+
+def test_weekly_report_and_state_share_activity_calendar(client, csrf_headers):
+    from datetime import timedelta
+
+    from app.services.utils import now_local
+
+    _signup(client, csrf_headers, "weekly-report@example.com")
+    today = now_local().date()
+    for subject, minutes in (("SQL", 30), ("Python", 20), ("SQL", 10)):
+        r = client.post(
+            "/api/v1/sessions",
+            json={"subject": subject, "minutes": minutes, "mode": "pomodoro"},
+            headers=csrf_headers(),
+        )
+        assert r.status_code == 201
+    sessions = client.get("/api/v1/sessions").json()["sessions"]
+    ten_minutes = next(s for s in sessions if s["minutes"] == 10)
+    r = client.patch(
+        f"/api/v1/sessions/{ten_minutes['id']}",
+        json={"date": (today - timedelta(days=1)).isoformat()},
+        headers=csrf_headers(),
+    )
+    assert r.status_code == 204
+
+    weekly = client.get("/api/v1/reports/weekly").json()
+    assert weekly["totalMinutes"] == 60
+    assert weekly["streakDays"] == 2
+    assert [d["minutes"] for d in weekly["byDay"]][-2:] == [10, 50]
+    assert weekly["bySubject"] == [
+        {"subject": "SQL", "minutes": 40},
+        {"subject": "Python", "minutes": 20},
+    ]
+
+    state = client.get("/api/v1/me/state").json()
+    assert (state["todayMinutes"], state["weekMinutes"], state["streakDays"]) == (50, 60, 2)
+    assert client.get("/api/v1/progress").json()["streakDays"] == 2
+
+
+def test_calendar_report_is_columnar_and_revalidates_with_etag(client, csrf_headers):
+    from datetime import timedelta
+
+    from app.services.utils import now_local
+
+    _signup(client, csrf_headers, "calendar-report@example.com")
+    today = now_local().date()
+    for subject, minutes in (("SQL", 30), ("Python", 20)):
+        r = client.post(
+            "/api/v1/sessions",
+            json={"subject": subject, "minutes": minutes, "mode": "pomodoro"},
+            headers=csrf_headers(),
+        )
+        assert r.status_code == 201
+
+    params = {"from": (today - timedelta(days=6)).isoformat(), "to": today.isoformat()}
+    r = client.get("/api/v1/reports/calendar", params=params)
+    assert r.status_code == 200
+    body = r.json()
+    assert len(body["dates"]) == 7 and body["dates"][-1] == today.isoformat()
+    assert body["minutes"] == [0] * 6 + [50]
+    assert [(s["key"], s["minutes"][-1], s["totalMinutes"]) for s in body["series"]] == [
+        ("SQL", 30, 30),
+        ("Python", 20, 20),
+    ]
+    assert all(len(s["xp"]) == 7 for s in body["series"])
+
+    by_mode = client.get("/api/v1/reports/calendar", params={**params, "groupBy": "mode"})
+    assert [s["key"] for s in by_mode.json()["series"]] == ["pomodoro"]
+    assert by_mode.headers["etag"] != r.headers["etag"]
+
+    etag = r.headers["etag"]
+    cached = client.get(
+        "/api/v1/reports/calendar", params=params, headers={"If-None-Match": etag}
+    )
+    assert cached.status_code == 304
+    weakened = client.get(
+        "/api/v1/reports/calendar", params=params, headers={"If-None-Match": f'"x", W/{etag}'}
+    )
+    assert weakened.status_code == 304
+
+    created = client.post(
+        "/api/v1/sessions",
+        json={"subject": "SQL", "minutes": 5, "mode": "pomodoro"},
+        headers=csrf_headers(),
+    )
+    assert created.status_code == 201
+    fresh = client.get("/api/v1/reports/calendar", params=params, headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.json()["minutes"][-1] == 55
+
+    too_long = {"from": (today - timedelta(days=400)).isoformat(), "to": today.isoformat()}
+    assert client.get("/api/v1/reports/calendar", params=too_long).status_code == 422
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from sqlmodel import select
+
+from app.core.metrics import RETENTION_DELETE_BATCHES_TOTAL
+from app.db import get_session
+from app.models import AuditEvent, SystemWindowMessage, User
+from app.services.retention import (
+    batched_delete_before,
+    partition_name,
+    purge_audit_events,
+    trim_system_messages,
+)
+
+
+def _batches(table: str) -> float:
+    return RETENTION_DELETE_BATCHES_TOTAL.labels(table=table)._value.get()
+
+
+def test_purge_audit_events_deletes_in_batches(client):
+    old = datetime.now(timezone.utc) - timedelta(days=400)
+    recent = datetime.now(timezone.utc) - timedelta(days=1)
+    with get_session() as session:
+        for idx in range(25):
+            session.add(
+                AuditEvent(event="retention.test.old", metadata_json={"i": idx}, created_at=old)
+            )
+        for idx in range(3):
+            session.add(
+                AuditEvent(
+                    event="retention.test.recent", metadata_json={"i": idx}, created_at=recent
+                )
+            )
+        session.commit()
+
+    batches_before = _batches("audit_events")
+    with get_session() as session:
+        cutoff = datetime.now(timezone.utc) - timedelta(days=90)
+        deleted = batched_delete_before(
+            session, AuditEvent, cutoff=cutoff, batch_size=10, sleep_ms=0
+        )
+        assert deleted >= 25
+        assert _batches("audit_events") - batches_before >= 3
+
+        events = session.exec(
+            select(AuditEvent.event).where(AuditEvent.event.startswith("retention.test."))
+        ).all()
+    assert events == ["retention.test.recent"] * 3
+
+    with get_session() as session:
+        assert purge_audit_events(session) == 0
+
+
+def test_partition_name_uses_month():
+    start = datetime(2026, 3, 1, tzinfo=timezone.utc)
+    assert partition_name("audit_events", start) == "audit_events_p202603"
+
+
+def test_trim_system_messages_keeps_newest_per_user(client, csrf_headers):
+    users = []
+    for email in ("trim-a@example.com", "trim-b@example.com"):
+        r = client.post(
+            "/api/v1/auth/signup",
+            json={"email": email, "password": "secret123"},
+            headers=csrf_headers(),
+        )
+        assert r.status_code == 200
+        with get_session() as session:
+            users.append(session.exec(select(User.id).where(User.email == email)).one())
+
+    base = datetime.now(timezone.utc) - timedelta(hours=1)
+    with get_session() as session:
+        for user_id, count in zip(users, (7, 3), strict=True):
+            for idx in range(count):
+                session.add(
+                    SystemWindowMessage(
+                        user_id=user_id,
+                        content=f"msg-{idx}",
+                        created_at=base + timedelta(seconds=idx),
+                    )
+                )
+        session.commit()
+
+    with get_session() as session:
+        assert trim_system_messages(session, max_per_user=4) == 3
+        session.commit()
+        kept = session.exec(
+            select(SystemWindowMessage.content)
+            .where(SystemWindowMessage.user_id == users[0])
+            .order_by(SystemWindowMessage.created_at.asc())
+        ).all()
+        other = session.exec(
+            select(SystemWindowMessage.id).where(SystemWindowMessage.user_id == users[1])
+        ).all()
+    assert kept == ["msg-3", "msg-4", "msg-5", "msg-6"]
+    assert len(other) == 3
+
+
+def test_system_history_append_trims_in_background(client, csrf_headers, monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "ai_history_max_messages", 10)
+    r = client.post(
+        "/api/v1/auth/signup",
+        json={"email": "trim-history@example.com", "password": "secret123"},
+        headers=csrf_headers(),
+    )
+    assert r.status_code == 200
+
+    for batch in range(6):
+        append = client.post(
+            "/api/v1/ai/system-history",
+            json={"messages": [{"role": "user", "content": f"m{batch}-{i}"} for i in range(3)]},
+            headers=csrf_headers(),
+        )
+        assert append.status_code == 200
+        assert len(append.json()["messages"]) <= 10
+
+    with get_session() as session:
+        user_id = session.exec(
+            select(User.id).where(User.email == "trim-history@example.com")
+        ).one()
+        stored = session.exec(
+            select(SystemWindowMessage.id).where(SystemWindowMessage.user_id == user_id)
+        ).all()
+    assert len(stored) == 10
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import asyncio
+
+from fastapi import HTTPException
+
+from app.core import rate_limit as rate_limit_module
+from app.services import single_flight
+
+
+class _FakeRedis:
+    def __init__(self) -> None:
+        self.store: dict[str, str] = {}
+
+    async def set(self, key, value, *, nx=False, px=None, ex=None):
+        if nx and key in self.store:
+            return None
+        self.store[key] = value
+        return True
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def delete(self, key):
+        self.store.pop(key, None)
+
+
+def test_concurrent_calls_share_one_execution():
+    calls = 0
+
+    async def _producer():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"value": calls}
+
+    async def _run():
+        return await asyncio.gather(
+            *(single_flight.coalesce("k:same", _producer, scope="test") for _ in range(3))
+        )
+
+    assert asyncio.run(_run()) == [{"value": 1}] * 3
+    assert calls == 1
+    assert single_flight._inflight == {}
+
+
+def test_followers_receive_the_leaders_http_error():
+    async def _producer():
+        await asyncio.sleep(0.02)
+        raise HTTPException(status_code=429, detail={"code": "rate_limited"})
+
+    async def _run():
+        return await asyncio.gather(
+            *(single_flight.coalesce("k:error", _producer, scope="test") for _ in range(2)),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(_run())
+    assert all(isinstance(r, HTTPException) and r.status_code == 429 for r in results)
+
+
+def test_redis_followers_on_other_workers_share_the_result(monkeypatch):
+    redis = _FakeRedis()
+    monkeypatch.setattr(rate_limit_module, "_redis", redis)
+    monkeypatch.setattr(single_flight, "_POLL_SEC", 0.005)
+    calls = 0
+
+    async def _producer():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"run": calls}
+
+    async def _run():
+        # _coalesce_redis directly: each call behaves like a separate worker process.
+        leader = asyncio.ensure_future(
+            single_flight._coalesce_redis(
+                "k:redis", _producer, scope="test", lock_ttl_sec=5, wait_sec=2
+            )
+        )
+        await asyncio.sleep(0.01)
+        follower = single_flight._coalesce_redis(
+            "k:redis", _producer, scope="test", lock_ttl_sec=5, wait_sec=2
+        )
+        return await asyncio.gather(leader, follower)
+
+    assert asyncio.run(_run()) == [{"run": 1}, {"run": 1}]
+    assert calls == 1
+    assert "sf:lock:k:redis" not in redis.store
+